@@ -16,8 +16,9 @@ class PortfolioAgent:
         entity = memory_store.get_entity(session_id)
         risk = entity.get("risk_category", "moderate")
         tenure = entity.get("tenure_years", None)
+        score = entity.get("risk_score", None)
 
-        allocation = build_portfolio(risk_category=risk, tenure_years=tenure)
+        allocation = build_portfolio(risk_category=risk, tenure_years=tenure, risk_score=score)
         explanation = explain_portfolio(allocation, risk)
 
         # Save allocation in memory
@@ -45,27 +45,26 @@ class SimulationAgent:
                 lumpsum_amount=lumpsum_amount,
                 duration_years=duration
             ),
-            simulation_params=SimulationParams(num_simulations=num_sims)
+            simulation_params=SimulationParams(
+                num_simulations=num_sims,
+                goal_amount=goal_amount
+            )
         )
 
-        # Run Monte Carlo simulation
+        # Run Monte Carlo simulation (goal probability uses the user goal)
         result = run_monte_carlo_simulation(request)
 
-        # Custom probability using user goal
-        probability_of_goal = 0
-        try:
-            probability_of_goal = sum(
-                1 for v in result.final_values if v >= goal_amount
-            ) / num_sims
-        except:
-            probability_of_goal = result.probability_of_goal_achievement
-
         return {
             "expected_value": result.expected_value,
             "best_case": result.best_case,
             "worst_case": result.worst_case,
-            "probability_of_goal_achievement": probability_of_goal,
-            "final_values": result.final_values 
+            "probability_of_goal_achievement": result.probability_of_goal_achievement,
+            "percentiles": result.percentiles,
+            "histogram": result.histogram.model_dump(),
+            "conditional_value_at_risk": result.conditional_value_at_risk,
+            "risk_metrics": result.risk_metrics.model_dump() if result.risk_metrics else None,
+            "goal_curve": result.goal_curve.model_dump() if result.goal_curve else None,
+            "seed": result.seed
         }
 
 
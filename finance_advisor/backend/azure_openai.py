@@ -21,6 +21,10 @@ client = AzureOpenAI(
     http_client=http_client
 )
 
+# Embeddings are retried (and rate limited) by rag/embedding_batches.py;
+# SDK retries on top would bypass its limiter and multiply the attempts
+embedding_client = client.with_options(max_retries=0)
+
 
 # -------------------------------------------------
 # Chat (GPT) Wrapper
@@ -79,7 +83,7 @@ def create_embeddings(
     """
     deployment = model or settings.azure_openai_embedding_deployment
 
-    result = client.embeddings.create(
+    result = embedding_client.embeddings.create(
         model=deployment,
         input=texts,
     )
@@ -1,9 +1,16 @@
 # backend/main.py
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings
+from .tools.return_model import load_return_model
+from .tools.stress_replay import load_stress_library
+from .tools.sim_kernels import warmup_kernels
+from .tools.efficient_frontier import get_frontier
+from .utils.logger import get_logger
 from .routers import (
     chat,
     risk_profile,
@@ -21,10 +28,41 @@ from .routers import (
 )
 
 
+logger = get_logger("main")
+
+
+# -----------------------------
+# STARTUP
+# -----------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Parse the fund CSVs (or load the cached model) and the stress
+    # scenarios, build the efficient frontier and compile the simulator
+    # kernels, before the first request that needs them has to
+    try:
+        load_return_model()
+    except Exception as ex:
+        logger.warning(f"Return model not loaded at startup: {ex}")
+    try:
+        load_stress_library()
+    except Exception as ex:
+        logger.warning(f"Stress scenarios not loaded at startup: {ex}")
+    try:
+        get_frontier()
+    except Exception as ex:
+        logger.warning(f"Efficient frontier not built at startup: {ex}")
+    try:
+        warmup_kernels()
+    except Exception as ex:
+        logger.warning(f"Simulation kernels not compiled at startup: {ex}")
+    yield
+
+
 app = FastAPI(
     title="Finance Advisor Backend",
     description="AI-powered financial advisor using Azure OpenAI.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # -----------------------------
@@ -56,7 +94,6 @@ app.include_router(auth.router)
 app.include_router(memory.router)
 
 
-
 # -----------------------------
 # HEALTH CHECK
 # -----------------------------
@@ -14,11 +14,15 @@ import json
 from backend.tools.risk_profile import compute_risk_score
 from backend.tools.portfolio_engine import build_portfolio
 from backend.tools.portfolio_sim import run_monte_carlo_simulation
+from backend.tools.goal_solver import solve_goal
+from backend.tools.stress_replay import run_stress_test
 from backend.tools.currency_convertor import convert_currency_amount
 from backend.tools.finance_data import fetch_nav_data
 from backend.rag.retriever import retrieve_top_k
 from backend.models.simulate import (
+    GoalSolveRequest,
     PortfolioSimulationRequest,
+    StressTestRequest,
     Allocation,
     InvestmentDetails,
     SimulationParams,
@@ -90,20 +94,28 @@ def risk_profile_tool(age: int,
 
 @register_tool(
     name="portfolio_tool",
-    description="Build portfolio allocation for a given risk category.",
+    description="Build portfolio allocation on the efficient frontier for a risk profile and horizon.",
     parameters_schema={
         "type": "object",
         "properties": {
             "risk_category": {
                 "type": "string",
                 "description": "Risk profile: conservative, moderate, aggressive, etc.",
-            }
+            },
+            "risk_score": {
+                "type": "number",
+                "description": "Optional risk score from risk_profile_tool; more precise than the category.",
+            },
+            "tenure_years": {
+                "type": "integer",
+                "description": "Optional investment horizon; short horizons get less risk.",
+            },
         },
         "required": ["risk_category"],
     },
 )
-def portfolio_tool(risk_category: str):
-    return build_portfolio(risk_category)
+def portfolio_tool(risk_category: str, risk_score: float = None, tenure_years: int = None):
+    return build_portfolio(risk_category, tenure_years=tenure_years, risk_score=risk_score)
 
 
 @register_tool(
@@ -122,23 +134,124 @@ def portfolio_tool(risk_category: str):
             },
             "num_simulations": {
                 "type": "integer",
-                "description": "Number of Monte Carlo simulations to run.",
+                "description": "Number of Monte Carlo simulations to run (upper bound when target_relative_error is set).",
                 "default": 1000,
             },
+            "target_relative_error": {
+                "type": "number",
+                "description": "Optional. Stop early once the expected value's standard error is below this fraction of it (e.g. 0.01).",
+            },
         },
         "required": ["allocation", "investment"],
     },
 )
 def simulate_tool(allocation: Dict[str, Any],
                   investment: Dict[str, Any],
-                  num_simulations: int = 1000):
+                  num_simulations: int = 1000,
+                  target_relative_error: float = None):
     req = PortfolioSimulationRequest(
         session_id="mcp_temp",
         allocation=Allocation(**allocation),
         investment=InvestmentDetails(**investment),
-        simulation_params=SimulationParams(num_simulations=num_simulations),
+        simulation_params=SimulationParams(
+            num_simulations=num_simulations,
+            target_relative_error=target_relative_error,
+        ),
+    )
+    # Summary + pre-binned histogram only; keeps the tool message small
+    return run_monte_carlo_simulation(req).model_dump()
+
+
+@register_tool(
+    name="stress_test_tool",
+    description=(
+        "Replay historical market crashes (2008 financial crisis, 2013 taper tantrum, "
+        "2016 demonetisation, 2018 IL&FS, 2020 COVID, 2022 rate hikes) against a portfolio "
+        "allocation and investment, and report the loss, drawdown and recovery time of each."
+    ),
+    parameters_schema={
+        "type": "object",
+        "properties": {
+            "allocation": {
+                "type": "object",
+                "description": "Allocation JSON with equity, debt, gold, other.",
+            },
+            "investment": {
+                "type": "object",
+                "description": "Investment details (SIP amount, tenure, lump sum, etc.)",
+            },
+            "shock_month": {
+                "type": "integer",
+                "description": "Month of the investment horizon at which the crash starts (0 = immediately).",
+                "default": 0,
+            },
+            "scenario_ids": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Optional subset, e.g. ['gfc_2008', 'covid_2020']. Defaults to all.",
+            },
+        },
+        "required": ["allocation", "investment"],
+    },
+)
+def stress_test_tool(allocation: Dict[str, Any],
+                     investment: Dict[str, Any],
+                     shock_month: int = 0,
+                     scenario_ids: List[str] = None):
+    req = StressTestRequest(
+        session_id="mcp_temp",
+        allocation=Allocation(**allocation),
+        investment=InvestmentDetails(**investment),
+        shock_month=shock_month,
+        scenario_ids=scenario_ids,
+    )
+    return run_stress_test(req).model_dump()
+
+
+@register_tool(
+    name="goal_solver_tool",
+    description=(
+        "Find the monthly SIP / lumpsum amount (solve_for='amount') or the number of years "
+        "(solve_for='duration') needed to reach a goal amount with a target probability."
+    ),
+    parameters_schema={
+        "type": "object",
+        "properties": {
+            "allocation": {
+                "type": "object",
+                "description": "Allocation JSON with equity, debt, gold, other.",
+            },
+            "investment_type": {"type": "string", "enum": ["sip", "lumpsum"]},
+            "goal_amount": {"type": "number", "description": "Target corpus in rupees."},
+            "target_probability": {"type": "number", "default": 0.8},
+            "solve_for": {"type": "string", "enum": ["amount", "duration"], "default": "amount"},
+            "duration_years": {"type": "integer", "description": "Required when solving for the amount."},
+            "monthly_amount": {"type": "number", "description": "SIP amount, when solving for the duration."},
+            "lumpsum_amount": {"type": "number", "description": "Lumpsum amount, when solving for the duration."},
+        },
+        "required": ["allocation", "investment_type", "goal_amount"],
+    },
+)
+def goal_solver_tool(allocation: Dict[str, Any],
+                     investment_type: str,
+                     goal_amount: float,
+                     target_probability: float = 0.8,
+                     solve_for: str = "amount",
+                     duration_years: int = None,
+                     monthly_amount: float = None,
+                     lumpsum_amount: float = None):
+    req = GoalSolveRequest(
+        session_id="mcp_temp",
+        allocation=Allocation(**allocation),
+        investment_type=investment_type,
+        goal_amount=goal_amount,
+        target_probability=target_probability,
+        solve_for=solve_for,
+        duration_years=duration_years,
+        monthly_amount=monthly_amount,
+        lumpsum_amount=lumpsum_amount,
     )
-    return run_monte_carlo_simulation(req)
+    return solve_goal(req).model_dump()
 
 
 @register_tool(
@@ -13,7 +13,7 @@ def normalize(text: str) -> str:
 def search_cache(query: str, threshold: float = 0.75):
     query = normalize(query)
 
-    vec = embed_texts([query])[0]
+    vec = embed_texts([query], cache=False)[0]
     embedding = np.array(vec, dtype=np.float32)
 
     scores, ids = vector_store.search_semantic_cache(embedding)
@@ -37,7 +37,7 @@ def search_cache(query: str, threshold: float = 0.75):
 def save_cache(query: str, response: str):
     query = normalize(query)
 
-    vec = embed_texts([query])[0]
+    vec = embed_texts([query], cache=False)[0]
     emb = np.array(vec, dtype=np.float32)
 
     cache_id = str(uuid.uuid4())
@@ -1,7 +1,7 @@
 # backend/models/simulate.py
 
-from pydantic import BaseModel
-from typing import Optional, Literal
+from pydantic import BaseModel, Field
+from typing import Annotated, Optional, Literal, List, Dict
 
 
 # -----------------------------------------
@@ -14,11 +14,46 @@ class Allocation(BaseModel):
     other: Optional[float] = 0.0     # percentage (could be REITs, intl equity, etc.)
 
 
+# -----------------------------------------
+# Cashflow Schedule Schema
+# -----------------------------------------
+class STPTranche(BaseModel):
+    """Lumpsum parked in a liquid / debt fund and moved in by monthly transfers."""
+    amount: float = Field(..., gt=0)
+    start_month: int = Field(0, ge=0)          # parked at the end of this month (0 = at the start)
+    months: int = Field(12, ge=1)              # number of equal transfers
+    source_return_pct: float = 6.0             # yearly return of the source fund while parked
+
+
+class CashflowSchedule(BaseModel):
+    """
+    Month-by-month contributions / withdrawals. Flows happen at the end
+    of each month, after that month's return; see tools/cashflows.py.
+    """
+    initial_lumpsum: float = Field(0.0, ge=0)
+
+    # Step-up SIP: monthly_sip rises by sip_step_up_pct every 12 months
+    monthly_sip: float = Field(0.0, ge=0)
+    sip_step_up_pct: float = Field(0.0, ge=0)
+    sip_months: Optional[int] = Field(None, ge=0)      # None = whole horizon
+
+    stp_tranches: List[STPTranche] = []
+
+    # SWP: withdrawals after swp_start_month, indexed to inflation_pct
+    # every 12 months. A path whose corpus runs out is floored at zero
+    swp_monthly: float = Field(0.0, ge=0)
+    swp_start_month: int = Field(0, ge=0)
+    inflation_pct: float = 0.0
+
+    # Month -> amount (negative = withdrawal); month 0 is the start
+    one_off: Dict[int, float] = {}
+
+
 # -----------------------------------------
 # Investment Details Schema
 # -----------------------------------------
 class InvestmentDetails(BaseModel):
-    type: Literal["sip", "lumpsum"]  # investment mode
+    type: Literal["sip", "lumpsum", "schedule"]  # investment mode
 
     # SIP fields
     monthly_amount: Optional[float] = None
@@ -26,15 +61,148 @@ class InvestmentDetails(BaseModel):
     # Lumpsum field
     lumpsum_amount: Optional[float] = None
 
+    # Schedule mode: any mix of lumpsum, step-up SIP, STP and SWP
+    schedule: Optional[CashflowSchedule] = None
+
     # Duration
-    duration_years: int              # investment horizon in years
+    duration_years: int = Field(..., ge=1)   # investment horizon in years
+
+
+# -----------------------------------------
+# Rebalancing Policy Schema
+# -----------------------------------------
+class RebalancingPolicy(BaseModel):
+    """
+    Back to the target allocation every `frequency_months` and/or when
+    any asset drifts more than `threshold_pct` percentage points from
+    its target (e.g. 5 -> equity above 55% of a 50% target).
+    """
+    frequency_months: Optional[int] = Field(12, ge=1)   # None = no calendar rebalancing
+    threshold_pct: Optional[float] = Field(None, gt=0)  # None = no threshold trigger
+
+
+# -----------------------------------------
+# Return Distribution Schema
+# -----------------------------------------
+class ReturnDistribution(BaseModel):
+    """
+    Shape of the per-period return shocks (tools/return_generators.py).
+    Every type keeps the configured yearly mean and volatility and only
+    changes the tails / clustering of the draws.
+    """
+    # "normal"           = Gaussian shocks (original behaviour)
+    # "student_t"        = fat tails, shared across assets (multivariate t)
+    # "regime_switching" = two-state Markov chain of calm / crisis periods
+    # "jump_diffusion"   = Gaussian shocks plus Poisson crash jumps
+    type: Literal["normal", "student_t", "regime_switching", "jump_diffusion"] = "normal"
+
+    # student_t
+    degrees_of_freedom: float = Field(5.0, gt=2)
+
+    # regime_switching: yearly probabilities of entering / leaving a crisis;
+    # in a crisis shocks are crisis_volatility_multiplier times wider and
+    # shifted by crisis_drift volatilities
+    crisis_entry_probability: float = Field(0.10, gt=0, lt=1)
+    crisis_exit_probability: float = Field(0.50, gt=0, lt=1)
+    crisis_volatility_multiplier: float = Field(2.0, ge=1)
+    crisis_drift: float = -1.0
+
+    # jump_diffusion: jumps per year, and jump size in volatilities
+    jump_intensity: float = Field(0.25, gt=0)
+    jump_mean: float = -2.5
+    jump_std: float = Field(1.0, ge=0)
 
 
 # -----------------------------------------
 # Simulation Parameters Schema
 # -----------------------------------------
 class SimulationParams(BaseModel):
-    num_simulations: int = 5000      # number of Monte Carlo runs
+    num_simulations: int = Field(5000, ge=1)   # number of Monte Carlo runs (cap in adaptive mode)
+
+    # "vectorized" = NumPy engine, "reference" = original pure-Python loop
+    engine: Literal["vectorized", "reference"] = "vectorized"
+
+    # "blended"     = whole portfolio as one asset (weighted mu / sigma)
+    # "multi_asset" = correlated per-asset return streams (equity, debt, gold, other)
+    model: Literal["blended", "multi_asset"] = "blended"
+
+    # 4x4 correlation matrix in (equity, debt, gold, other) order, multi_asset only.
+    # Defaults to DEFAULT_CORRELATION in tools/portfolio_sim.py
+    correlation: Optional[List[List[float]]] = None
+
+    # Where yearly returns come from:
+    # "parametric" = EXPECTED_RETURNS / VOLATILITY in tools/portfolio_sim.py
+    # "bootstrap"  = block bootstrap over per-fund return histories built
+    #                from data/mutual_funds/*.csv (tools/return_model.py)
+    return_model: Literal["parametric", "bootstrap"] = "parametric"
+    block_years: int = Field(3, ge=1, le=10)         # bootstrap block length
+    # Restrict the bootstrap fund pools to these sub_categories
+    # (e.g. ["Large Cap", "Gilt"]); a class with none of them listed keeps
+    # the parametric EXPECTED_RETURNS / VOLATILITY figures
+    sub_categories: Optional[List[str]] = None
+
+    # Shape of the return shocks (fat tails, regimes, jumps); vectorized engine only
+    return_distribution: ReturnDistribution = ReturnDistribution()
+
+    # Track per-asset holdings on every path and rebalance them by this
+    # policy (compared against buy-and-hold on the same draws). Without
+    # it, the portfolio is kept at its target weights every period
+    rebalancing: Optional[RebalancingPolicy] = None
+
+    # Worker processes for large runs; paths are split into shards with
+    # independent seed streams (see SHARD_PATHS in tools/portfolio_sim.py)
+    workers: int = Field(1, ge=1)
+
+    # Root seed for the per-shard streams (None = fresh entropy)
+    seed: Optional[int] = Field(None, ge=0)
+
+    # Peak working set of one shard in MB (None = MAX_SHARD_MEMORY_MB in
+    # tools/portfolio_sim.py); paths are evaluated shard by shard, so the
+    # run's memory stays bounded whatever num_simulations is. The limit
+    # applies per worker
+    memory_limit_mb: Optional[int] = Field(None, ge=1)
+
+    # "float32" halves the draw matrices. NumPy draws float32 normals
+    # with its own algorithm, so seeded results match float64 runs
+    # statistically, not path for path; statistics are always float64
+    precision: Literal["float64", "float32"] = "float64"
+
+    # Fewer paths for the same confidence interval:
+    # "antithetic"      = paths come in mirrored (z, -z) pairs
+    # "control_variate" = expected value corrected with a lognormal control
+    #                     portfolio whose mean is known analytically
+    # "sobol"           = scrambled Sobol quasi-random draws (needs scipy)
+    variance_reduction: Literal["none", "antithetic", "control_variate", "sobol"] = "none"
+
+    # Adaptive mode (on when target_relative_error is set): run batches of
+    # adaptive_batch_size paths until standard_error <= target_relative_error
+    # * expected_value and probability_standard_error <= probability_tolerance,
+    # or time_budget_seconds / num_simulations is used up
+    target_relative_error: Optional[float] = Field(None, gt=0)
+    probability_tolerance: float = Field(0.01, gt=0)
+    time_budget_seconds: Optional[float] = Field(None, gt=0)
+    adaptive_batch_size: int = Field(1000, ge=100)
+
+    # Terminal value counted as "goal achieved"
+    goal_amount: float = 10_000_000  # 1 Cr
+
+    # Percentiles / histogram come from a quantile sketch; set this to
+    # also get every simulated terminal value back (large payload)
+    return_final_values: bool = False
+    histogram_bins: int = Field(50, ge=1, le=500)
+
+    # Per-path max drawdown / months under water (risk_metrics in the
+    # response); adds about 50% to the run time of a 30-year SIP
+    path_risk_metrics: bool = True
+
+    # Points on the goal-probability curve (P(terminal value >= amount)
+    # over a range of amounts); 0 leaves it out
+    goal_curve_points: int = Field(25, ge=0, le=200)
+
+    # Serve repeated identical requests from the result cache
+    # (tools/simulation_cache.py). Unseeded cached runs get a seed
+    # derived from the request hash, so they are deterministic.
+    use_cache: bool = True
 
 
 # -----------------------------------------
@@ -50,9 +218,192 @@ class PortfolioSimulationRequest(BaseModel):
 # -----------------------------------------
 # Simulation Response Schema
 # -----------------------------------------
+class SimulationHistogram(BaseModel):
+    bin_edges: List[float]           # len(counts) + 1 edges
+    counts: List[int]
+
+
+class PathRiskMetrics(BaseModel):
+    # Distributions over paths ("mean", "p5" .. "p95") of the portfolio's
+    # unit value, i.e. returns only, without the effect of SIP inflows
+    max_drawdown: Dict[str, float]       # fraction of the running peak (0.25 = -25%)
+    months_under_water: Dict[str, float]  # months spent below a previous peak
+
+
+class RebalancingReport(BaseModel):
+    rebalances_per_year: float           # mean over paths
+    annual_turnover: float               # one-way share of the portfolio traded per year
+    buy_and_hold_expected_value: float   # same draws and cashflows, never rebalanced
+    excess_over_buy_and_hold: float      # mean(terminal - buy-and-hold terminal)
+    outperformance_probability: float    # share of paths where rebalancing ends higher
+
+
+class GoalProbabilityCurve(BaseModel):
+    amounts: List[float]             # ascending, p1 .. p99 of terminal values
+    probabilities: List[float]       # P(terminal value >= amount)
+
+
 class PortfolioSimulationResponse(BaseModel):
     expected_value: float
     best_case: float
     worst_case: float
     probability_of_goal_achievement: float
-    final_values: list[float]  
+    percentiles: Dict[str, float]    # "p5", "p25", "p50", "p75", "p95"
+    histogram: SimulationHistogram   # pre-binned terminal values, chart-ready
+    standard_error: float            # of expected_value
+    probability_standard_error: float
+    paths_used: int                  # paths actually simulated
+    seed: Optional[int] = None       # send back as simulation_params.seed to reproduce this result
+    conditional_value_at_risk: Optional[float] = None   # mean of the worst 5% terminal values
+    depletion_probability: Optional[float] = None       # schedules with withdrawals: corpus ran out
+    risk_metrics: Optional[PathRiskMetrics] = None      # vectorized engine only
+    goal_curve: Optional[GoalProbabilityCurve] = None
+    rebalancing: Optional[RebalancingReport] = None     # with simulation_params.rebalancing
+    final_values: Optional[List[float]] = None   # only with return_final_values
+
+
+# -----------------------------------------
+# Simulation Job Schema
+# -----------------------------------------
+class SimulationJobStatus(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "completed", "failed", "cancelled"]
+    progress: float = 0.0            # 0..1, share of num_simulations done
+    paths_completed: int = 0
+    created_at: float                # unix timestamps
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Optional[PortfolioSimulationResponse] = None   # once completed
+
+
+# -----------------------------------------
+# Batch (Scenario Grid) Simulation Schemas
+# -----------------------------------------
+class Scenario(BaseModel):
+    allocation: Allocation
+    monthly_amount: Optional[float] = None   # SIP batches
+    lumpsum_amount: Optional[float] = None   # lumpsum batches
+    duration_years: int = Field(..., ge=1)
+
+
+class ScenarioGrid(BaseModel):
+    """Cartesian product of the listed values."""
+    allocations: List[Allocation]
+    monthly_amounts: List[Optional[float]] = [None]
+    lumpsum_amounts: List[Optional[float]] = [None]
+    duration_years: List[Annotated[int, Field(ge=1)]]
+
+
+class BatchSimulationRequest(BaseModel):
+    session_id: str
+    investment_type: Literal["sip", "lumpsum"]
+
+    # Explicit scenarios and/or a grid; grid scenarios are appended
+    scenarios: List[Scenario] = []
+    grid: Optional[ScenarioGrid] = None
+
+    # num_simulations, seed, model, correlation, variance_reduction and
+    # goal_amount apply; every scenario sees the same random draws
+    simulation_params: SimulationParams = SimulationParams()
+
+
+class ScenarioResult(BaseModel):
+    allocation: Allocation
+    monthly_amount: Optional[float] = None
+    lumpsum_amount: Optional[float] = None
+    duration_years: int
+
+    expected_value: float
+    worst_case: float                # 5th percentile
+    median: float
+    best_case: float                 # 95th percentile
+    probability_of_goal_achievement: float
+    standard_error: float
+
+
+class BatchSimulationResponse(BaseModel):
+    paths: int                       # paths per scenario (shared draws)
+    seed: int                        # root seed of the shared draws
+    results: List[ScenarioResult]    # same order as the expanded scenarios
+
+
+# -----------------------------------------
+# Goal Solver Schemas
+# -----------------------------------------
+class GoalSolveRequest(BaseModel):
+    session_id: str
+    allocation: Allocation
+    investment_type: Literal["sip", "lumpsum"]
+    goal_amount: float = Field(..., gt=0)
+    target_probability: float = Field(0.8, gt=0, lt=1)
+
+    # "amount":   monthly (SIP) / lumpsum amount needed over duration_years
+    # "duration": years needed with monthly_amount / lumpsum_amount,
+    #             searched up to max_duration_years
+    solve_for: Literal["amount", "duration"] = "amount"
+    duration_years: Optional[int] = Field(None, ge=1)
+    monthly_amount: Optional[float] = Field(None, gt=0)
+    lumpsum_amount: Optional[float] = Field(None, gt=0)
+    max_duration_years: int = Field(40, ge=1, le=60)
+
+    # num_simulations, seed, model, return_model etc. apply
+    simulation_params: SimulationParams = SimulationParams()
+
+
+class GoalSolveResponse(BaseModel):
+    solve_for: Literal["amount", "duration"]
+    goal_amount: float
+    target_probability: float
+    required_amount: Optional[float] = None          # monthly for SIP
+    required_duration_years: Optional[int] = None    # None = not reached by max_duration_years
+    achieved_probability: Optional[float] = None
+
+    # Same draws, other targets: "p50" .. "p95" -> amount (amount mode)
+    required_amount_by_probability: Dict[str, float] = {}
+    # year -> P(goal reached) (duration mode)
+    probability_by_duration: Dict[int, float] = {}
+    paths: int
+    seed: Optional[int] = None       # root seed of the draws
+
+
+# -----------------------------------------
+# Stress Test Schemas
+# -----------------------------------------
+class StressTestRequest(BaseModel):
+    session_id: str
+    allocation: Allocation
+    investment: InvestmentDetails
+
+    # Month of the horizon at which each scenario is replayed (0 = at the
+    # start); all other months grow at EXPECTED_RETURNS
+    shock_month: int = Field(0, ge=0)
+
+    # Ids from data/stress_scenarios/historical.json (None = all of them)
+    scenario_ids: Optional[List[str]] = None
+
+
+class StressScenarioResult(BaseModel):
+    scenario_id: str
+    name: str
+    description: str
+    start: str                        # "YYYY-MM" of the first replayed month
+    months_applied: int               # cut short when the horizon ends first
+
+    asset_returns: Dict[str, float]   # cumulative per asset class over the replay
+    portfolio_return: float           # cumulative, returns only (no cashflows)
+    max_drawdown: float               # of the unit value during the replay
+    worst_month: float
+    recovery_months: Optional[int] = None   # from the shock until back at the pre-shock unit value; None = not within the horizon
+
+    value_before: float               # portfolio value when the scenario starts
+    trough_value: float
+    value_after: float                # when the scenario ends
+    terminal_value: float
+    terminal_shortfall: float         # baseline_terminal_value - terminal_value
+
+
+class StressTestResponse(BaseModel):
+    shock_month: int
+    baseline_terminal_value: float    # expected returns throughout, same cashflows
+    results: List[StressScenarioResult]
@@ -0,0 +1,191 @@
+# backend/rag/ann_index.py
+
+"""
+Approximate nearest-neighbour search indexes for the RAG store.
+
+index.faiss stays an exact IndexIDMap2(IndexFlatL2): it is what the
+incremental builder edits. After each build a search index is derived
+from it and written next to it, with its build parameters:
+- index.ann.faiss      the HNSW or IVF-PQ index (same vector ids)
+- index_params.json    {"type", "ntotal", "dim", build / search params}
+
+RAG_INDEX_TYPE picks flat (default), hnsw or ivfpq. Below
+RAG_ANN_MIN_VECTORS vectors brute force is both exact and fast enough,
+so the flat index is used whatever the setting. Search-time knobs
+(ef_search, nprobe) are stored at build time and can be overridden
+with RAG_HNSW_EF_SEARCH / RAG_IVF_NPROBE when loading.
+
+Serving processes open both indexes with read_index_shared(): the
+vectors stay in the file's page cache, mapped read-only, so every
+uvicorn worker shares one copy (RAG_INDEX_MMAP=0 reads them into the
+heap instead).
+"""
+
+import json
+import os
+from typing import Optional, Tuple
+
+import faiss
+import numpy as np
+
+
+INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+INDEX_TYPE = os.getenv("RAG_INDEX_TYPE", "flat").lower()
+ANN_MIN_VECTORS = int(os.getenv("RAG_ANN_MIN_VECTORS", "20000"))
+
+HNSW_M = int(os.getenv("RAG_HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("RAG_HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("RAG_HNSW_EF_SEARCH", "64"))
+
+IVF_NLIST = int(os.getenv("RAG_IVF_NLIST", "0"))          # 0 = 4 * sqrt(N)
+IVF_PQ_M = int(os.getenv("RAG_IVF_PQ_M", "64"))           # sub-quantizers (must divide dim)
+IVF_PQ_NBITS = 8
+IVF_NPROBE = int(os.getenv("RAG_IVF_NPROBE", "16"))
+IVF_TRAIN_PER_LIST = 64                                   # training sample: vectors per list
+# PQ codes alone lose too much for top-k over embeddings; re-rank this many
+# times k candidates by exact distance (keeps full vectors; 0 = off)
+IVF_REFINE_FACTOR = int(os.getenv("RAG_IVF_REFINE", "16"))
+
+INDEX_MMAP = os.getenv("RAG_INDEX_MMAP", "1") != "0"
+# In-place mapping of flat codes needs a recent faiss; older ones only map IVF lists
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def read_index_shared(path: str):
+    """Read-only index backed by the mmapped file where faiss supports it."""
+    if INDEX_MMAP:
+        try:
+            return faiss.read_index(path, MMAP_FLAGS)
+        except RuntimeError:
+            pass        # index type without mmap support
+    return faiss.read_index(path)
+
+
+# -------------------------------------------------------------
+# Vectors of the exact index
+# -------------------------------------------------------------
+def index_vectors(index) -> Tuple[np.ndarray, np.ndarray]:
+    """(ids, vectors) stored in a flat index, with or without an id map."""
+    if isinstance(index, faiss.IndexIDMap):
+        flat = faiss.downcast_index(index.index)
+        ids = faiss.vector_to_array(index.id_map).astype("int64")
+    else:
+        flat = index
+        ids = np.arange(index.ntotal, dtype="int64")
+    vectors = faiss.vector_to_array(flat.codes).view("float32").reshape(index.ntotal, index.d)
+    return ids, vectors
+
+
+# -------------------------------------------------------------
+# Building
+# -------------------------------------------------------------
+def _pq_subquantizers(dim: int, wanted: int) -> int:
+    """Largest divisor of dim not above `wanted`."""
+    return max(m for m in range(1, min(wanted, dim) + 1) if dim % m == 0)
+
+
+def build_search_index(flat_index, index_type: Optional[str] = None,
+                       min_vectors: Optional[int] = None):
+    """
+    (index, params) for searching the vectors of `flat_index`. Returns
+    (None, params) when the flat index itself should be searched.
+    """
+    index_type = (index_type or INDEX_TYPE).lower()
+    min_vectors = ANN_MIN_VECTORS if min_vectors is None else min_vectors
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown RAG index type: {index_type} (expected one of {', '.join(INDEX_TYPES)})")
+
+    n, dim = flat_index.ntotal, flat_index.d
+    params = {"type": "flat", "ntotal": int(n), "dim": int(dim)}
+    if index_type == "flat" or n < min_vectors:
+        return None, params
+
+    ids, vectors = index_vectors(flat_index)
+
+    if index_type == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, HNSW_M)
+        hnsw.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index = faiss.IndexIDMap2(hnsw)
+        index.add_with_ids(vectors, ids)
+        params.update(type="hnsw", M=HNSW_M, ef_construction=HNSW_EF_CONSTRUCTION, ef_search=HNSW_EF_SEARCH)
+
+    else:
+        nlist = IVF_NLIST or max(int(4 * np.sqrt(n)), 1)
+        nlist = min(nlist, max(n // IVF_TRAIN_PER_LIST, 1))
+        m = _pq_subquantizers(dim, IVF_PQ_M)
+
+        ivf = faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, nlist, m, IVF_PQ_NBITS)
+        sample = np.random.default_rng(0).choice(n, size=min(n, nlist * 256), replace=False)
+        ivf.train(vectors[np.sort(sample)])
+
+        if IVF_REFINE_FACTOR:
+            refine = faiss.IndexRefineFlat(ivf)
+            refine.k_factor = IVF_REFINE_FACTOR
+            index = faiss.IndexIDMap2(refine)
+        else:
+            index = ivf                       # IVF lists keep their own ids
+        index.add_with_ids(vectors, ids)
+        params.update(type="ivfpq", nlist=nlist, m=m, nbits=IVF_PQ_NBITS, nprobe=IVF_NPROBE,
+                      refine_factor=IVF_REFINE_FACTOR)
+
+    configure(index, params)
+    return index, params
+
+
+def configure(index, params: dict):
+    """Applies the search-time parameters (env overrides win)."""
+    if params["type"] == "hnsw":
+        hnsw = faiss.downcast_index(index.index)
+        hnsw.hnsw.efSearch = int(os.getenv("RAG_HNSW_EF_SEARCH", params["ef_search"]))
+    elif params["type"] == "ivfpq":
+        faiss.extract_index_ivf(index).nprobe = int(os.getenv("RAG_IVF_NPROBE", params["nprobe"]))
+        if params.get("refine_factor"):
+            faiss.downcast_index(index.index).k_factor = params["refine_factor"]
+
+
+# -------------------------------------------------------------
+# Files
+# -------------------------------------------------------------
+def write_search_index(flat_index, ann_file: str, params_file: str, index_type: Optional[str] = None,
+                       min_vectors: Optional[int] = None) -> dict:
+    """Builds and saves the search index (or drops a stale one); params last."""
+    index, params = build_search_index(flat_index, index_type, min_vectors)
+
+    if index is not None:
+        faiss.write_index(index, ann_file + ".tmp")
+        os.replace(ann_file + ".tmp", ann_file)
+    elif os.path.exists(ann_file):
+        os.remove(ann_file)
+
+    with open(params_file + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(params, f, indent=1)
+    os.replace(params_file + ".tmp", params_file)
+    return params
+
+
+def search_index_stale(flat_index, params_file: str) -> bool:
+    """True when the saved search index is not what write_search_index would build now."""
+    try:
+        with open(params_file, encoding="utf-8") as f:
+            params = json.load(f)
+    except (OSError, ValueError):
+        return True
+    wanted = INDEX_TYPE if flat_index.ntotal >= ANN_MIN_VECTORS else "flat"
+    return params.get("type") != wanted or params.get("ntotal") != flat_index.ntotal
+
+
+def read_search_index(ann_file: str, params_file: str, ntotal: int):
+    """(index, params) saved for an exact index of `ntotal` vectors, or (None, None)."""
+    try:
+        with open(params_file, encoding="utf-8") as f:
+            params = json.load(f)
+    except (OSError, ValueError):
+        return None, None
+
+    # Out of date (e.g. vectors added since): search the exact index instead
+    if params.get("type") == "flat" or params.get("ntotal") != ntotal or not os.path.exists(ann_file):
+        return None, None
+
+    index = read_index_shared(ann_file)
+    configure(index, params)
+    return index, params
@@ -1,16 +1,52 @@
 # backend/rag/embedder.py
 
-from typing import List
+from typing import List, Optional
+
+import numpy as np
+
 from ..azure_openai import create_embeddings
+from ..config import settings
+from .embedding_batches import EmbeddingStats, embed_in_batches
+from .embedding_cache import CACHE_ENABLED, get_embedding_cache, text_key
 
 
-def embed_texts(texts: List[str]) -> List[List[float]]:
+def embed_texts(texts: List[str], stats: Optional[EmbeddingStats] = None,
+                cache: bool = True) -> List[List[float]]:
     """
     Wrapper around Azure OpenAI embedding API.
     Accepts list of texts and returns list of embeddings.
+
+    Texts already in the on-disk embedding cache (rag/embedding_cache.py)
+    are not sent again; only the distinct misses are embedded, in
+    rate-limited concurrent batches (rag/embedding_batches.py).
+    Pass `stats` to collect request / throughput counters, and
+    cache=False for one-off texts such as chat queries, which would
+    otherwise grow the cache without bound.
     """
     if not isinstance(texts, list):
         texts = [texts]
 
-    embeddings = create_embeddings(texts)
-    return embeddings
+    if not texts:
+        return []
+    if not (cache and CACHE_ENABLED):
+        return embed_in_batches(texts, create_embeddings, stats=stats)
+
+    store = get_embedding_cache(settings.azure_openai_embedding_deployment)
+    keys = [text_key(t) for t in texts]
+    vectors = store.get(keys)
+
+    missing = {}
+    for i, (key, vector) in enumerate(zip(keys, vectors)):
+        if vector is None:
+            missing.setdefault(key, i)
+
+    if missing:
+        fresh = np.array(
+            embed_in_batches([texts[i] for i in missing.values()], create_embeddings, stats=stats),
+            dtype=np.float32,
+        )
+        store.put(list(missing), fresh)
+        by_key = dict(zip(missing, fresh))
+        vectors = [by_key[k] if v is None else v for k, v in zip(keys, vectors)]
+
+    return [v.tolist() for v in vectors]
@@ -0,0 +1,187 @@
+# backend/rag/embedding_batches.py
+
+"""
+Batched, rate-limited, concurrent embedding requests.
+
+Large inputs are split into batches of at most EMBED_BATCH_TOKENS
+(estimated) tokens and EMBED_BATCH_SIZE texts, sent from a pool of
+EMBED_WORKERS threads. Every request first takes its share from two
+token buckets, requests per minute (EMBED_RPM) and tokens per minute
+(EMBED_TPM), so the deployment's quota is never exceeded however many
+workers run, and unless a caller brings its own limiter the buckets are
+the module-level `rate_limiter`, shared by every call in the process.
+429s, connection errors and 5xx responses are retried here, and only
+here (the embedding client has SDK retries off), with exponential
+backoff honouring Retry-After when Azure sends it; every attempt goes
+through the limiter. Vectors come back in input order.
+
+Tokens are counted with tiktoken when it is installed (requirements.txt
+lists it as optional), otherwise estimated as 4 characters per token.
+"""
+
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, List, Optional
+
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:       # not installed, or the encoding cannot be fetched
+    _ENCODING = None
+
+
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", "16000"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))      # Azure allows up to 2048 inputs
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "4"))
+EMBED_RPM = float(os.getenv("EMBED_RPM", "300"))                  # 0 = no limit
+EMBED_TPM = float(os.getenv("EMBED_TPM", "240000"))               # 0 = no limit
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+
+# Transient failures worth another attempt (timeouts are connection errors)
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+
+def count_tokens(text: str) -> int:
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def make_batches(tokens: List[int], max_tokens: int = EMBED_BATCH_TOKENS,
+                 max_items: int = EMBED_BATCH_SIZE) -> List[List[int]]:
+    """Consecutive index batches within both limits (a lone oversized text gets its own)."""
+    batches, current, budget = [], [], 0
+    for i, n in enumerate(tokens):
+        if current and (budget + n > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, budget = [], 0
+        current.append(i)
+        budget += n
+    if current:
+        batches.append(current)
+    return batches
+
+
+# -------------------------------------------------------------
+# Rate Limiting
+# -------------------------------------------------------------
+class RateLimiter:
+    """Two token buckets (requests, tokens) refilled per minute and shared by all workers."""
+
+    def __init__(self, requests_per_minute: float = EMBED_RPM, tokens_per_minute: float = EMBED_TPM):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self.requests = requests_per_minute
+        self.tokens = tokens_per_minute
+        self.updated = time.monotonic()
+        self._lock = Lock()
+
+    def acquire(self, tokens: int):
+        """Blocks until one request of `tokens` tokens fits both budgets."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed = (now - self.updated) / 60.0
+                self.updated = now
+                self.requests = min(self.rpm, self.requests + elapsed * self.rpm)
+                self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm)
+
+                # A batch bigger than a whole minute's budget waits for a full bucket
+                need_tokens = min(tokens, self.tpm)
+                wait = 0.0
+                if self.rpm and self.requests < 1:
+                    wait = max(wait, (1 - self.requests) / self.rpm * 60.0)
+                if self.tpm and self.tokens < need_tokens:
+                    wait = max(wait, (need_tokens - self.tokens) / self.tpm * 60.0)
+
+                if wait == 0.0:
+                    if self.rpm:
+                        self.requests -= 1
+                    if self.tpm:
+                        self.tokens -= need_tokens
+                    return
+            time.sleep(wait)
+
+
+# The process's share of the deployment quota: every call draws on it
+rate_limiter = RateLimiter()
+
+
+# -------------------------------------------------------------
+# Dispatch
+# -------------------------------------------------------------
+@dataclass
+class EmbeddingStats:
+    chunks: int = 0
+    tokens: int = 0
+    requests: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        elapsed = max(self.seconds, 1e-9)
+        return (
+            f"{self.chunks} chunks / {self.tokens} tokens in {self.requests} requests "
+            f"({self.retries} retries), {self.seconds:.1f}s: "
+            f"{self.chunks / elapsed:.1f} chunks/s, {self.tokens / elapsed:.0f} tokens/s"
+        )
+
+
+def _retry_after(ex: Exception, attempt: int) -> float:
+    try:
+        return float(ex.response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return min(2 ** attempt, 60) * (0.5 + random.random() / 2)
+
+
+def embed_in_batches(
+    texts: List[str],
+    embed: Callable[[List[str]], List[List[float]]],
+    limiter: Optional[RateLimiter] = None,
+    workers: int = EMBED_WORKERS,
+    stats: Optional[EmbeddingStats] = None,
+) -> List[List[float]]:
+    """
+    embed(batch) for every batch of `texts`, concurrently and within
+    the rate limits; one vector per text, in order.
+    """
+    stats = stats if stats is not None else EmbeddingStats()
+    limiter = limiter or rate_limiter
+    tokens = [count_tokens(t) for t in texts]
+    batches = make_batches(tokens)
+    stats_lock = Lock()
+
+    def run(batch: List[int]) -> List[List[float]]:
+        budget = sum(tokens[i] for i in batch)
+        for attempt in range(EMBED_MAX_RETRIES + 1):
+            limiter.acquire(budget)
+            try:
+                vectors = embed([texts[i] for i in batch])
+            except RETRYABLE_ERRORS as ex:
+                if attempt == EMBED_MAX_RETRIES:
+                    raise
+                with stats_lock:
+                    stats.retries += 1
+                time.sleep(_retry_after(ex, attempt))
+                continue
+            with stats_lock:
+                stats.requests += 1
+            return vectors
+
+    started = time.perf_counter()
+    if len(batches) == 1 or workers <= 1:
+        results = [run(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+            results = list(pool.map(run, batches))      # map keeps batch order
+
+    stats.chunks += len(texts)
+    stats.tokens += sum(tokens)
+    stats.seconds += time.perf_counter() - started
+    return [vector for batch in results for vector in batch]
@@ -0,0 +1,219 @@
+# backend/rag/embedding_cache.py
+
+"""
+Content-addressed on-disk cache of embeddings.
+
+An embedding is keyed by the sha256 of its normalized text (Unicode NFC,
+whitespace collapsed), in a directory per embedding deployment, so a
+new deployment never reads the vectors of another. Each directory holds
+- keys.bin:    32-byte digests, one per row, append-only
+- vectors.f32: raw float32 rows of `dim` values, same order, append-only
+- meta.json:   {"version", "dim"}
+The vectors are memory-mapped, so opening the cache reads only the keys.
+Rows are appended vectors first, keys second; a row counts once its key
+is written, so an interrupted append is ignored on the next open.
+
+Several processes (uvicorn workers, the index builder) may share one
+directory. Appends hold an exclusive lock on `.lock` (flock, or msvcrt
+on Windows) and first pick up the rows other processes added, so a row
+number always comes from the files on disk, never from what this
+process last saw.
+
+Lives under data/cache/embeddings/ (override with EMBEDDING_CACHE_DIR);
+EMBEDDING_CACHE=0 turns it off.
+"""
+
+import hashlib
+import json
+import os
+import unicodedata
+from contextlib import contextmanager
+from functools import lru_cache
+from threading import Lock
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:         # Windows
+    fcntl = None
+    import msvcrt
+
+
+CACHE_VERSION = 1
+DIGEST_BYTES = 32
+
+CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR") or os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "data", "cache", "embeddings")
+)
+CACHE_ENABLED = os.getenv("EMBEDDING_CACHE", "1") != "0"
+
+
+def _lock(f):
+    """Blocks until this process holds an exclusive lock on open file `f`."""
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)    # gives up after ~10s
+            return
+        except OSError:
+            pass
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def text_key(text: str) -> bytes:
+    """sha256 digest of the normalized text."""
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    return hashlib.sha256(normalized.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.keys_file = os.path.join(directory, "keys.bin")
+        self.vectors_file = os.path.join(directory, "vectors.f32")
+        self.meta_file = os.path.join(directory, "meta.json")
+        self.lock_file = os.path.join(directory, ".lock")
+
+        self.dim: Optional[int] = None
+        self.rows: Dict[bytes, int] = {}
+        self.vectors: Optional[np.ndarray] = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+        self._open()
+
+    # -----------------------------------------------------
+    # Files
+    # -----------------------------------------------------
+    def _open(self):
+        try:
+            with open(self.meta_file, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != CACHE_VERSION:
+                return
+            self.dim = int(meta["dim"])
+            with open(self.keys_file, "rb") as f:
+                keys = f.read()
+            count = min(len(keys) // DIGEST_BYTES, os.path.getsize(self.vectors_file) // (4 * self.dim))
+        except (OSError, ValueError, KeyError):
+            return
+
+        self.rows = {keys[i * DIGEST_BYTES:(i + 1) * DIGEST_BYTES]: i for i in range(count)}
+        self._map(count)
+
+    def _map(self, count: int):
+        self.vectors = (
+            np.memmap(self.vectors_file, dtype=np.float32, mode="r", shape=(count, self.dim))
+            if count else None
+        )
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the directory, across processes."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_file, "ab") as f:
+            _lock(f)
+            try:
+                yield
+            finally:
+                _unlock(f)
+
+    def _sync(self) -> int:
+        """
+        Reads the rows other processes appended since this one last
+        looked and returns the row count on disk. Call under _file_lock.
+        """
+        try:
+            with open(self.meta_file, encoding="utf-8") as f:
+                meta = json.load(f)
+            dim = int(meta["dim"]) if meta.get("version") == CACHE_VERSION else None
+        except (OSError, ValueError, KeyError):
+            dim = None
+        if dim != self.dim:
+            self.dim, self.rows = dim, {}
+        if dim is None:
+            return 0
+
+        try:
+            count = min(os.path.getsize(self.keys_file) // DIGEST_BYTES,
+                        os.path.getsize(self.vectors_file) // (4 * dim))
+        except OSError:
+            count = 0
+        known = len(self.rows)
+        if count < known:           # reset by another process
+            self.rows, known = {}, 0
+        if count > known:
+            with open(self.keys_file, "rb") as f:
+                f.seek(known * DIGEST_BYTES)
+                keys = f.read((count - known) * DIGEST_BYTES)
+            for i in range(count - known):
+                self.rows[keys[i * DIGEST_BYTES:(i + 1) * DIGEST_BYTES]] = known + i
+        return count
+
+    def _reset(self, dim: int):
+        """Starts an empty cache of `dim`-wide vectors. Call under _file_lock."""
+        for path in (self.keys_file, self.vectors_file):
+            open(path, "wb").close()
+        with open(self.meta_file, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "dim": dim}, f)
+        self.dim = dim
+        self.rows = {}
+        self.vectors = None
+
+    # -----------------------------------------------------
+    # Lookup / Store
+    # -----------------------------------------------------
+    def get(self, keys: Sequence[bytes]) -> List[Optional[np.ndarray]]:
+        """Cached vector per key, None where missing."""
+        with self._lock:
+            found = [self.rows.get(k) for k in keys]
+            vectors = self.vectors
+        out = [None if row is None else vectors[row] for row in found]
+        hits = sum(v is not None for v in out)
+        self.hits += hits
+        self.misses += len(out) - hits
+        return out
+
+    def put(self, keys: Sequence[bytes], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock, self._file_lock():
+            count = self._sync()
+            if self.dim != vectors.shape[1]:
+                self._reset(vectors.shape[1])
+                count = 0
+
+            new = {}
+            for row, key in enumerate(keys):
+                if key not in self.rows and key not in new:
+                    new[key] = row
+            if new:
+                # Truncating first drops the tail of an interrupted append
+                with open(self.vectors_file, "ab") as f:
+                    f.truncate(count * 4 * self.dim)
+                    f.write(vectors[list(new.values())].tobytes())
+                with open(self.keys_file, "ab") as f:
+                    f.truncate(count * DIGEST_BYTES)
+                    f.write(b"".join(new))
+                for i, key in enumerate(new):
+                    self.rows[key] = count + i
+            self._map(count + len(new))
+
+
+@lru_cache(maxsize=4)
+def get_embedding_cache(deployment: str) -> EmbeddingCache:
+    """The process-wide cache for an embedding deployment."""
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in deployment)
+    return EmbeddingCache(os.path.join(CACHE_DIR, safe))
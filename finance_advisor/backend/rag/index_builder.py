@@ -13,18 +13,27 @@ This script scans your dataset folders inside `data/`:
 It extracts text, embeds it using Azure OpenAI, and stores the
 FAISS index + metadata inside `data/rag_index/`.
 
+Builds are incremental: only files that changed since the last build
+(see manifest.json) are re-embedded. Pass --full to start over.
+
 Run manually:
-    python backend/rag/index_builder.py
+    python -m backend.rag.index_builder [--full]
 """
 
 import os
 import json
-import pickle
+import hashlib
 import faiss
 import numpy as np
 
 from .embedder import embed_texts
-from .vector_store import INDEX_DIR, INDEX_FILE, META_FILE
+from .embedding_batches import EmbeddingStats
+from .ann_index import search_index_stale, write_search_index
+from .meta_store import MappedMeta, write_meta
+from .vector_store import INDEX_DIR, INDEX_FILE, META_FILE, MANIFEST_FILE, ANN_FILE, ANN_PARAMS_FILE
+
+
+CHUNK_SIZE = 800      # words per chunk
 
 
 # -------------------------------------------------------------------
@@ -97,43 +106,58 @@ def load_text_from_file(filepath: str) -> str:
 # 2. Gather ALL documents from data directories
 # -------------------------------------------------------------------
 
-def collect_documents() -> tuple[list[str], list[str]]:
+DATA_FOLDERS = [
+    "sebi_guidelines",
+    "mutual_funds",
+    "sample_portfolios",
+    "financial_definitions"
+]
+
+
+def list_data_files() -> list[tuple[str, str]]:
     """
-    Returns:
-        texts:   list of document chunks
-        sources: list of filenames for metadata
+    Returns (source, filepath) for every file in the data folders,
+    where source is "folder/file" (the metadata label).
     """
-
     base_data = os.path.abspath(
         os.path.join(os.path.dirname(__file__), "../../data")
     )
 
-    folders = [
-        "sebi_guidelines",
-        "mutual_funds",
-        "sample_portfolios",
-        "financial_definitions"
-    ]
-
-    docs = []
-    sources = []
-
-    for folder in folders:
+    files = []
+    for folder in DATA_FOLDERS:
         folder_path = os.path.join(base_data, folder)
         if not os.path.exists(folder_path):
             continue
 
-        for file in os.listdir(folder_path):
+        for file in sorted(os.listdir(folder_path)):
             filepath = os.path.join(folder_path, file)
             if os.path.isfile(filepath):
-                text = load_text_from_file(filepath)
-                if len(text.strip()) > 0:
-                    # Chunk large documents into smaller pieces
-                    chunks = chunk_text(text)
+                files.append((f"{folder}/{file}", filepath))
+
+    return files
+
+
+def file_chunks(filepath: str) -> list[str]:
+    text = load_text_from_file(filepath)
+    if len(text.strip()) == 0:
+        return []
+    # Chunk large documents into smaller pieces
+    return chunk_text(text)
 
-                    for c in chunks:
-                        docs.append(c)
-                        sources.append(f"{folder}/{file}")
+
+def collect_documents() -> tuple[list[str], list[str]]:
+    """
+    Returns:
+        texts:   list of document chunks
+        sources: list of filenames for metadata
+    """
+    docs = []
+    sources = []
+
+    for source, filepath in list_data_files():
+        for c in file_chunks(filepath):
+            docs.append(c)
+            sources.append(source)
 
     return docs, sources
 
@@ -142,7 +166,7 @@ def collect_documents() -> tuple[list[str], list[str]]:
 # 3. Chunk text to 300–500 token pieces (safe for embeddings)
 # -------------------------------------------------------------------
 
-def chunk_text(text: str, chunk_size: int = 800) -> list[str]:
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE) -> list[str]:
     """
     Simple word-based chunking.
     """
@@ -157,41 +181,185 @@ def chunk_text(text: str, chunk_size: int = 800) -> list[str]:
 
 
 # -------------------------------------------------------------------
-# 4. Build & Save FAISS Index
+# 4. Build & Save FAISS Index (incremental, manifest-driven)
 # -------------------------------------------------------------------
+#
+# manifest.json records, per data file, its size / mtime / sha256 and
+# the [start, end) range of vector ids its chunks were added under. The
+# index is an IndexIDMap2, and meta.bin maps id -> {text, source}, so a
+# rebuild only touches files that were added, changed or deleted:
+# - unchanged size + mtime: skipped without reading
+# - changed stat, same hash: only the stat is updated
+# - changed content: its id range is removed and its chunks re-added
+#   under fresh ids
+# - deleted: its id range is removed
+# Vectors added at runtime (VectorStore.add_documents) are not in the
+# manifest and are left alone.
+
+MANIFEST_VERSION = 1
+
+
+def _file_hash(filepath: str) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_state():
+    """(index, meta, manifest) of the current build, or None if unusable."""
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("chunk_size") != CHUNK_SIZE:
+            return None
+
+        index = faiss.read_index(INDEX_FILE)
+        meta = dict(MappedMeta(META_FILE).items())
+    except (OSError, ValueError, RuntimeError):
+        return None
+
+    # A build interrupted between the file swaps leaves them out of step
+    if index.ntotal != len(meta):
+        return None
+    for entry in manifest["files"].values():
+        start, end = entry["ids"]
+        if end > start and (start not in meta or end - 1 not in meta):
+            return None
+    return index, meta, manifest
+
+
+def _replace(path: str, write):
+    """Writes via a temp file and swaps it in, so readers never see half a file."""
+    tmp = path + ".tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _save_manifest(manifest: dict):
+    def write(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+
+    _replace(MANIFEST_FILE, write)
+
+
+def _save_state(index, meta: dict, manifest: dict):
+    os.makedirs(INDEX_DIR, exist_ok=True)
 
-def build_index():
-    print("[RAG] Collecting documents...")
-    texts, sources = collect_documents()
-    print(f"[RAG] Loaded {len(texts)} chunks.")
+    # Manifest last: until it is swapped in, the next build starts over
+    write_meta(META_FILE, meta)
+    _replace(INDEX_FILE, lambda path: faiss.write_index(index, path))
+    _save_manifest(manifest)
 
-    if len(texts) == 0:
-        print("[RAG] No documents found. Fill your data folder first.")
-        return
+    _save_search_index(index)
 
-    print("[RAG] Generating embeddings (this may take a while)...")
-    embeddings = embed_texts(texts)
 
-    embeddings_np = np.array(embeddings).astype("float32")
+def _save_search_index(index):
+    """Derives the HNSW / IVF-PQ search index (ann_index.py) from the exact one."""
+    params = write_search_index(index, ANN_FILE, ANN_PARAMS_FILE)
+    print(f"[RAG] Search index: {params['type']} over {params['ntotal']} vectors.")
 
-    dim = embeddings_np.shape[1]
-    index = faiss.IndexFlatL2(dim)
 
-    print("[RAG] Adding vectors to FAISS index...")
-    index.add(embeddings_np)
+def build_index(incremental: bool = True):
+    state = _load_state() if incremental else None
+    if state is None:
+        print("[RAG] Full build." if not incremental else "[RAG] Full build (no usable manifest).")
+        index, meta, manifest = None, {}, {"version": MANIFEST_VERSION, "chunk_size": CHUNK_SIZE, "files": {}, "next_id": 0}
+    else:
+        index, meta, manifest = state
 
-    print("[RAG] Saving index and metadata...")
-    os.makedirs(INDEX_DIR, exist_ok=True)
+    print("[RAG] Scanning documents...")
+    files = list_data_files()
+    seen = {source for source, _ in files}
+    entries = manifest["files"]
 
-    faiss.write_index(index, INDEX_FILE)
+    stale = [source for source in entries if source not in seen]
+    texts, sources, changed = [], [], []
+    touched = False
 
-    meta = [{"text": t, "source": s} for t, s in zip(texts, sources)]
-    with open(META_FILE, "wb") as f:
-        pickle.dump(meta, f)
+    for source, filepath in files:
+        stat = os.stat(filepath)
+        entry = entries.get(source)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            continue
 
-    print(f"[RAG] Done! Index built with {len(texts)} vectors.")
+        content_hash = _file_hash(filepath)
+        if entry and entry["sha256"] == content_hash:
+            entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            touched = True
+            continue
+
+        if entry:
+            stale.append(source)
+        chunks = file_chunks(filepath)
+        changed.append((source, stat, content_hash, len(chunks)))
+        texts.extend(chunks)
+        sources.extend([source] * len(chunks))
+
+    print(f"[RAG] {len(changed)} new/changed files ({len(texts)} chunks), "
+          f"{len(entries) - len(seen & set(entries))} deleted, "
+          f"{len(files) - len(changed)} unchanged.")
+
+    if not changed and not stale and state is not None:
+        if touched:
+            _save_manifest(manifest)
+        if search_index_stale(index, ANN_PARAMS_FILE):
+            _save_search_index(index)
+        print("[RAG] Index is up to date.")
+        return
+
+    # Ids continue after both the manifest and anything added at runtime
+    manifest["next_id"] = max(manifest["next_id"], max(meta, default=-1) + 1)
+
+    # Drop the vectors of changed / deleted files
+    for source in stale:
+        start, end = entries.pop(source)["ids"]
+        if index is not None and end > start:
+            index.remove_ids(faiss.IDSelectorRange(start, end))
+        for vector_id in range(start, end):
+            meta.pop(vector_id, None)
+
+    if texts:
+        # Unchanged chunks come from the on-disk embedding cache
+        print("[RAG] Generating embeddings for new or changed chunks...")
+        stats = EmbeddingStats()
+        embeddings_np = np.array(embed_texts(texts, stats=stats)).astype("float32")
+        print(f"[RAG] Embedded {stats.summary()}" if stats.requests else "[RAG] All chunks were cached.")
+
+        if index is None:
+            index = faiss.IndexIDMap2(faiss.IndexFlatL2(embeddings_np.shape[1]))
+
+        ids = np.arange(manifest["next_id"], manifest["next_id"] + len(texts), dtype="int64")
+        print("[RAG] Adding vectors to FAISS index...")
+        index.add_with_ids(embeddings_np, ids)
+        for vector_id, t, s in zip(ids.tolist(), texts, sources):
+            meta[vector_id] = {"text": t, "source": s}
+
+    # Ids were handed out in `changed` order
+    next_id = manifest["next_id"]
+    for source, stat, content_hash, count in changed:
+        entries[source] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": content_hash,
+            "ids": [next_id, next_id + count],
+        }
+        next_id += count
+    manifest["next_id"] = next_id
+
+    if index is None:
+        print("[RAG] No documents found. Fill your data folder first.")
+        return
+
+    print("[RAG] Saving index and metadata...")
+    _save_state(index, meta, manifest)
+
+    print(f"[RAG] Done! Index holds {index.ntotal} vectors.")
     print(f"[RAG] Index stored at: {INDEX_FILE}")
     print(f"[RAG] Metadata stored at: {META_FILE}")
+    print(f"[RAG] Manifest stored at: {MANIFEST_FILE}")
 
 
 # -------------------------------------------------------------------
@@ -199,4 +367,6 @@ def build_index():
 # -------------------------------------------------------------------
 
 if __name__ == "__main__":
-    build_index()
+    import sys
+
+    build_index(incremental="--full" not in sys.argv)
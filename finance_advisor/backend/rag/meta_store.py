@@ -0,0 +1,103 @@
+# backend/rag/meta_store.py
+
+"""
+Memory-mappable RAG metadata (vector id -> {text, source}).
+
+meta.pkl had to be unpickled into every worker's heap. meta.bin holds
+the same mapping as flat arrays that are read through one shared,
+read-only mmap, so N uvicorn workers share a single page-cache copy and
+opening it costs nothing whatever the corpus size:
+
+    header   magic, count, source count, sources-json bytes, text bytes
+    ids      int64[count]        sorted vector ids
+    offsets  int64[count + 1]    text i is blob[offsets[i]:offsets[i + 1]]
+    sources  int32[count]        index into the sources list
+    json     sources list (few distinct file labels)
+    blob     utf-8 texts, concatenated
+
+Sections are 8-byte aligned. Texts are decoded only when looked up.
+"""
+
+import json
+import os
+from collections.abc import Mapping
+from typing import Dict, Iterator
+
+import numpy as np
+
+
+MAGIC = b"RAGMETA1"
+HEADER = np.dtype([("magic", "S8"), ("count", "<i8"), ("num_sources", "<i8"),
+                   ("sources_bytes", "<i8"), ("blob_bytes", "<i8")])
+
+
+def _aligned(size: int) -> int:
+    return -(-size // 8) * 8
+
+
+class MappedMeta(Mapping):
+    """Read-only {vector id: {"text", "source"}} backed by meta.bin."""
+
+    def __init__(self, path: str):
+        self._buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        header = np.frombuffer(self._buffer, HEADER, count=1)[0]
+        if header["magic"] != MAGIC:
+            raise ValueError(f"{path} is not a RAG metadata file")
+
+        count = int(header["count"])
+        offset = HEADER.itemsize
+
+        def section(dtype, n):
+            nonlocal offset
+            array = np.frombuffer(self._buffer, dtype, count=n, offset=offset)
+            offset += _aligned(array.nbytes)
+            return array
+
+        self.ids = section("<i8", count)
+        self.offsets = section("<i8", count + 1)
+        self.source_index = section("<i4", count)
+        self.sources = json.loads(bytes(section(np.uint8, int(header["sources_bytes"]))).decode("utf-8"))
+        self.blob = section(np.uint8, int(header["blob_bytes"]))
+
+    def _row(self, vector_id: int) -> int:
+        row = int(np.searchsorted(self.ids, vector_id))
+        return row if row < len(self.ids) and self.ids[row] == vector_id else -1
+
+    def __getitem__(self, vector_id: int) -> Dict[str, str]:
+        row = self._row(vector_id)
+        if row < 0:
+            raise KeyError(vector_id)
+        text = bytes(self.blob[self.offsets[row]:self.offsets[row + 1]]).decode("utf-8")
+        return {"text": text, "source": self.sources[self.source_index[row]]}
+
+    def __contains__(self, vector_id) -> bool:
+        return self._row(vector_id) >= 0
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.ids.tolist())
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def write_meta(path: str, meta: Dict[int, Dict[str, str]]):
+    """Writes `meta` as meta.bin, via a temp file swapped into place."""
+    ids = np.array(sorted(meta), dtype="<i8")
+    texts = [meta[i]["text"].encode("utf-8") for i in ids.tolist()]
+    sources = sorted({meta[i]["source"] for i in ids.tolist()})
+    source_number = {s: n for n, s in enumerate(sources)}
+
+    offsets = np.zeros(len(ids) + 1, dtype="<i8")
+    np.cumsum([len(t) for t in texts], out=offsets[1:])
+    source_index = np.array([source_number[meta[i]["source"]] for i in ids.tolist()], dtype="<i4")
+    sources_json = json.dumps(sources).encode("utf-8")
+    blob = b"".join(texts)
+
+    header = np.array([(MAGIC, len(ids), len(sources), len(sources_json), len(blob))], dtype=HEADER)
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        for part in (header.tobytes(), ids.tobytes(), offsets.tobytes(), source_index.tobytes(), sources_json, blob):
+            f.write(part)
+            f.write(b"\0" * (_aligned(len(part)) - len(part)))
+    os.replace(tmp, path)
@@ -1,12 +1,15 @@
 # backend/rag/vector_store.py
 
 import os
+import json
 import pickle
 import faiss
 from typing import List, Dict, Any
 import numpy as np
 
+from .ann_index import configure, read_index_shared, read_search_index
 from .embedder import embed_texts
+from .meta_store import MappedMeta, write_meta
 
 
 # ---------------------------------------------------------
@@ -15,7 +18,11 @@ from .embedder import embed_texts
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 INDEX_DIR = os.path.join(BASE_DIR, "data", "rag_index")
 INDEX_FILE = os.path.join(INDEX_DIR, "index.faiss")
-META_FILE = os.path.join(INDEX_DIR, "meta.pkl")
+META_FILE = os.path.join(INDEX_DIR, "meta.bin")            # mmapped metadata (meta_store.py)
+LEGACY_META_FILE = os.path.join(INDEX_DIR, "meta.pkl")     # read only if meta.bin is missing
+MANIFEST_FILE = os.path.join(INDEX_DIR, "manifest.json")   # index_builder's incremental state
+ANN_FILE = os.path.join(INDEX_DIR, "index.ann.faiss")       # HNSW / IVF-PQ search index (ann_index.py)
+ANN_PARAMS_FILE = os.path.join(INDEX_DIR, "index_params.json")
 
 os.makedirs(INDEX_DIR, exist_ok=True)
 
@@ -25,8 +32,10 @@ os.makedirs(INDEX_DIR, exist_ok=True)
 # ---------------------------------------------------------
 class VectorStore:
     def __init__(self):
-        self.index = None           # RAG index
-        self.meta = []              # List of dicts with {text, source}
+        self.index = None           # exact RAG index (loaded lazily when an ANN index is used)
+        self.search_index = None    # what queries go to: self.index or the ANN index
+        self.search_params = None   # ANN build / search parameters, None for exact search
+        self.meta = {}              # vector id -> {text, source} (MappedMeta once built)
 
         # Semantic Cache
         self.cache_index = faiss.IndexFlatL2(1536)  # embedding dimension
@@ -37,15 +46,30 @@ class VectorStore:
     # -----------------------------------------------------
     # Load FAISS + metadata for RAG
     # -----------------------------------------------------
+    # Indexes and metadata are mapped read-only and shared by all worker
+    # processes; nothing proportional to the corpus is copied at startup.
     def _load(self):
-        if os.path.exists(INDEX_FILE) and os.path.exists(META_FILE):
-            self.index = faiss.read_index(INDEX_FILE)
-            with open(META_FILE, "rb") as f:
-                self.meta = pickle.load(f)
+        meta_file = META_FILE if os.path.exists(META_FILE) else LEGACY_META_FILE
+        if os.path.exists(INDEX_FILE) and os.path.exists(meta_file):
+            if meta_file == META_FILE:
+                self.meta = MappedMeta(META_FILE)
+            else:
+                with open(meta_file, "rb") as f:
+                    self.meta = pickle.load(f)
+                # Indexes built before the manifest: ids are list positions
+                if isinstance(self.meta, list):
+                    self.meta = dict(enumerate(self.meta))
+
+            self.index = None
+            self.search_index, self.search_params = read_search_index(ANN_FILE, ANN_PARAMS_FILE, len(self.meta))
+            if self.search_index is None:
+                self.index = read_index_shared(INDEX_FILE)
+                self.search_index = self.index
         else:
             # Empty FAISS index for RAG
-            self.index = faiss.IndexFlatL2(1536)
-            self.meta = []
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(1536))
+            self.search_index = self.index
+            self.meta = {}
 
     # -----------------------------------------------------
     # Add documents to RAG vector store
@@ -54,34 +78,61 @@ class VectorStore:
         embeddings = embed_texts(texts)
         embeddings = np.array(embeddings).astype("float32")
 
-        self.index.add(embeddings)
+        start = max(self.meta, default=-1) + 1
+        ids = np.arange(start, start + len(texts), dtype="int64")
 
-        for text, src in zip(texts, sources):
-            self.meta.append({"text": text, "source": src})
+        # The loaded indexes are read-only mappings: update private copies,
+        # swap them in on disk, then map the new files
+        on_disk = os.path.exists(INDEX_FILE)
+        index = faiss.read_index(INDEX_FILE) if on_disk else self.index
+        if isinstance(index, faiss.IndexIDMap):
+            index.add_with_ids(embeddings, ids)
+        else:
+            index.add(embeddings)      # plain index: ids are positions
+
+        search_index = None
+        if self.search_params is not None:
+            search_index = faiss.read_index(ANN_FILE)
+            configure(search_index, self.search_params)
+            search_index.add_with_ids(embeddings, ids)
+            self.search_params["ntotal"] = int(index.ntotal)
 
-        self._save()
+        meta = dict(self.meta.items())
+        for vector_id, text, src in zip(ids.tolist(), texts, sources):
+            meta[vector_id] = {"text": text, "source": src}
+
+        self._save(index, meta, search_index)
+        self._load()
 
     # -----------------------------------------------------
     # Save FAISS + metadata
     # -----------------------------------------------------
-    def _save(self):
-        faiss.write_index(self.index, INDEX_FILE)
-        with open(META_FILE, "wb") as f:
-            pickle.dump(self.meta, f)
+    # (via temp files: other workers still map the old ones)
+    def _save(self, index, meta, search_index=None):
+        faiss.write_index(index, INDEX_FILE + ".tmp")
+        os.replace(INDEX_FILE + ".tmp", INDEX_FILE)
+        write_meta(META_FILE, meta)
+        if search_index is not None:
+            faiss.write_index(search_index, ANN_FILE + ".tmp")
+            os.replace(ANN_FILE + ".tmp", ANN_FILE)
+            with open(ANN_PARAMS_FILE + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(self.search_params, f, indent=1)
+            os.replace(ANN_PARAMS_FILE + ".tmp", ANN_PARAMS_FILE)
 
     # -----------------------------------------------------
     # RAG Semantic Search
     # -----------------------------------------------------
     def search(self, query: str, top_k: int) -> List[Dict[str, Any]]:
-        query_vec = embed_texts([query])[0]
+        query_vec = embed_texts([query], cache=False)[0]
         query_vec = np.array([query_vec]).astype("float32")
 
-        distances, indices = self.index.search(query_vec, top_k)
+        distances, indices = self.search_index.search(query_vec, top_k)
 
         results = []
         for idx in indices[0]:
-            if idx < len(self.meta):
-                results.append(self.meta[idx])
+            entry = self.meta.get(int(idx))     # -1 when fewer than top_k
+            if entry is not None:
+                results.append(entry)
 
         return results
 
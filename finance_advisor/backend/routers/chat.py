@@ -80,7 +80,7 @@ def chat_endpoint(payload: ChatRequest):
             "3.For product-definitions or financial terms first try calling investment_dict tool if not found there then go to rag_tool"
             "4. For regulatory, SEBI, or product-definition questions or debt, equity, hybrid fund questions,, prefer calling the 'rag_tool' "
             "to retrieve authoritative content, then summarise it.\n"
-            "5. Use the tools (risk_profile_tool, portfolio_tool, simulate_tool, currency_tool, nav_tool, rag_tool) "
+            "5. Use the tools (risk_profile_tool, portfolio_tool, simulate_tool, stress_test_tool, currency_tool, nav_tool, rag_tool) "
             "whenever they can improve accuracy or safety.\n"
             "6. Make risk disclosures explicit and remind the user that all market-linked products carry risk.\n"
             "7. If a user asks for something unsafe, illegal, or outside allowed scope, politely refuse and explain why.\n"
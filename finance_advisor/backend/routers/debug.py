@@ -2,6 +2,7 @@
 
 from fastapi import APIRouter
 from ..memory.store import memory_store
+from ..tools.simulation_cache import simulation_cache_stats, clear_simulation_cache
 
 router = APIRouter(prefix="/debug", tags=["debug"])
 
@@ -9,3 +10,16 @@ router = APIRouter(prefix="/debug", tags=["debug"])
 def reset_all():
     memory_store._store = {}
     return {"status": "memory cleared", "message": "All sessions wiped"}
+
+
+@router.get("/simulation_cache")
+def simulation_cache():
+    return simulation_cache_stats()
+
+
+@router.delete("/simulation_cache")
+def simulation_cache_clear():
+    cleared = clear_simulation_cache()
+    if cleared["redis"] is None:
+        return {"status": "memory tier cleared; Redis unavailable", "cleared": cleared}
+    return {"status": "simulation cache cleared", "cleared": cleared}
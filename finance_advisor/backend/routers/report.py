@@ -102,7 +102,11 @@ def download_plan(session_id: str = Query(..., description="User session ID")):
             pdf.drawString(1 * inch, y, f"Worst Case: {last_simulation.get('worst_case')}")
             y -= 0.22 * inch
             pdf.drawString(1 * inch, y, f"Goal Achievement Probability: {last_simulation.get('probability_of_goal_achievement')}")
-            y -= 0.3 * inch
+            y -= 0.22 * inch
+            if last_simulation.get("seed") is not None:
+                pdf.drawString(1 * inch, y, f"Simulation Seed: {last_simulation.get('seed')}")
+                y -= 0.22 * inch
+            y -= 0.08 * inch
         else:
             pdf.drawString(1 * inch, y, "No simulation data available.")
             y -= 0.3 * inch
@@ -5,8 +5,17 @@ from fastapi import APIRouter, HTTPException
 from ..models.simulate import (
     PortfolioSimulationRequest,
     PortfolioSimulationResponse,
+    BatchSimulationRequest,
+    BatchSimulationResponse,
+    GoalSolveRequest,
+    GoalSolveResponse,
+    StressTestRequest,
+    StressTestResponse,
 )
 from ..tools.portfolio_sim import run_monte_carlo_simulation
+from ..tools.scenario_sim import run_batch_simulation
+from ..tools.goal_solver import solve_goal
+from ..tools.stress_replay import run_stress_test
 
 router = APIRouter(prefix="/simulate_portfolio", tags=["portfolio_simulation"])
 
@@ -23,3 +32,40 @@ def simulate_portfolio(payload: PortfolioSimulationRequest):
         return result
     except Exception as ex:
         raise HTTPException(status_code=500, detail=str(ex))
+
+
+@router.post("/batch", response_model=BatchSimulationResponse)
+def simulate_portfolio_batch(payload: BatchSimulationRequest):
+    """
+    Evaluates a list / grid of scenarios (allocation x amount x duration)
+    against one shared set of random draws and returns a summary row
+    per scenario.
+    """
+    try:
+        return run_batch_simulation(payload)
+    except Exception as ex:
+        raise HTTPException(status_code=500, detail=str(ex))
+
+
+@router.post("/solve", response_model=GoalSolveResponse)
+def solve_goal_requirement(payload: GoalSolveRequest):
+    """
+    Monthly SIP / lumpsum amount, or tenure, needed to reach goal_amount
+    with target_probability — from a single simulation.
+    """
+    try:
+        return solve_goal(payload)
+    except Exception as ex:
+        raise HTTPException(status_code=500, detail=str(ex))
+
+
+@router.post("/stress", response_model=StressTestResponse)
+def stress_test_portfolio(payload: StressTestRequest):
+    """
+    Replays stored historical market episodes (2008, March 2020, ...)
+    against the allocation and its cashflows.
+    """
+    try:
+        return run_stress_test(payload)
+    except Exception as ex:
+        raise HTTPException(status_code=500, detail=str(ex))
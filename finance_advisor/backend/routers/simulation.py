@@ -3,6 +3,8 @@
 from fastapi import APIRouter, HTTPException, Query
 
 from ..agents.simulation_agent import simulation_agent
+from ..models.simulate import PortfolioSimulationRequest, SimulationJobStatus
+from ..tools.simulation_jobs import simulation_jobs, JobQueueFullException
 from backend.memory.store import memory_store
 router = APIRouter(prefix="/simulate", tags=["simulation"])
 import traceback
@@ -21,7 +23,12 @@ def simulate_portfolio(session_id: str = Query(..., description="User session ID
             "best_case": result["best_case"],
             "worst_case": result["worst_case"],
             "probability_of_goal_achievement": result["probability_of_goal_achievement"],
-            "final_values": result["final_values"]
+            "percentiles": result["percentiles"],
+            "histogram": result["histogram"],
+            "conditional_value_at_risk": result["conditional_value_at_risk"],
+            "risk_metrics": result["risk_metrics"],
+            "goal_curve": result["goal_curve"],
+            "seed": result["seed"]
         }
 
     except Exception as ex:
@@ -29,3 +36,31 @@ def simulate_portfolio(session_id: str = Query(..., description="User session ID
         traceback.print_exc()
         print("--------------------------------------------------\n\n")
         raise HTTPException(status_code=500, detail=str(ex))
+
+
+# -----------------------------------------
+# Background Simulation Jobs
+# -----------------------------------------
+@router.post("/jobs", response_model=SimulationJobStatus, status_code=202)
+def submit_simulation_job(payload: PortfolioSimulationRequest):
+    """Queues a simulation and returns its job id right away; poll GET /simulate/jobs/{job_id}."""
+    try:
+        return simulation_jobs.submit(payload)
+    except JobQueueFullException as ex:
+        raise HTTPException(status_code=503, detail=str(ex), headers={"Retry-After": "5"})
+
+
+@router.get("/jobs/{job_id}", response_model=SimulationJobStatus)
+def get_simulation_job(job_id: str):
+    status = simulation_jobs.get(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id.")
+    return status
+
+
+@router.delete("/jobs/{job_id}", response_model=SimulationJobStatus)
+def cancel_simulation_job(job_id: str):
+    status = simulation_jobs.cancel(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id.")
+    return status
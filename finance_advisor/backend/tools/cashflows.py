@@ -0,0 +1,93 @@
+# backend/tools/cashflows.py
+
+"""
+Cashflow schedules for the simulator.
+
+A CashflowSchedule (step-up SIP, lumpsum, STP tranches, SWP withdrawals,
+inflation indexing, one-off flows) is compiled once into
+- the amount invested at the start, and
+- a vector of net flows at the end of months 1..T,
+which the vectorized engine broadcasts across all paths. Nothing here
+depends on the random draws.
+"""
+
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+from ..models.simulate import CashflowSchedule, InvestmentDetails
+from ..utils.exceptions import SimulationException
+
+
+def _stp_flows(tranche, months: int) -> np.ndarray:
+    """
+    Monthly flows into the portfolio for one STP tranche. Transfers are
+    level instalments that empty the source fund (growing at
+    source_return_pct) after `tranche.months` transfers; whatever is
+    still parked when the horizon ends is moved in at month T.
+    """
+    flows = np.zeros(months)
+    rate = (1 + tranche.source_return_pct / 100.0) ** (1 / 12) - 1
+    n = tranche.months
+
+    instalment = tranche.amount / n if abs(rate) < 1e-12 else tranche.amount * rate / (1 - (1 + rate) ** -n)
+
+    balance = tranche.amount
+    for month in range(tranche.start_month + 1, min(tranche.start_month + n, months) + 1):
+        balance = balance * (1 + rate) - instalment
+        flows[month - 1] += instalment
+
+    if tranche.start_month + n > months:
+        flows[months - 1] += max(balance, 0.0)
+
+    return flows
+
+
+@lru_cache(maxsize=64)
+def _compile(schedule_json: str, months: int) -> Tuple[float, np.ndarray]:
+    schedule = CashflowSchedule.model_validate_json(schedule_json)
+    flows = np.zeros(months)
+    month = np.arange(1, months + 1)
+    initial = schedule.initial_lumpsum
+
+    # Step-up SIP
+    sip_months = months if schedule.sip_months is None else min(schedule.sip_months, months)
+    step_up = (1 + schedule.sip_step_up_pct / 100.0) ** ((month[:sip_months] - 1) // 12)
+    flows[:sip_months] += schedule.monthly_sip * step_up
+
+    # STP tranches (the parked money is not exposed to the portfolio)
+    for tranche in schedule.stp_tranches:
+        if tranche.start_month >= months:
+            raise SimulationException("STP tranche starts after the investment horizon.")
+        flows += _stp_flows(tranche, months)
+
+    # SWP, indexed to inflation once a year from the first withdrawal
+    if schedule.swp_monthly:
+        withdrawing = month > schedule.swp_start_month
+        years_in = (month[withdrawing] - schedule.swp_start_month - 1) // 12
+        flows[withdrawing] -= schedule.swp_monthly * (1 + schedule.inflation_pct / 100.0) ** years_in
+
+    for at, amount in schedule.one_off.items():
+        if not 0 <= at <= months:
+            raise SimulationException(f"One-off cashflow at month {at} is outside the horizon.")
+        if at == 0:
+            initial += amount
+        else:
+            flows[at - 1] += amount
+
+    if initial < 0:
+        raise SimulationException("The starting investment cannot be negative.")
+
+    flows.setflags(write=False)      # shared between shards / requests
+    return initial, flows
+
+
+def compile_cashflows(investment: InvestmentDetails) -> Tuple[float, np.ndarray]:
+    """
+    (initial amount, net flow at the end of each month) for a
+    "schedule" investment over duration_years * 12 months.
+    """
+    if investment.schedule is None:
+        raise SimulationException("Investment type 'schedule' needs a schedule.")
+    return _compile(investment.schedule.model_dump_json(), investment.duration_years * 12)
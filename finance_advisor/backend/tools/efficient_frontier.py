@@ -0,0 +1,213 @@
+# backend/tools/efficient_frontier.py
+
+"""
+Efficient frontier over the simulator's asset classes.
+
+Every long-only allocation on a 1% grid inside ALLOCATION_BOUNDS is
+scored at once as a row of a (candidates x assets) weight matrix:
+- expected yearly return
+- risk: volatility (mean-variance) or CVaR of the yearly return at
+  CVAR_LEVEL, from a fixed scenario set
+and the frontier is what no other candidate beats on both. Its points
+are sorted by risk, so placing an investor on it is one binary search.
+
+Assumptions come from
+- "parametric": EXPECTED_RETURNS / VOLATILITY / DEFAULT_CORRELATION
+- "fund_data":  yearly returns resampled from the fund CSVs (return
+                model), correlated like the simulator's bootstrap
+A frontier is built once per (assumptions, risk measure) and memoized.
+"""
+
+import math
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from ..utils.exceptions import SimulationException
+from ..utils.logger import get_logger
+from .portfolio_sim import ASSET_CLASSES, DEFAULT_CORRELATION, EXPECTED_RETURNS, VOLATILITY, _cholesky_factor
+from .return_model import load_return_model
+
+
+# Percent per asset class; keeps every recommendation diversified
+ALLOCATION_BOUNDS = {
+    "equity": (10, 80),
+    "debt": (10, 80),
+    "gold": (0, 15),
+    "other": (0, 15),
+}
+GRID_STEP = 1                    # percent
+
+CVAR_LEVEL = 0.05
+NUM_SCENARIOS = 4_000            # yearly return scenarios for CVaR / fund data
+SCENARIO_SEED = 20_240_601       # fixed, so a frontier never changes between restarts
+CHUNK_CANDIDATES = 1_024         # candidates scored against the scenarios at a time
+
+# Risk scores (tools/risk_profile.py) mapped onto the frontier: SCORE_RANGE
+# spans min-risk .. max-return; a category alone uses its typical score
+SCORE_RANGE = (10, 100)
+CATEGORY_SCORES = {
+    "conservative": 30,
+    "moderate": 57,
+    "aggressive": 80,
+}
+# Horizons shorter than this many years move down the frontier
+FULL_RISK_YEARS = 10
+MIN_HORIZON_FACTOR = 0.4
+
+logger = get_logger("efficient-frontier")
+
+
+# -------------------------------------------------------------
+# Frontier
+# -------------------------------------------------------------
+class Frontier:
+    """
+    weights: (points, assets) allocation in percent, ASSET_CLASSES order
+    returns: (points,) expected yearly return, ascending
+    risks:   (points,) volatility or CVaR, ascending
+    """
+
+    def __init__(self, weights: np.ndarray, returns: np.ndarray, risks: np.ndarray, risk_measure: str):
+        self.weights = weights
+        self.returns = returns
+        self.risks = risks
+        self.risk_measure = risk_measure
+
+        for array in (weights, returns, risks):
+            array.setflags(write=False)      # shared between requests
+
+    def at(self, position: float) -> int:
+        """
+        Index of the highest-return point whose risk is within
+        `position` (0 = least risky, 1 = riskiest) of the risk range.
+        """
+        position = min(max(position, 0.0), 1.0)
+        target = self.risks[0] + position * (self.risks[-1] - self.risks[0])
+        return max(int(np.searchsorted(self.risks, target, side="right")) - 1, 0)
+
+    def allocation(self, index: int) -> Dict[str, float]:
+        return {a: float(w) for a, w in zip(ASSET_CLASSES, self.weights[index])}
+
+
+def _candidates() -> np.ndarray:
+    """(candidates, assets) percent allocations on the grid, summing to 100."""
+    ranges = [np.arange(lo, hi + 1, GRID_STEP) for lo, hi in (ALLOCATION_BOUNDS[a] for a in ASSET_CLASSES[:-1])]
+    grid = np.stack(np.meshgrid(*ranges, indexing="ij"), axis=-1).reshape(-1, len(ranges))
+
+    lo, hi = ALLOCATION_BOUNDS[ASSET_CLASSES[-1]]
+    last = 100 - grid.sum(axis=1)
+    keep = (last >= lo) & (last <= hi)
+    return np.column_stack([grid[keep], last[keep]]).astype(float)
+
+
+def _scenarios(assumptions: str) -> np.ndarray:
+    """(NUM_SCENARIOS, assets) yearly returns under the assumptions."""
+    rng = np.random.default_rng(SCENARIO_SEED)
+    normals = rng.standard_normal((NUM_SCENARIOS, len(ASSET_CLASSES))) @ _cholesky_factor(DEFAULT_CORRELATION).T
+
+    if assumptions == "fund_data":
+        pools = load_return_model().pools(
+            ASSET_CLASSES, fallback={a: (EXPECTED_RETURNS[a], VOLATILITY[a]) for a in ASSET_CLASSES}
+        )
+        means, sigmas = load_return_model().block_bootstrap(pools, NUM_SCENARIOS, 1, 1, rng)
+        return means[:, 0] + sigmas[:, 0] * normals
+
+    means = np.array([EXPECTED_RETURNS[a] for a in ASSET_CLASSES])
+    sigmas = np.array([VOLATILITY[a] for a in ASSET_CLASSES])
+    return means + sigmas * normals
+
+
+def _cvar(weights: np.ndarray, scenarios: np.ndarray) -> np.ndarray:
+    """Expected loss in the worst CVAR_LEVEL of scenarios, per candidate."""
+    tail = max(int(math.ceil(CVAR_LEVEL * len(scenarios))), 1)
+    out = np.empty(len(weights))
+    for start in range(0, len(weights), CHUNK_CANDIDATES):
+        returns = (weights[start:start + CHUNK_CANDIDATES] / 100.0) @ scenarios.T
+        worst = np.partition(returns, tail - 1, axis=1)[:, :tail]
+        out[start:start + CHUNK_CANDIDATES] = -worst.mean(axis=1)
+    return out
+
+
+def build_frontier(assumptions: str = "parametric", risk_measure: str = "volatility") -> Frontier:
+    if assumptions not in ("parametric", "fund_data"):
+        raise SimulationException(f"Unknown frontier assumptions: {assumptions}")
+    if risk_measure not in ("volatility", "cvar"):
+        raise SimulationException(f"Unknown frontier risk measure: {risk_measure}")
+
+    weights = _candidates()
+    fractions = weights / 100.0
+
+    if assumptions == "parametric":
+        means = np.array([EXPECTED_RETURNS[a] for a in ASSET_CLASSES])
+        vols = np.array([VOLATILITY[a] for a in ASSET_CLASSES])
+        covariance = np.array(DEFAULT_CORRELATION) * np.outer(vols, vols)
+        scenarios = _scenarios(assumptions) if risk_measure == "cvar" else None
+    else:
+        scenarios = _scenarios(assumptions)
+        means = scenarios.mean(axis=0)
+        covariance = np.cov(scenarios, rowvar=False)
+
+    returns = fractions @ means
+    if risk_measure == "volatility":
+        risks = np.sqrt(np.einsum("ij,jk,ik->i", fractions, covariance, fractions))
+    else:
+        risks = _cvar(weights, scenarios)
+
+    # Efficient points: walking up in risk (ties: best return first), keep
+    # each candidate that earns more than every less risky one
+    order = np.lexsort((-returns, risks))
+    best_before = np.maximum.accumulate(np.concatenate([[-np.inf], returns[order][:-1]]))
+    efficient = order[returns[order] > best_before]
+
+    return Frontier(weights[efficient], returns[efficient], risks[efficient], risk_measure)
+
+
+@lru_cache(maxsize=8)
+def get_frontier(assumptions: str = "parametric", risk_measure: str = "volatility") -> Frontier:
+    """The memoized frontier for a set of assumptions."""
+    started = time.perf_counter()
+    frontier = build_frontier(assumptions, risk_measure)
+    logger.info(
+        f"Built {assumptions}/{risk_measure} frontier: {len(frontier.returns)} points "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return frontier
+
+
+# -------------------------------------------------------------
+# Risk Profile -> Frontier Position
+# -------------------------------------------------------------
+def frontier_position(risk_category: str, risk_score: Optional[float] = None,
+                      tenure_years: Optional[int] = None) -> float:
+    """
+    0..1 along the frontier's risk range: the risk score (or the
+    category's typical score) scaled into SCORE_RANGE, then pulled down
+    for horizons shorter than FULL_RISK_YEARS.
+    """
+    if risk_score is None:
+        risk_score = CATEGORY_SCORES.get((risk_category or "").lower(), CATEGORY_SCORES["moderate"])
+
+    low, high = SCORE_RANGE
+    position = min(max((risk_score - low) / (high - low), 0.0), 1.0)
+
+    if tenure_years:
+        horizon = min(tenure_years / FULL_RISK_YEARS, 1.0)
+        position *= MIN_HORIZON_FACTOR + (1.0 - MIN_HORIZON_FACTOR) * horizon
+
+    return position
+
+
+def frontier_allocation(
+    risk_category: str,
+    risk_score: Optional[float] = None,
+    tenure_years: Optional[int] = None,
+    assumptions: str = "parametric",
+    risk_measure: str = "volatility",
+) -> Tuple[Dict[str, float], float, float]:
+    """(allocation in percent, expected yearly return, risk) for an investor."""
+    frontier = get_frontier(assumptions, risk_measure)
+    index = frontier.at(frontier_position(risk_category, risk_score, tenure_years))
+    return frontier.allocation(index), float(frontier.returns[index]), float(frontier.risks[index])
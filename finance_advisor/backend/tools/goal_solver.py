@@ -0,0 +1,115 @@
+# backend/tools/goal_solver.py
+
+"""
+"What do I need to invest?" without trial-and-error simulation runs.
+
+Terminal value is linear in the invested amount on a fixed set of
+draws: V = amount * U, where U is the value of investing 1 (per month
+for SIP). So with k = ceil(p * n) and u_(k) the k-th largest U,
+
+    P(V >= goal) >= p   <=>   amount >= goal / u_(k)
+
+and one simulation of U answers the question for every amount and every
+target probability. For the tenure, U is produced for every year of the
+horizon in the same pass (scenario_sim.iter_unit_values), and the first
+year whose probability reaches the target is the answer.
+
+Both are exact on the simulated paths: amounts use order statistics of
+U, durations count paths with U >= goal / amount.
+"""
+
+import math
+from typing import Dict
+
+import numpy as np
+
+from ..models.simulate import GoalSolveRequest, GoalSolveResponse
+from ..utils.exceptions import SimulationException
+from .portfolio_sim import new_seed
+from .scenario_sim import _allocation_key, iter_unit_values
+
+
+SOLVER_PROBABILITIES = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95)
+
+
+def _required_amounts(unit_values: np.ndarray, goal: float, probabilities) -> Dict[float, float]:
+    """Smallest amount reaching each probability on these paths."""
+    n = unit_values.size
+    ranks = {p: n - math.ceil(p * n - 1e-9) for p in probabilities}   # ascending index of u_(k)
+    ordered = np.partition(unit_values, sorted(set(ranks.values())))
+
+    amounts = {}
+    for p, rank in ranks.items():
+        if ordered[rank] <= 0:
+            raise SimulationException("Goal cannot be reached with this probability at any amount.")
+        amounts[p] = float(goal / ordered[rank])
+    return amounts
+
+
+def solve_goal(payload: GoalSolveRequest) -> GoalSolveResponse:
+    params = payload.simulation_params
+    if params.seed is None:
+        params = params.model_copy(update={"seed": new_seed()})
+    is_sip = payload.investment_type == "sip"
+    periods_per_year = 12 if is_sip else 1
+    allocation_key = _allocation_key(payload.allocation)
+    allocations = {allocation_key: payload.allocation}
+
+    response = GoalSolveResponse(
+        solve_for=payload.solve_for,
+        goal_amount=payload.goal_amount,
+        target_probability=payload.target_probability,
+        paths=params.num_simulations,
+        seed=params.seed,
+    )
+
+    # ---------------------------------------------------------
+    # Amount for a fixed duration
+    # ---------------------------------------------------------
+    if payload.solve_for == "amount":
+        if payload.duration_years is None:
+            raise SimulationException("duration_years is required to solve for the amount.")
+
+        key = (allocation_key, payload.duration_years * periods_per_year)
+        unit_values = np.concatenate([
+            unit[key] for unit in iter_unit_values(params, is_sip, allocations, [key[1]])
+        ])
+
+        target = payload.target_probability
+        amounts = _required_amounts(unit_values, payload.goal_amount, (target,) + SOLVER_PROBABILITIES)
+        required = amounts[target]
+
+        response.required_amount = required
+        response.achieved_probability = float(
+            np.count_nonzero(required * unit_values >= payload.goal_amount * (1 - 1e-12)) / unit_values.size
+        )
+        response.required_amount_by_probability = {
+            f"p{round(p * 100)}": amounts[p] for p in SOLVER_PROBABILITIES
+        }
+        return response
+
+    # ---------------------------------------------------------
+    # Duration for a fixed amount
+    # ---------------------------------------------------------
+    amount = payload.monthly_amount if is_sip else payload.lumpsum_amount
+    if amount is None:
+        field = "monthly_amount" if is_sip else "lumpsum_amount"
+        raise SimulationException(f"{field} is required to solve for the duration.")
+
+    years = range(1, payload.max_duration_years + 1)
+    unit_goal = payload.goal_amount / amount * (1 - 1e-12)     # a path landing exactly on the goal counts
+    hits = dict.fromkeys(years, 0)
+
+    periods_needed = [y * periods_per_year for y in years]
+    for unit in iter_unit_values(params, is_sip, allocations, periods_needed):
+        for y in years:
+            hits[y] += int(np.count_nonzero(unit[(allocation_key, y * periods_per_year)] >= unit_goal))
+
+    probabilities = {y: hits[y] / params.num_simulations for y in years}
+    response.probability_by_duration = probabilities
+
+    reached = [y for y in years if probabilities[y] >= payload.target_probability]
+    if reached:
+        response.required_duration_years = reached[0]
+        response.achieved_probability = probabilities[reached[0]]
+    return response
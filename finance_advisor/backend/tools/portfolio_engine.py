@@ -1,61 +1,31 @@
 # backend/tools/portfolio_engine.py
 
-from typing import Dict, Any
+from typing import Dict, Optional
 
+from .efficient_frontier import frontier_allocation
 
-def build_portfolio(risk_category: str, tenure_years: int = None) -> Dict[str, float]:
+
+def build_portfolio(
+    risk_category: str,
+    tenure_years: Optional[int] = None,
+    risk_score: Optional[float] = None,
+    risk_measure: str = "volatility",
+) -> Dict[str, float]:
     """
-    Builds a simple, deterministic, SEBI-friendly portfolio allocation
-    based solely on risk category. 
-    Later, additional factors (goal horizon, liquidity needs, etc.) can be added.
+    Picks the allocation on the cached efficient frontier
+    (tools/efficient_frontier.py) that matches the investor: the risk
+    score (or, without one, the risk category) sets how far up the
+    frontier to go, and a short tenure moves back down it.
 
     Returns allocation in percentages (must sum to 100).
     """
-
-    risk_category = risk_category.lower()
-
-    # ------------------------------
-    # Conservative Portfolio
-    # ------------------------------
-    if risk_category == "conservative":
-        return {
-            "equity": 20.0,
-            "debt": 60.0,
-            "gold": 10.0,
-            "other": 10.0,  # REITs / Arbitrage / Liquid funds
-        }
-
-    # ------------------------------
-    # Moderate Portfolio
-    # ------------------------------
-    if risk_category == "moderate":
-        return {
-            "equity": 40.0,
-            "debt": 40.0,
-            "gold": 10.0,
-            "other": 10.0,
-        }
-
-    # ------------------------------
-    # Aggressive Portfolio
-    # ------------------------------
-    if risk_category == "aggressive":
-        return {
-            "equity": 70.0,
-            "debt": 20.0,
-            "gold": 5.0,
-            "other": 5.0,
-        }
-
-    # --------------------------------------------
-    # Fallback if unknown risk category is passed
-    # --------------------------------------------
-    return {
-        "equity": 50.0,
-        "debt": 40.0,
-        "gold": 5.0,
-        "other": 5.0,
-    }
+    allocation, _, _ = frontier_allocation(
+        risk_category,
+        risk_score=risk_score,
+        tenure_years=tenure_years,
+        risk_measure=risk_measure,
+    )
+    return allocation
 
 
 def explain_portfolio(allocation: Dict[str, float], risk_category: str) -> str:
@@ -1,12 +1,38 @@
 # backend/tools/portfolio_sim.py
 
+import os
 import random
 import math
-from typing import Dict, Tuple, List
+import secrets
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from functools import lru_cache
+from multiprocessing import get_context
+from threading import Lock
+from typing import Callable, Dict, NamedTuple, Tuple, List, Optional
+
+import numpy as np
 
 from ..models.simulate import (
+    GoalProbabilityCurve,
+    PathRiskMetrics,
     PortfolioSimulationRequest,
-    PortfolioSimulationResponse
+    PortfolioSimulationResponse,
+    RebalancingReport,
+)
+from ..utils.exceptions import SimulationException
+from ..utils.logger import get_logger
+from . import sim_kernels
+from .simulation_stats import SimulationStats
+from .return_generators import get_return_generator
+from .return_model import ReturnModel, load_return_model
+from .cashflows import compile_cashflows
+from .simulation_cache import (
+    simulation_cache_key,
+    seed_from_key,
+    get_cached_simulation,
+    set_cached_simulation,
 )
 
 
@@ -27,6 +53,39 @@ VOLATILITY = {
     "other": 0.08
 }
 
+ASSET_CLASSES = ("equity", "debt", "gold", "other")
+
+# Pairwise correlation of yearly returns, rows/cols in ASSET_CLASSES order
+DEFAULT_CORRELATION = (
+    (1.00, 0.10, -0.05, 0.30),     # equity
+    (0.10, 1.00, 0.15, 0.40),      # debt
+    (-0.05, 0.15, 1.00, 0.05),     # gold
+    (0.30, 0.40, 0.05, 1.00),      # other
+)
+
+
+# -------------------------------------------------------------
+# Sharding Limits
+# -------------------------------------------------------------
+# Paths are always evaluated in shards of at most SHARD_PATHS, each with
+# its own seed stream. The layout depends only on the request, so a
+# seeded run gives the same numbers whatever `workers` is set to.
+SHARD_PATHS = 10_000
+MAX_SHARD_MEMORY_MB = 256        # default cap on the working set of a single shard
+
+REPORTED_PERCENTILES = (5, 25, 50, 75, 95)
+CVAR_LEVEL = 0.05                # tail share for conditional value at risk
+
+# Drawdown temporaries (index + running peak) are built this many paths
+# at a time, small enough to stay in cache for 30-year monthly paths
+RISK_CHUNK_PATHS = 256
+
+# float32 schedule factors are widened to float64 this many months at a
+# time for the cashflow matmul, instead of copying the whole matrix
+SCHEDULE_BLOCK_PERIODS = 60
+
+logger = get_logger("portfolio-sim")
+
 
 # -------------------------------------------------------------
 # Helper Function: Weighted Expected Return of the Portfolio
@@ -52,31 +111,54 @@ def compute_portfolio_parameters(allocation: Dict[str, float]) -> Tuple[float, f
 
 
 # -------------------------------------------------------------
-# Simulation Function
+# Helper Function: Cached Cholesky Factor of a Correlation Matrix
 # -------------------------------------------------------------
-def run_monte_carlo_simulation(
+@lru_cache(maxsize=32)
+def _cholesky_factor(correlation: Tuple[Tuple[float, ...], ...]) -> np.ndarray:
+    """
+    Lower-triangular L with L @ L.T == correlation.
+
+    Keyed on the matrix itself (as nested tuples), so repeated requests
+    with the same assumptions only pay for the sampling.
+    """
+    matrix = np.array(correlation, dtype=float)
+    n = len(ASSET_CLASSES)
+
+    if matrix.shape != (n, n):
+        raise SimulationException(f"Correlation matrix must be {n}x{n} ({', '.join(ASSET_CLASSES)}).")
+    if not np.allclose(matrix, matrix.T) or not np.allclose(np.diag(matrix), 1.0):
+        raise SimulationException("Correlation matrix must be symmetric with a unit diagonal.")
+
+    try:
+        factor = np.linalg.cholesky(matrix)
+    except np.linalg.LinAlgError:
+        raise SimulationException("Correlation matrix is not positive definite.")
+
+    factor.setflags(write=False)   # shared between requests
+    return factor
+
+
+# -------------------------------------------------------------
+# Reference Engine (pure Python)
+# -------------------------------------------------------------
+def _simulate_reference(
     payload: PortfolioSimulationRequest,
-) -> PortfolioSimulationResponse:
+    mu: float,
+    sigma: float,
+    rng: random.Random,
+) -> List[float]:
+    """
+    Original path-by-path loop. Slow, but kept as the reference
+    implementation the vectorized engine is validated against.
+    Draws come from the request's own generator, never the global one.
+    """
 
     years = payload.investment.duration_years
     num_sims = payload.simulation_params.num_simulations
 
-    # Convert model into dict
-    allocation = {
-        "equity": payload.allocation.equity,
-        "debt": payload.allocation.debt,
-        "gold": payload.allocation.gold,
-        "other": payload.allocation.other or 0.0
-    }
-
-    mu, sigma = compute_portfolio_parameters(allocation)
-
     # Store final outcomes
     final_values: List[float] = []
 
-    # ---------------------------------------------------------
-    # Monte Carlo Simulation
-    # ---------------------------------------------------------
     for _ in range(num_sims):
         # Start value
         portfolio_value = 0.0
@@ -87,7 +169,7 @@ def run_monte_carlo_simulation(
             total_months = years * 12
 
             for _ in range(total_months):
-                yearly_return = random.gauss(mu, sigma)
+                yearly_return = rng.gauss(mu, sigma)
                 monthly_factor = (1 + yearly_return) ** (1 / 12)
                 portfolio_value = (portfolio_value * monthly_factor) + monthly
 
@@ -95,29 +177,843 @@ def run_monte_carlo_simulation(
         else:
             portfolio_value = payload.investment.lumpsum_amount or 0.0
             for _ in range(years):
-                yearly_return = random.gauss(mu, sigma)
+                yearly_return = rng.gauss(mu, sigma)
                 portfolio_value *= (1 + yearly_return)
 
         final_values.append(portfolio_value)
 
+    return final_values
+
+
+# -------------------------------------------------------------
+# Random Draws (incl. variance reduction)
+# -------------------------------------------------------------
+SOBOL_MAX_DIMENSIONS = 21201     # limit of scipy's direction numbers
+
+
+def _standard_normals(
+    rng: np.random.Generator,
+    shape: Tuple[int, ...],
+    method: str = "none",
+    dtype=np.float64,
+) -> np.ndarray:
+    """
+    Standard normal draws for one shard, shape (paths, periods[, assets]).
+
+    antithetic: the second half of the paths mirrors the first (z, -z)
+    sobol:      scrambled Sobol points through the inverse normal CDF,
+                one Sobol dimension per (period, asset) of a path
+    """
+    n = shape[0]
+
+    if method == "antithetic":
+        half = (n + 1) // 2
+        normals = np.empty(shape, dtype=dtype)
+        rng.standard_normal(out=normals[:half], dtype=dtype)
+        np.negative(normals[:n - half], out=normals[half:])
+        return normals
+
+    if method == "sobol":
+        dims = int(np.prod(shape[1:]))
+        try:
+            from scipy.stats import qmc
+            from scipy.special import ndtri
+        except ImportError:
+            logger.warning("scipy is not installed; using antithetic draws instead of Sobol.")
+            return _standard_normals(rng, shape, "antithetic", dtype)
+
+        if dims > SOBOL_MAX_DIMENSIONS:
+            logger.warning(f"{dims} dimensions exceed Sobol's limit; using antithetic draws.")
+            return _standard_normals(rng, shape, "antithetic", dtype)
+
+        sampler = qmc.Sobol(dims, scramble=True, rng=rng)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)    # n need not be a power of 2
+            points = sampler.random(n)
+        np.clip(points, 1e-12, 1.0 - 1e-12, out=points)
+        return ndtri(points, out=points).reshape(shape).astype(dtype, copy=False)
+
+    return rng.standard_normal(shape, dtype=dtype)
+
+
+# -------------------------------------------------------------
+# Vectorized Engine (NumPy)
+# -------------------------------------------------------------
+def _growth_factors(
+    shocks: np.ndarray,
+    mu,
+    sigma,
+    periods_per_year: int,
+) -> np.ndarray:
+    """
+    Turns standard normal shocks into per-period growth factors
+    F = (1 + r) ** (1 / periods_per_year) with r ~ N(mu, sigma) yearly.
+    mu / sigma are scalars (blended) or per-asset arrays broadcast over
+    the last axis, or per-period arrays (bootstrap). Works in place, so
+    no extra matrix is allocated.
+    """
+    shocks *= sigma
+    shocks += mu
+    shocks += 1.0
+    np.maximum(shocks, 0.0, out=shocks)     # a return below -100% wipes the path
+    if periods_per_year != 1:
+        shocks **= 1.0 / periods_per_year
+    return shocks
+
+
+def _path_risk(factors: np.ndarray, periods_per_year: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-path maximum drawdown and months under water of the portfolio's
+    unit value (cumulative product of the growth factors), so SIP
+    contributions do not mask losses. Running peaks come from
+    np.maximum.accumulate on chunks of RISK_CHUNK_PATHS paths, which
+    bounds the extra memory regardless of the shard size.
+    """
+    if sim_kernels.NUMBA_ENABLED:
+        return sim_kernels.path_risk(factors, periods_per_year)
+
+    num_paths = factors.shape[0]
+    max_drawdown = np.empty(num_paths)
+    under_water = np.empty(num_paths)
+
+    for start in range(0, num_paths, RISK_CHUNK_PATHS):
+        chunk = slice(start, start + RISK_CHUNK_PATHS)
+        index = np.cumprod(factors[chunk], axis=1)
+        peak = np.maximum.accumulate(index, axis=1)
+        np.maximum(peak, 1.0, out=peak)            # the starting value is a peak too
+
+        # index / peak in [0, 1]; 1 = at a new high
+        with np.errstate(invalid="ignore", divide="ignore"):
+            np.divide(index, peak, out=index)
+        max_drawdown[chunk] = 1.0 - index.min(axis=1)
+        under_water[chunk] = np.count_nonzero(index < 1.0 - 1e-12, axis=1)
+
+    under_water *= 12 // periods_per_year
+    return max_drawdown, under_water
+
+
+def _periods_per_year(investment) -> int:
+    """Lumpsum runs compound yearly; SIP and cashflow schedules monthly."""
+    return 1 if investment.type == "lumpsum" else 12
+
+
+def _evolve_with_withdrawals(
+    factors: np.ndarray,
+    initial: float,
+    flows: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Forward recurrence V_t = max(V_{t-1} * F_t + c_t, 0) for schedules
+    with outflows: a withdrawal cannot take more than is left. One
+    vector op per month across all paths; the only branch is on the
+    (shared) schedule. Returns (terminal values, depleted per path).
+    """
+    if sim_kernels.NUMBA_ENABLED:
+        return sim_kernels.evolve_with_withdrawals(factors, initial, flows)
+
+    values = np.full(factors.shape[0], initial)
+    depleted = np.zeros(factors.shape[0], dtype=bool)
+
+    for t, flow in enumerate(flows):
+        values *= factors[:, t]
+        values += flow
+        if flow < 0:
+            depleted |= values < 0
+            np.maximum(values, 0.0, out=values)
+
+    return values, depleted
+
+
+def _evolve(
+    factors: np.ndarray,
+    payload: PortfolioSimulationRequest,
+    floor: bool = True,
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Terminal values from a (paths x periods) matrix of growth factors,
+    plus which paths ran out of money (schedules with withdrawals only).
+    Overwrites `factors`.
+
+    SIP:      V_T = sum_t c * prod_{j>t} F_j, computed with a reversed
+              cumulative product of the monthly growth factors F.
+    Lumpsum:  V_T = L * prod_y F_y over yearly factors.
+    Schedule: the same reversed cumulative product against the compiled
+              monthly cashflow vector (one matmul), or the floored
+              forward recurrence when there are withdrawals and `floor`.
+    """
+    investment = payload.investment
+
+    # Schedule Mode
+    if investment.type == "schedule":
+        initial, flows = compile_cashflows(investment)
+        if floor and (flows < 0).any():
+            return _evolve_with_withdrawals(factors, initial, flows)
+
+        np.multiply.accumulate(factors[:, ::-1], axis=1, out=factors[:, ::-1])
+        # Accumulate in float64 whatever the draw precision, as SIP and
+        # lumpsum do (a no-op view when the factors already are float64)
+        flows = flows.astype(np.float64)
+        values = flows[-1] + initial * factors[:, 0].astype(np.float64)
+        for start in range(0, len(flows) - 1, SCHEDULE_BLOCK_PERIODS):
+            stop = min(start + SCHEDULE_BLOCK_PERIODS, len(flows) - 1)
+            values += factors[:, start + 1:stop + 1].astype(np.float64, copy=False) @ flows[start:stop]
+        return values, None
+
+    # SIP Mode
+    if investment.type == "sip":
+        monthly = investment.monthly_amount or 0.0
+
+        # growth[:, t] = prod of factors from month t to the end
+        np.multiply.accumulate(factors[:, ::-1], axis=1, out=factors[:, ::-1])
+
+        # Contribution of month t compounds over months t+1 .. end
+        return monthly * (factors[:, 1:].sum(axis=1, dtype=np.float64) + 1.0), None
+
+    # Lumpsum Mode
+    lumpsum = investment.lumpsum_amount or 0.0
+    return lumpsum * factors.prod(axis=1, dtype=np.float64), None
+
+
+def _asset_growth_factors(
+    params,
+    num_paths: int,
+    years: int,
+    periods_per_year: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    Per-asset growth factors (paths x periods x assets).
+
+    Yearly drift / volatility per asset come from EXPECTED_RETURNS /
+    VOLATILITY, or for the bootstrap return model are block-resampled
+    from the fund histories (drift) plus their residual volatility.
+    Shocks are drawn per period like the blended engine; they are shared
+    by all assets in the blended model and correlated through the
+    Cholesky factor in the multi-asset model.
+    """
+    dtype = _float_dtype(params)
+    if params.return_model == "bootstrap":
+        pools = load_return_model().pools(
+            ASSET_CLASSES,
+            fallback={a: (EXPECTED_RETURNS[a], VOLATILITY[a]) for a in ASSET_CLASSES},
+            sub_categories=params.sub_categories,
+        )
+        means, sigmas = ReturnModel.block_bootstrap(pools, num_paths, years, params.block_years, rng)
+        means, sigmas = means.astype(dtype, copy=False), sigmas.astype(dtype, copy=False)
+        if periods_per_year != 1:
+            means = np.repeat(means, periods_per_year, axis=1)
+            sigmas = np.repeat(sigmas, periods_per_year, axis=1)
+    else:
+        means = np.array([EXPECTED_RETURNS[a] for a in ASSET_CLASSES])
+        sigmas = np.array([VOLATILITY[a] for a in ASSET_CLASSES])
+
+    periods = years * periods_per_year
+    if params.model == "multi_asset":
+        correlation = tuple(tuple(row) for row in (params.correlation or DEFAULT_CORRELATION))
+        normals = _standard_normals(rng, (num_paths, periods, len(ASSET_CLASSES)), params.variance_reduction, dtype)
+        shocks = normals @ _cholesky_factor(correlation).T.astype(dtype)
+    else:
+        normals = _standard_normals(rng, (num_paths, periods), params.variance_reduction, dtype)
+        shocks = np.repeat(normals[:, :, None], len(ASSET_CLASSES), axis=2)
+    del normals
+
+    shocks = get_return_generator(params.return_distribution).shocks(shocks, rng, periods_per_year)
+    return _growth_factors(shocks, means, sigmas, periods_per_year)
+
+
+def _cashflow_vector(investment, periods: int) -> Tuple[float, np.ndarray]:
+    """(amount at the start, flow at the end of each period) for any investment type."""
+    if investment.type == "schedule":
+        return compile_cashflows(investment)
+    if investment.type == "sip":
+        return 0.0, np.full(periods, investment.monthly_amount or 0.0)
+    return investment.lumpsum_amount or 0.0, np.zeros(periods)
+
+
+def _simulate_rebalanced(
+    asset_factors: np.ndarray,
+    weights: np.ndarray,
+    initial: float,
+    flows: np.ndarray,
+    policy,
+    periods_per_year: int,
+):
+    """
+    Tracks per-asset holdings (paths x assets) period by period and
+    rebalances them with array masks, next to a buy-and-hold twin on the
+    same draws. Inflows are invested at the target weights; outflows are
+    taken pro rata and floored at zero.
+
+    Returns (terminal values, portfolio growth factors per period,
+    depleted or None, (rebalances, turnover, buy-and-hold values)).
+    """
+    every = None
+    if policy.frequency_months:
+        every = max(1, round(policy.frequency_months * periods_per_year / 12))
+    threshold = policy.threshold_pct / 100.0 if policy.threshold_pct else None
+
+    if sim_kernels.NUMBA_ENABLED:
+        values, portfolio, depleted, rebalancing = sim_kernels.simulate_rebalanced(
+            asset_factors, weights, initial, flows, every or 0, threshold or 0.0
+        )
+        return values, portfolio, depleted if (flows < 0).any() else None, rebalancing
+
+    num_paths, periods, _ = asset_factors.shape
+    factors = np.ascontiguousarray(asset_factors.transpose(1, 0, 2))   # periods-major rows
+
+    holdings = np.tile(initial * weights, (num_paths, 1))
+    buy_and_hold = holdings.copy()
+    previous = np.full(num_paths, float(initial))
+    portfolio = np.empty((num_paths, periods), dtype=asset_factors.dtype)
+
+    depleted = np.zeros(num_paths, dtype=bool) if (flows < 0).any() else None
+    rebalances = np.zeros(num_paths)
+    turnover = np.zeros(num_paths)
+
+    for t in range(periods):
+        growth = factors[t]
+        holdings *= growth
+        buy_and_hold *= growth
+        total = holdings.sum(axis=1)
+
+        # Portfolio growth this period (target mix while nothing is invested yet)
+        portfolio[:, t] = np.divide(total, previous, out=growth @ weights, where=previous > 0)
+
+        flow = flows[t]
+        if flow > 0:
+            holdings += flow * weights
+            buy_and_hold += flow * weights
+            total += flow
+        elif flow < 0:
+            depleted |= total + flow < 0
+            for book, book_total in ((holdings, total), (buy_and_hold, buy_and_hold.sum(axis=1))):
+                scale = np.divide(np.maximum(book_total + flow, 0.0), book_total,
+                                  out=np.zeros(num_paths), where=book_total > 0)
+                book *= scale[:, None]
+            total = holdings.sum(axis=1)
+
+        due = every is not None and (t + 1) % every == 0
+        if due or threshold is not None:
+            target = total[:, None] * weights
+            gap = np.abs(holdings - target)
+            if due:
+                mask = total > 0
+            else:
+                mask = (gap > threshold * total[:, None]).any(axis=1)
+
+            if mask.any():
+                traded = np.divide(gap.sum(axis=1), 2 * total, out=np.zeros(num_paths), where=mask)
+                turnover += traded
+                rebalances += mask
+                holdings[mask] = target[mask]
+
+        previous = total
+
+    return holdings.sum(axis=1), portfolio, depleted, (rebalances, turnover, buy_and_hold.sum(axis=1))
+
+
+def _portfolio_moments(
+    allocation: Dict[str, float],
+    params,
+) -> Tuple[float, float, Optional[np.ndarray]]:
+    """
+    (mu, sigma, loadings) of the portfolio's yearly return.
+
+    For the multi-asset model sigma accounts for correlation and
+    `loadings` maps correlated per-asset shocks to a unit portfolio shock.
+    """
+    if params.model != "multi_asset":
+        mu, sigma = compute_portfolio_parameters(allocation)
+        return mu, sigma, None
+
+    weights = np.array([allocation[a] / 100.0 for a in ASSET_CLASSES])
+    scaled = weights * np.array([VOLATILITY[a] for a in ASSET_CLASSES])
+    correlation = np.array(params.correlation or DEFAULT_CORRELATION)
+
+    mu = float(weights @ np.array([EXPECTED_RETURNS[a] for a in ASSET_CLASSES]))
+    sigma = float(np.sqrt(scaled @ correlation @ scaled))
+    return mu, sigma, scaled / sigma if sigma > 0 else scaled
+
+
+def _control_parameters(mu: float, sigma: float, periods_per_year: int) -> Tuple[float, float]:
+    """
+    Lognormal stand-in G = exp(alpha + beta * z) for the growth factor
+    (1 + mu + sigma * z) ** (1 / ppy), from a second-order expansion of
+    its log. Used as the control variate: same shocks, known expectation.
+    """
+    alpha = (math.log1p(mu) - sigma ** 2 / (2 * (1 + mu) ** 2)) / periods_per_year
+    beta = sigma / ((1 + mu) * periods_per_year)
+    return alpha, beta
+
+
+def _control_expectation(
+    payload: PortfolioSimulationRequest,
+    allocation: Dict[str, float],
+) -> float:
+    """Analytic E[terminal value] of the lognormal control portfolio."""
+    mu, sigma, _ = _portfolio_moments(allocation, payload.simulation_params)
+    is_sip = payload.investment.type == "sip"
+    periods_per_year = _periods_per_year(payload.investment)
+    periods = payload.investment.duration_years * periods_per_year
+
+    alpha, beta = _control_parameters(mu, sigma, periods_per_year)
+    g = math.exp(alpha + beta ** 2 / 2)       # E[G] per period
+
+    if payload.investment.type == "schedule":
+        # The control portfolio is not floored, so it stays linear in the flows
+        initial, flows = compile_cashflows(payload.investment)
+        return initial * g ** periods + float(flows @ g ** np.arange(periods - 1, -1, -1))
+
+    if not is_sip:
+        return (payload.investment.lumpsum_amount or 0.0) * g ** periods
+
+    monthly = payload.investment.monthly_amount or 0.0
+    if abs(g - 1.0) < 1e-12:
+        return monthly * periods
+    return monthly * (g ** periods - 1.0) / (g - 1.0)
+
+
+class ShardPaths(NamedTuple):
+    """Per-path outputs of one shard, in SimulationStats.update order."""
+    values: np.ndarray
+    control: Optional[np.ndarray] = None
+    path_risk: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    depleted: Optional[np.ndarray] = None
+    rebalancing: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+
+def _simulate_vectorized(
+    payload: PortfolioSimulationRequest,
+    allocation: Dict[str, float],
+    num_sims: int,
+    rng: np.random.Generator,
+) -> "ShardPaths":
+    """
+    Draws the whole (paths x periods) matrix of shocks in one shot and
+    evolves the portfolio with array ops.
+
+    Returns ShardPaths: terminal values plus, where they apply,
+    control values (control_variate mode: the same shocks pushed through
+    the lognormal control portfolio), path risk (_path_risk), depleted
+    flags (schedules with withdrawals) and rebalancing figures.
+    """
+
+    params = payload.simulation_params
+    years = payload.investment.duration_years
+
+    periods_per_year = _periods_per_year(payload.investment)
+    shape = (num_sims, years * periods_per_year)      # duration_years >= 1: never empty
+
+    dtype = _float_dtype(params)
+    weights = np.array([allocation[a] / 100.0 for a in ASSET_CLASSES])
+
+    if params.rebalancing is not None:
+        asset_factors = _asset_growth_factors(params, num_sims, years, periods_per_year, rng)
+        initial, flows = _cashflow_vector(payload.investment, shape[1])
+        values, factors, depleted, rebalancing = _simulate_rebalanced(
+            asset_factors, weights, initial, flows, params.rebalancing, periods_per_year
+        )
+        path_risk = _path_risk(factors, periods_per_year) if params.path_risk_metrics else None
+        return ShardPaths(values, None, path_risk, depleted, rebalancing)
+
+    if params.return_model == "bootstrap":
+        factors = _asset_growth_factors(params, num_sims, years, periods_per_year, rng) @ weights.astype(dtype)
+        path_risk = _path_risk(factors, periods_per_year) if params.path_risk_metrics else None
+        values, depleted = _evolve(factors, payload)
+        return ShardPaths(values, None, path_risk, depleted)
+
+    multi_asset = params.model == "multi_asset"
+    mu, sigma, loadings = _portfolio_moments(allocation, params)
+
+    if multi_asset:
+        correlation = tuple(tuple(row) for row in (params.correlation or DEFAULT_CORRELATION))
+        normals = _standard_normals(rng, shape + (len(ASSET_CLASSES),), params.variance_reduction, dtype)
+
+        # One batched matmul correlates all assets for all paths
+        shocks = normals @ _cholesky_factor(correlation).T.astype(dtype)
+        del normals
+    else:
+        shocks = _standard_normals(rng, shape, params.variance_reduction, dtype)
+
+    shocks = get_return_generator(params.return_distribution).shocks(shocks, rng, periods_per_year)
+
+    # Unit portfolio shock per period, kept for the control variate
+    control_shocks = None
+    if params.variance_reduction == "control_variate":
+        control_shocks = shocks @ loadings.astype(dtype) if multi_asset else shocks.copy()
+
+    if multi_asset:
+        mus = np.array([EXPECTED_RETURNS[a] for a in ASSET_CLASSES])
+        sigmas = np.array([VOLATILITY[a] for a in ASSET_CLASSES])
+
+        # Weighted sum of per-asset growth = portfolio growth for the period
+        factors = _growth_factors(shocks, mus, sigmas, periods_per_year) @ weights.astype(dtype)
+    else:
+        factors = _growth_factors(shocks, mu, sigma, periods_per_year)
+
+    path_risk = _path_risk(factors, periods_per_year) if params.path_risk_metrics else None
+    values, depleted = _evolve(factors, payload)
+
+    control = None
+    if control_shocks is not None:
+        alpha, beta = _control_parameters(mu, sigma, periods_per_year)
+        control_shocks *= beta
+        control_shocks += alpha
+        np.exp(control_shocks, out=control_shocks)
+        control, _ = _evolve(control_shocks, payload, floor=False)
+
+    return ShardPaths(values, control, path_risk, depleted)
+
+
+# -------------------------------------------------------------
+# Sharded Execution
+# -------------------------------------------------------------
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """
+    One shared pool per API process, created on first use.
+    'spawn' keeps workers clean of the server's threads and sockets.
+    """
+    global _process_pool
+
+    with _pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=get_context("spawn"),
+                initializer=sim_kernels.warmup_kernels,     # compile before the first shard
+            )
+        return _process_pool
+
+
+def _float_dtype(params):
+    return np.float32 if params.precision == "float32" else np.float64
+
+
+def _shard_bytes_per_path(params, periods: int) -> int:
+    """
+    Peak working set of one path in a shard, from the matrices that are
+    alive at the same time on each code path (checked with tracemalloc,
+    see bench_memory in evaluation/simulation_benchmark.py). Counted in
+    (periods x assets) "full" and (periods,) "flat" rows of the working
+    dtype, plus float64 per-period temporaries.
+    """
+    itemsize = np.dtype(_float_dtype(params)).itemsize
+    multi_asset = params.model == "multi_asset"
+    bootstrap = params.return_model == "bootstrap"
+    rebalancing = params.rebalancing is not None
+
+    full, flat, wide = 0, 1, 0
+    if multi_asset or bootstrap or rebalancing:
+        # normals + correlated shocks, or flat normals repeated per asset
+        full, flat = (2, 0) if multi_asset else (1, 1)
+        if bootstrap:
+            full += 2                # per-period drift and residual sigma
+        if rebalancing:
+            # asset factors + their periods-major copy, portfolio factors
+            full, flat = max(full, 2), max(flat, 1)
+    if params.variance_reduction == "control_variate":
+        flat += 1
+    if params.variance_reduction == "sobol":
+        wide += 2                    # float64 Sobol points and scipy's own buffer
+    if params.return_distribution.type != "normal":
+        wide += 1                    # mixing / regime / jump draws
+
+    return max(1, periods * ((full * len(ASSET_CLASSES) + flat) * itemsize + wide * 8))
+
+
+def _shard_sizes(payload: PortfolioSimulationRequest) -> List[int]:
+    """
+    Splits num_simulations into shards no larger than SHARD_PATHS and
+    small enough that one shard's working set fits the memory limit
+    (simulation_params.memory_limit_mb, default MAX_SHARD_MEMORY_MB).
+    Shards run one at a time per worker, so peak memory is bounded by
+    the limit (times workers) whatever num_simulations is.
+    """
+    params = payload.simulation_params
+    periods = payload.investment.duration_years * _periods_per_year(payload.investment)
+    budget = (params.memory_limit_mb or MAX_SHARD_MEMORY_MB) * 1024 * 1024
+    if params.path_risk_metrics:
+        budget -= 2 * RISK_CHUNK_PATHS * periods * 8      # fixed drawdown temporaries
+
+    bytes_per_path = _shard_bytes_per_path(params, periods)
+    shard_paths = min(SHARD_PATHS, max(1, budget // bytes_per_path))
+
+    full, rest = divmod(params.num_simulations, shard_paths)
+    return [shard_paths] * full + ([rest] if rest else [])
+
+
+def _simulate_shard(
+    payload: PortfolioSimulationRequest,
+    allocation: Dict[str, float],
+    num_paths: int,
+    seed_seq: np.random.SeedSequence,
+) -> SimulationStats:
+    """Runs one shard with its own generator. Top-level so it can be pickled."""
+    params = payload.simulation_params
+    rng = np.random.default_rng(seed_seq)
+    stats = SimulationStats(params.goal_amount, params.return_final_values)
+    stats.update(*_simulate_vectorized(payload, allocation, num_paths, rng))
+    return stats
+
+
+def _run_batches(
+    payload: PortfolioSimulationRequest,
+    allocation: Dict[str, float],
+    sizes: List[int],
+    seeds: List[np.random.SeedSequence],
+    progress: Optional[Callable[[int], None]] = None,
+) -> List[SimulationStats]:
+    """
+    Runs one shard per (size, seed), serially or on the process pool.
+    Results come back in input order so merging does not depend on timing.
+
+    `progress(paths)` is called as each shard finishes; an exception it
+    raises (e.g. a cancelled job) stops the run and drops queued shards.
+    """
+    results: List[Optional[SimulationStats]] = [None] * len(sizes)
+    workers = min(payload.simulation_params.workers, len(sizes), os.cpu_count() or 1)
+
+    if workers <= 1:
+        for i, (size, seed_seq) in enumerate(zip(sizes, seeds)):
+            results[i] = _simulate_shard(payload, allocation, size, seed_seq)
+            if progress:
+                progress(size)
+        return results
+
+    pool = _get_process_pool()
+    pending = {}
+    next_shard = 0
+
+    # Keep at most `workers` shards in flight, which also bounds memory
+    while next_shard < len(sizes) or pending:
+        while next_shard < len(sizes) and len(pending) < workers:
+            future = pool.submit(
+                _simulate_shard, payload, allocation,
+                sizes[next_shard], seeds[next_shard],
+            )
+            pending[future] = next_shard
+            next_shard += 1
+
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        try:
+            for future in done:
+                i = pending.pop(future)
+                results[i] = future.result()
+                if progress:
+                    progress(sizes[i])
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+    return results
+
+
+def _run_shards(
+    payload: PortfolioSimulationRequest,
+    allocation: Dict[str, float],
+    stats: SimulationStats,
+    progress: Optional[Callable[[int], None]] = None,
+):
+    """Fixed-size run: all of num_simulations, merged into `stats`."""
+    sizes = _shard_sizes(payload)
+
+    # Independent, reproducible stream per shard
+    seeds = np.random.SeedSequence(payload.simulation_params.seed).spawn(len(sizes))
+
+    for shard_stats in _run_batches(payload, allocation, sizes, seeds, progress):
+        stats.merge(shard_stats)
+
+
+def _run_adaptive(
+    payload: PortfolioSimulationRequest,
+    allocation: Dict[str, float],
+    stats: SimulationStats,
+    progress: Optional[Callable[[int], None]] = None,
+):
+    """
+    Adds batches of paths into `stats` until the expected value reaches
+    the requested relative standard error and the goal probability the
+    requested absolute one, the time budget runs out, or
+    num_simulations (the cap) is reached.
+    """
+    params = payload.simulation_params
+    batch_size = min(params.adaptive_batch_size, _shard_sizes(payload)[0])
+    root = np.random.SeedSequence(params.seed)
+    started = time.perf_counter()
+
+    def done() -> bool:
+        precise = (
+            stats.std_error <= params.target_relative_error * abs(stats.estimate)
+            and stats.probability_std_error <= params.probability_tolerance
+        )
+        out_of_time = (
+            params.time_budget_seconds is not None
+            and time.perf_counter() - started >= params.time_budget_seconds
+        )
+        return precise or out_of_time
+
+    while stats.count < params.num_simulations:
+        # One batch per worker each round; spawn() continues the same
+        # child sequence, so seeded runs stay reproducible
+        remaining = params.num_simulations - stats.count
+        sizes = [min(batch_size, remaining - i * batch_size) for i in range(params.workers)]
+        sizes = [size for size in sizes if size > 0]
+
+        # Merge in seed order and stop at the first batch that reaches the
+        # target, dropping the rest of the round: the paths used and the
+        # estimate are the same whatever `workers` is
+        for batch_stats in _run_batches(payload, allocation, sizes, root.spawn(len(sizes)), progress):
+            stats.merge(batch_stats)
+            if done():
+                return
+
+
+# -------------------------------------------------------------
+# Simulation Function
+# -------------------------------------------------------------
+def new_seed() -> int:
+    """Fresh root seed for a request that did not bring one."""
+    return secrets.randbits(63)
+
+
+def run_monte_carlo_simulation(
+    payload: PortfolioSimulationRequest,
+    progress: Optional[Callable[[int], None]] = None,
+) -> PortfolioSimulationResponse:
+    """
+    Entry point used by the routers, agents and MCP tools.
+
+    Every run has a seed, echoed in the response, so any result can be
+    reproduced by sending it back as simulation_params.seed. Unseeded
+    requests get one derived from the request hash when they go through
+    the result cache (identical requests then produce, and can safely
+    share, identical results) and a fresh random one otherwise.
+
+    `progress(paths)` is called after every completed shard / batch
+    (not on cache hits or with the reference engine).
+    """
+    params = payload.simulation_params
+    cacheable = params.use_cache and params.engine != "reference"
+
+    key = None
+    if cacheable:
+        key = simulation_cache_key(payload)
+        cached = get_cached_simulation(key)
+        if cached is not None:
+            return cached
+
+    if params.seed is None:
+        seed = seed_from_key(key) if key else new_seed()
+        payload = payload.model_copy(update={
+            "simulation_params": params.model_copy(update={"seed": seed})
+        })
+
+    result = _simulate(payload, progress)
+    if key:
+        set_cached_simulation(key, result)
+    return result
+
+
+def _simulate(
+    payload: PortfolioSimulationRequest,
+    progress: Optional[Callable[[int], None]] = None,
+) -> PortfolioSimulationResponse:
+
+    # Convert model into dict
+    allocation = {
+        "equity": payload.allocation.equity,
+        "debt": payload.allocation.debt,
+        "gold": payload.allocation.gold,
+        "other": payload.allocation.other or 0.0
+    }
+
+    params = payload.simulation_params
+
+    # ---------------------------------------------------------
+    # Monte Carlo Simulation
+    # ---------------------------------------------------------
+    if params.engine == "reference":
+        if (params.model != "blended" or params.return_model != "parametric"
+                or params.return_distribution.type != "normal"):
+            raise SimulationException("The reference engine only supports the blended parametric normal model.")
+        if payload.investment.type == "schedule" or params.rebalancing is not None:
+            raise SimulationException("The reference engine does not support schedules or rebalancing.")
+        mu, sigma = compute_portfolio_parameters(allocation)
+        stats = SimulationStats(params.goal_amount, params.return_final_values)
+        stats.update(np.array(_simulate_reference(payload, mu, sigma, random.Random(params.seed))))
+    else:
+        stats = SimulationStats(params.goal_amount, params.return_final_values)
+        if params.variance_reduction == "control_variate":
+            if params.return_model == "bootstrap":
+                raise SimulationException("control_variate needs the parametric return model.")
+            if params.rebalancing is not None:
+                raise SimulationException("control_variate is not supported with rebalancing.")
+            if params.return_distribution.type != "normal":
+                raise SimulationException("control_variate needs normally distributed returns.")
+            stats.control_expectation = _control_expectation(payload, allocation)
+
+        if params.target_relative_error is not None:
+            _run_adaptive(payload, allocation, stats, progress)
+        else:
+            _run_shards(payload, allocation, stats, progress)
+
     # ---------------------------------------------------------
     # Compute Output Statistics
     # ---------------------------------------------------------
-    final_values.sort()
-    n = len(final_values)
+    final_values = stats.sorted_values()
+
+    risk = stats.path_risk
+    risk_metrics = None
+    if risk.count:
+        risk_metrics = PathRiskMetrics(
+            max_drawdown={"mean": risk.mean_drawdown, **{
+                f"p{p}": risk.drawdown.quantile(p / 100) for p in REPORTED_PERCENTILES
+            }},
+            months_under_water={"mean": risk.mean_underwater, **{
+                f"p{p}": round(risk.underwater.quantile(p / 100)) for p in REPORTED_PERCENTILES
+            }},
+        )
 
-    expected_value = sum(final_values) / n
-    worst_case = final_values[int(0.05 * (n - 1))]       # 5th percentile
-    best_case = final_values[int(0.95 * (n - 1))]        # 95th percentile
+    rebalancing = None
+    if stats.rebalancing is not None and stats.rebalancing.count:
+        r = stats.rebalancing
+        years = max(payload.investment.duration_years, 1)
+        rebalancing = RebalancingReport(
+            rebalances_per_year=r.rebalances / r.count / years,
+            annual_turnover=r.turnover / r.count / years,
+            buy_and_hold_expected_value=r.buy_and_hold_sum / r.count,
+            excess_over_buy_and_hold=r.excess_sum / r.count,
+            outperformance_probability=r.wins / r.count,
+        )
 
-    # Default goal assumption (can be customized)
-    goal_amount = 10_000_000  # 1 Cr
-    probability_of_goal = sum(1 for v in final_values if v >= goal_amount) / n
+    goal_curve = None
+    if params.goal_curve_points:
+        amounts = np.linspace(stats.percentile(0.01), stats.percentile(0.99), params.goal_curve_points)
+        goal_curve = GoalProbabilityCurve(
+            amounts=amounts.tolist(),
+            probabilities=stats.sketch.survival(amounts).tolist(),
+        )
 
     return PortfolioSimulationResponse(
-        expected_value=expected_value,
-        worst_case=worst_case,
-        best_case=best_case,
-        probability_of_goal_achievement=probability_of_goal,
-        final_values=final_values
+        expected_value=stats.estimate,
+        worst_case=stats.percentile(0.05),      # 5th percentile
+        best_case=stats.percentile(0.95),       # 95th percentile
+        probability_of_goal_achievement=stats.goal_probability,
+        percentiles={f"p{p}": stats.percentile(p / 100) for p in REPORTED_PERCENTILES},
+        histogram=stats.sketch.histogram(params.histogram_bins),
+        standard_error=stats.std_error,
+        probability_standard_error=stats.probability_std_error,
+        paths_used=stats.count,
+        seed=params.seed,
+        conditional_value_at_risk=stats.sketch.tail_mean(CVAR_LEVEL),
+        depletion_probability=stats.depletion_probability,
+        risk_metrics=risk_metrics,
+        goal_curve=goal_curve,
+        rebalancing=rebalancing,
+        final_values=final_values.tolist() if final_values is not None else None
     )
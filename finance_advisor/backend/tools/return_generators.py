@@ -0,0 +1,144 @@
+# backend/tools/return_generators.py
+
+"""
+Return shock generators for the vectorized simulator.
+
+Yearly returns are modelled as r = mu + sigma * s. The engines draw
+standard normals s (paths x periods[ x assets]), correlated and
+variance-reduced as configured, and a generator reshapes them into
+shocks of another distribution. Every generator keeps mean 0 and
+variance 1 per period, so mu / sigma stay the portfolio's mean and
+volatility, and only the shape changes:
+
+- normal:           unchanged (Gaussian)
+- student_t:        multivariate t; one chi-square mixing draw per
+                    (path, period) is shared by all assets, so crashes
+                    hit every asset together and correlations are kept
+- regime_switching: two-state Markov chain (calm / crisis) per path;
+                    crisis periods are wider and shifted down
+- jump_diffusion:   Poisson number of jumps per period on top of the
+                    normal shock (Merton), shared by all assets
+
+All generators work in place on whole shard arrays; only the regime
+chain loops, over periods, with every path stepped at once.
+"""
+
+import math
+from typing import Tuple
+
+import numpy as np
+
+from ..models.simulate import ReturnDistribution
+
+
+class ReturnGenerator:
+    """Gaussian shocks; base class of the other generators."""
+
+    def shocks(self, normals: np.ndarray, rng: np.random.Generator, periods_per_year: int) -> np.ndarray:
+        """
+        Turns standard normal draws (paths, periods[, assets]) into
+        standardized shocks, in place. Extra randomness is drawn per
+        (path, period) and shared across the asset axis.
+        """
+        return normals
+
+    @staticmethod
+    def _per_period(normals: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """(paths, periods) values broadcast against the normals."""
+        return values[:, :, None] if normals.ndim == 3 else values
+
+
+class StudentTGenerator(ReturnGenerator):
+    def __init__(self, degrees_of_freedom: float):
+        self.dof = degrees_of_freedom
+
+    def shocks(self, normals, rng, periods_per_year):
+        # z / sqrt(W / dof) has variance dof / (dof - 2)
+        mixing = rng.chisquare(self.dof, size=normals.shape[:2])
+        np.divide(self.dof - 2.0, mixing, out=mixing)
+        np.sqrt(mixing, out=mixing)
+        normals *= self._per_period(normals, mixing)
+        return normals
+
+
+class RegimeSwitchingGenerator(ReturnGenerator):
+    def __init__(self, entry: float, exit: float, volatility_multiplier: float, drift: float):
+        self.entry = entry
+        self.exit = exit
+        self.vol = volatility_multiplier
+        self.drift = drift
+
+    def _transition(self, periods_per_year: int) -> Tuple[float, float]:
+        """Yearly entry / exit probabilities as per-period ones."""
+        return tuple(1.0 - (1.0 - p) ** (1.0 / periods_per_year) for p in (self.entry, self.exit))
+
+    def regimes(self, rng: np.random.Generator, paths: int, periods: int, periods_per_year: int) -> np.ndarray:
+        """(paths, periods) True in crisis; starts from the stationary mix."""
+        entry, exit_ = self._transition(periods_per_year)
+        uniforms = rng.random((paths, periods))
+        crisis = np.empty((paths, periods), dtype=bool)
+
+        state = uniforms[:, 0] < entry / (entry + exit_)
+        crisis[:, 0] = state
+        for t in range(1, periods):
+            u = uniforms[:, t]
+            state = np.where(state, u >= exit_, u < entry)
+            crisis[:, t] = state
+        return crisis
+
+    def _moments(self, periods_per_year: int) -> Tuple[float, float]:
+        """Stationary mean / standard deviation of the unscaled mixture."""
+        entry, exit_ = self._transition(periods_per_year)
+        pi = entry / (entry + exit_)
+        mean = pi * self.drift
+        second = pi * (self.vol ** 2 + self.drift ** 2) + (1.0 - pi)
+        return mean, math.sqrt(second - mean ** 2)
+
+    def shocks(self, normals, rng, periods_per_year):
+        crisis = self.regimes(rng, normals.shape[0], normals.shape[1], periods_per_year)
+        crisis = self._per_period(normals, crisis)
+        mean, std = self._moments(periods_per_year)
+
+        normals *= np.where(crisis, self.vol / std, 1.0 / std)
+        normals += np.where(crisis, (self.drift - mean) / std, -mean / std)
+        return normals
+
+
+class JumpDiffusionGenerator(ReturnGenerator):
+    def __init__(self, intensity: float, jump_mean: float, jump_std: float):
+        self.intensity = intensity
+        self.jump_mean = jump_mean
+        self.jump_std = jump_std
+
+    def shocks(self, normals, rng, periods_per_year):
+        lam = self.intensity / periods_per_year
+        counts = rng.poisson(lam, size=normals.shape[:2])
+
+        # Sum of k normal jumps ~ N(k * mean, k * std^2); sizes are only
+        # drawn for the (few) periods that have a jump
+        jumped = np.nonzero(counts)
+        k = counts[jumped]
+        jumps = np.full(counts.shape, -lam * self.jump_mean)      # compensator
+        jumps[jumped] += k * self.jump_mean + np.sqrt(k) * self.jump_std * rng.standard_normal(k.size)
+
+        # Rescale to unit variance
+        std = math.sqrt(1.0 + lam * (self.jump_std ** 2 + self.jump_mean ** 2))
+
+        normals += self._per_period(normals, jumps)
+        normals /= std
+        return normals
+
+
+def get_return_generator(distribution: ReturnDistribution) -> ReturnGenerator:
+    if distribution.type == "student_t":
+        return StudentTGenerator(distribution.degrees_of_freedom)
+    if distribution.type == "regime_switching":
+        return RegimeSwitchingGenerator(
+            distribution.crisis_entry_probability,
+            distribution.crisis_exit_probability,
+            distribution.crisis_volatility_multiplier,
+            distribution.crisis_drift,
+        )
+    if distribution.type == "jump_diffusion":
+        return JumpDiffusionGenerator(distribution.jump_intensity, distribution.jump_mean, distribution.jump_std)
+    return ReturnGenerator()
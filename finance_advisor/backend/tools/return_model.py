@@ -0,0 +1,280 @@
+# backend/tools/return_model.py
+
+"""
+Historical return model built from the bundled fund data
+(data/mutual_funds/*.csv).
+
+The CSVs carry trailing 3 / 5 / 10-year annualised returns and 3-year
+volatility per fund, not return series. Each fund is turned into a
+10-year history of yearly returns by chaining its trailing returns:
+- years 1-5  (oldest): the rate linking the 10-year and 5-year figures
+- years 6-7:           the rate linking the 5-year and 3-year figures
+- years 8-10 (latest): the 3-year return
+plus a residual volatility, so drift (from the history) and noise
+(residual) together match the fund's reported volatility.
+
+The model is a handful of arrays, built once and memoized on disk under
+data/cache/, keyed by the CSV mtimes, so restarts do not reparse.
+"""
+
+import csv
+import glob
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..utils.logger import get_logger
+
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+FUNDS_DIR = os.path.join(DATA_DIR, "mutual_funds")
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+CACHE_FILE = os.path.join(CACHE_DIR, "return_model.npz")
+
+MODEL_VERSION = 1                # bump when the construction below changes
+HISTORY_YEARS = 10
+
+# CSV fund_type -> simulator asset class. There are no gold funds in the
+# data, so gold always falls back to the parametric assumptions.
+FUND_TYPE_TO_ASSET = {
+    "Equity": "equity",
+    "Debt": "debt",
+    "Hybrid": "other",
+}
+
+logger = get_logger("return-model")
+
+
+# -------------------------------------------------------------
+# Model
+# -------------------------------------------------------------
+class ReturnModel:
+    """
+    Array-backed per-fund return histories.
+
+    histories:   (funds, HISTORY_YEARS) yearly returns, oldest first
+    residuals:   (funds,) yearly volatility left after the history's own spread
+    asset_class: (funds,) simulator asset class of each fund
+    """
+
+    def __init__(
+        self,
+        fund_ids: np.ndarray,
+        asset_class: np.ndarray,
+        sub_category: np.ndarray,
+        histories: np.ndarray,
+        residuals: np.ndarray,
+    ):
+        self.fund_ids = fund_ids
+        self.asset_class = asset_class
+        self.sub_category = sub_category
+        self.histories = histories
+        self.residuals = residuals
+
+        for array in (histories, residuals):
+            array.setflags(write=False)      # shared between requests
+
+    def select(self, asset_class: str, sub_categories: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Indices of the funds in `asset_class`, narrowed to `sub_categories`
+        when given. A class with none of those funds comes back empty, so
+        pools() gives it the parametric fallback.
+        """
+        in_class = self.asset_class == asset_class
+        if sub_categories:
+            in_class &= np.isin(self.sub_category, sub_categories)
+        return np.flatnonzero(in_class)
+
+    def pools(
+        self,
+        asset_classes: Tuple[str, ...],
+        fallback: Dict[str, Tuple[float, float]],
+        sub_categories: Optional[List[str]] = None,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        (histories, residuals) per asset class, in `asset_classes` order.
+        A class without funds (none in the CSVs, or none left by the
+        sub_categories filter) becomes a single flat history at its
+        fallback (mu, sigma).
+        """
+        pools = []
+        for asset in asset_classes:
+            idx = self.select(asset, sub_categories)
+            if idx.size:
+                pools.append((self.histories[idx], self.residuals[idx]))
+            else:
+                mu, sigma = fallback[asset]
+                pools.append((np.full((1, HISTORY_YEARS), mu), np.array([sigma])))
+        return pools
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Mean yearly return / volatility and fund count per asset class and sub_category."""
+        total_vol = np.sqrt(self.histories.var(axis=1) + self.residuals ** 2)
+
+        def describe(mask):
+            return {
+                "funds": int(mask.sum()),
+                "mean_return": float(self.histories[mask].mean()),
+                "volatility": float(total_vol[mask].mean()),
+            }
+
+        out = {}
+        for asset in np.unique(self.asset_class):
+            in_class = self.asset_class == asset
+            out[str(asset)] = {"all": describe(in_class)}
+            for sub in np.unique(self.sub_category[in_class]):
+                out[str(asset)][str(sub)] = describe(in_class & (self.sub_category == sub))
+        return out
+
+    # -----------------------------------------------------
+    # Sampling
+    # -----------------------------------------------------
+    @staticmethod
+    def block_bootstrap(
+        pools: List[Tuple[np.ndarray, np.ndarray]],
+        num_paths: int,
+        years: int,
+        block_years: int,
+        rng: np.random.Generator,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Yearly (mean, residual sigma), each (paths, years, assets).
+
+        Every block of `block_years` consecutive years picks one fund per
+        asset class and a start year in its history (wrapping around).
+        The start year is shared by all asset classes, so they move
+        through the same stretch of history together.
+        """
+        blocks = -(-years // block_years)
+        starts = rng.integers(0, HISTORY_YEARS, size=(num_paths, blocks))
+
+        # Year y of a path reads block y // block_years at offset y % block_years
+        year_block = np.arange(years) // block_years
+        history_year = (starts[:, year_block] + np.arange(years) % block_years) % HISTORY_YEARS
+
+        means = np.empty((num_paths, years, len(pools)))
+        sigmas = np.empty((num_paths, years, len(pools)))
+        for a, (histories, residuals) in enumerate(pools):
+            funds = rng.integers(0, len(histories), size=(num_paths, blocks))[:, year_block]
+            means[:, :, a] = histories[funds, history_year]
+            sigmas[:, :, a] = residuals[funds]
+
+        return means, sigmas
+
+
+# -------------------------------------------------------------
+# Building
+# -------------------------------------------------------------
+def _fund_history(r3: float, r5: float, r10: float) -> np.ndarray:
+    """10 yearly returns whose trailing 3 / 5 / 10-year CAGRs match the inputs."""
+    g3, g5, g10 = 1 + r3, 1 + r5, 1 + r10
+    oldest = (g10 ** 10 / g5 ** 5) ** (1 / 5) - 1
+    middle = (g5 ** 5 / g3 ** 3) ** (1 / 2) - 1
+    return np.array([oldest] * 5 + [middle] * 2 + [r3] * 3)
+
+
+def _csv_files() -> List[str]:
+    return sorted(glob.glob(os.path.join(FUNDS_DIR, "*.csv")))
+
+
+def _source_key(files: List[str]) -> str:
+    """Changes whenever a CSV is added, removed or modified."""
+    stamp = [MODEL_VERSION] + [
+        [os.path.basename(f), os.stat(f).st_mtime_ns, os.stat(f).st_size] for f in files
+    ]
+    return hashlib.sha256(json.dumps(stamp).encode("utf-8")).hexdigest()
+
+
+def build_return_model(files: Optional[List[str]] = None) -> ReturnModel:
+    """Parses the fund CSVs into a ReturnModel. Malformed rows are skipped."""
+    fund_ids, assets, subs, histories, residuals = [], [], [], [], []
+
+    for path in files if files is not None else _csv_files():
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                asset = FUND_TYPE_TO_ASSET.get(row.get("fund_type"))
+                if asset is None:
+                    continue
+                try:
+                    r3, r5, r10, vol = (
+                        float(row[k]) / 100.0
+                        for k in ("return_3yr_pct", "return_5yr_pct", "return_10yr_pct", "volatility_3yr_pct")
+                    )
+                except (KeyError, TypeError, ValueError):
+                    logger.warning(f"Skipping malformed fund row {row.get('fund_id')} in {os.path.basename(path)}")
+                    continue
+
+                history = _fund_history(r3, r5, r10)
+                fund_ids.append(row["fund_id"])
+                assets.append(asset)
+                subs.append(row.get("sub_category") or "")
+                histories.append(history)
+                residuals.append(np.sqrt(max(vol ** 2 - history.var(), 0.0)))
+
+    return ReturnModel(
+        fund_ids=np.array(fund_ids, dtype=str),
+        asset_class=np.array(assets, dtype=str),
+        sub_category=np.array(subs, dtype=str),
+        histories=np.array(histories, dtype=float).reshape(-1, HISTORY_YEARS),
+        residuals=np.array(residuals, dtype=float),
+    )
+
+
+# -------------------------------------------------------------
+# Disk Memo
+# -------------------------------------------------------------
+def _load_cached(key: str) -> Optional[ReturnModel]:
+    try:
+        with np.load(CACHE_FILE, allow_pickle=False) as data:
+            if str(data["key"]) != key:
+                return None
+            return ReturnModel(
+                fund_ids=data["fund_ids"],
+                asset_class=data["asset_class"],
+                sub_category=data["sub_category"],
+                histories=data["histories"],
+                residuals=data["residuals"],
+            )
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _save_cached(key: str, model: ReturnModel):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = CACHE_FILE + ".tmp.npz"
+        np.savez(
+            tmp,
+            key=np.array(key),
+            fund_ids=model.fund_ids,
+            asset_class=model.asset_class,
+            sub_category=model.sub_category,
+            histories=model.histories,
+            residuals=model.residuals,
+        )
+        os.replace(tmp, CACHE_FILE)      # readers never see a half-written file
+    except OSError as ex:
+        logger.warning(f"Could not write return model cache: {ex}")
+
+
+@lru_cache(maxsize=1)
+def load_return_model() -> ReturnModel:
+    """
+    The process-wide ReturnModel: from data/cache/ when the CSVs are
+    unchanged since it was written, otherwise rebuilt and re-cached.
+    """
+    files = _csv_files()
+    key = _source_key(files)
+
+    model = _load_cached(key)
+    if model is not None:
+        return model
+
+    model = build_return_model(files)
+    _save_cached(key, model)
+    logger.info(f"Built return model from {len(files)} CSV files ({len(model.fund_ids)} funds)")
+    return model
@@ -0,0 +1,227 @@
+# backend/tools/scenario_sim.py
+
+"""
+Batch simulation over scenario grids ("what if I raise the SIP by 5k /
+extend by 5 years / shift 10% to debt").
+
+All scenarios are evaluated against one shared set of random draws
+(common random numbers), so differences between rows reflect the
+scenario, not sampling noise. Work is shared wherever the maths allows:
+- the shocks are drawn once per shard, for the longest duration
+- growth factors are built once per distinct allocation
+- one pass over the periods yields unit values for every duration
+- SIP / lumpsum amounts just rescale those unit values (linearity)
+"""
+
+from itertools import product
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from ..models.simulate import (
+    Allocation,
+    BatchSimulationRequest,
+    BatchSimulationResponse,
+    Scenario,
+    ScenarioResult,
+    SimulationParams,
+)
+from ..utils.exceptions import SimulationException
+from .portfolio_sim import (
+    ASSET_CLASSES,
+    DEFAULT_CORRELATION,
+    EXPECTED_RETURNS,
+    MAX_SHARD_MEMORY_MB,
+    SHARD_PATHS,
+    VOLATILITY,
+    _asset_growth_factors,
+    _cholesky_factor,
+    _float_dtype,
+    _growth_factors,
+    _standard_normals,
+    new_seed,
+    compute_portfolio_parameters,
+)
+from .return_generators import get_return_generator
+from .simulation_stats import SimulationStats
+
+
+MAX_BATCH_SCENARIOS = 500
+
+AllocationKey = Tuple[float, float, float, float]
+
+
+# -------------------------------------------------------------
+# Scenario Expansion
+# -------------------------------------------------------------
+def _allocation_key(allocation: Allocation) -> AllocationKey:
+    return (allocation.equity, allocation.debt, allocation.gold, allocation.other or 0.0)
+
+
+def expand_scenarios(payload: BatchSimulationRequest) -> List[Scenario]:
+    """Explicit scenarios followed by the cartesian product of the grid."""
+    scenarios = list(payload.scenarios)
+
+    if payload.grid:
+        grid = payload.grid
+        for allocation, monthly, lumpsum, years in product(
+            grid.allocations, grid.monthly_amounts, grid.lumpsum_amounts, grid.duration_years
+        ):
+            scenarios.append(Scenario(
+                allocation=allocation,
+                monthly_amount=monthly,
+                lumpsum_amount=lumpsum,
+                duration_years=years,
+            ))
+
+    if not scenarios:
+        raise SimulationException("Provide at least one scenario or a grid.")
+    if len(scenarios) > MAX_BATCH_SCENARIOS:
+        raise SimulationException(f"At most {MAX_BATCH_SCENARIOS} scenarios per batch ({len(scenarios)} given).")
+
+    return scenarios
+
+
+# -------------------------------------------------------------
+# Unit Values
+# -------------------------------------------------------------
+def _unit_values(factors: np.ndarray, periods_needed: List[int], is_sip: bool) -> Dict[int, np.ndarray]:
+    """
+    Terminal value per unit invested for every requested duration, from a
+    single pass over the (periods x paths) growth factors.
+
+    SIP:      v_t = v_{t-1} * F_t + 1   (same timing as the main engine)
+    Lumpsum:  v_t = v_{t-1} * F_t, v_0 = 1
+    """
+    value = np.zeros(factors.shape[1]) if is_sip else np.ones(factors.shape[1])
+    needed = set(periods_needed)
+    out = {0: value.copy()} if 0 in needed else {}
+
+    for t in range(max(periods_needed)):
+        value *= factors[t]
+        if is_sip:
+            value += 1.0
+        if t + 1 in needed:
+            out[t + 1] = value.copy()
+
+    return out
+
+
+def _shard_unit_values(
+    params: SimulationParams,
+    is_sip: bool,
+    allocations: Dict[AllocationKey, Allocation],
+    periods_needed: List[int],
+    num_paths: int,
+    rng: np.random.Generator,
+) -> Dict[Tuple[AllocationKey, int], np.ndarray]:
+    """Unit values for every (allocation, duration) on one shard of shared draws."""
+    periods_per_year = 12 if is_sip else 1
+    max_periods = max(periods_needed)
+    bootstrap = params.return_model == "bootstrap"
+    multi_asset = params.model == "multi_asset"
+    generator = get_return_generator(params.return_distribution)
+    dtype = _float_dtype(params)
+
+    if bootstrap:
+        # Per-asset growth factors do not depend on the allocation: build once
+        asset_factors = _asset_growth_factors(
+            params, num_paths, max_periods // periods_per_year, periods_per_year, rng
+        )
+    elif multi_asset:
+        shape = (num_paths, max_periods, len(ASSET_CLASSES))
+        normals = _standard_normals(rng, shape, params.variance_reduction, dtype)
+
+        correlation = tuple(tuple(row) for row in (params.correlation or DEFAULT_CORRELATION))
+        mus = np.array([EXPECTED_RETURNS[a] for a in ASSET_CLASSES])
+        sigmas = np.array([VOLATILITY[a] for a in ASSET_CLASSES])
+        shocks = generator.shocks(normals @ _cholesky_factor(correlation).T.astype(dtype), rng, periods_per_year)
+        asset_factors = _growth_factors(shocks, mus, sigmas, periods_per_year)
+        del normals, shocks
+    else:
+        normals = _standard_normals(rng, (num_paths, max_periods), params.variance_reduction, dtype)
+        normals = generator.shocks(normals, rng, periods_per_year)
+
+    unit = {}
+    for key, allocation in allocations.items():
+        if bootstrap or multi_asset:
+            factors = asset_factors @ (np.array(key) / 100.0)
+        else:
+            mu, sigma = compute_portfolio_parameters(dict(zip(ASSET_CLASSES, key)))
+            factors = _growth_factors(normals.copy(), mu, sigma, periods_per_year)
+
+        # Periods-major layout so the recurrence walks contiguous rows
+        factors = np.ascontiguousarray(factors.T)
+        for periods, values in _unit_values(factors, periods_needed, is_sip).items():
+            unit[(key, periods)] = values
+
+    return unit
+
+
+def iter_unit_values(
+    params: SimulationParams,
+    is_sip: bool,
+    allocations: Dict[AllocationKey, Allocation],
+    periods_needed: List[int],
+) -> Iterator[Dict[Tuple[AllocationKey, int], np.ndarray]]:
+    """
+    Unit values per (allocation key, periods), one shard of
+    params.num_simulations at a time, all on common random numbers.
+    Terminal value of any amount = amount * unit value.
+    """
+    max_periods = max(1, max(periods_needed))
+
+    # Shard so the shared draws (plus one working copy and its transpose) fit the cap
+    bootstrap = params.return_model == "bootstrap"
+    assets = len(ASSET_CLASSES) if params.model == "multi_asset" or bootstrap else 1
+    itemsize = np.dtype(_float_dtype(params)).itemsize
+    bytes_per_path = max_periods * assets * itemsize * (4 if bootstrap else 3)
+    limit_mb = params.memory_limit_mb or MAX_SHARD_MEMORY_MB
+    shard_paths = min(SHARD_PATHS, max(1, limit_mb * 1024 * 1024 // bytes_per_path))
+    full, rest = divmod(params.num_simulations, shard_paths)
+    sizes = [shard_paths] * full + ([rest] if rest else [])
+
+    for size, seed_seq in zip(sizes, np.random.SeedSequence(params.seed).spawn(len(sizes))):
+        rng = np.random.default_rng(seed_seq)
+        yield _shard_unit_values(params, is_sip, allocations, periods_needed, size, rng)
+
+
+# -------------------------------------------------------------
+# Batch Simulation Function
+# -------------------------------------------------------------
+def run_batch_simulation(payload: BatchSimulationRequest) -> BatchSimulationResponse:
+    params = payload.simulation_params
+    if params.seed is None:
+        params = params.model_copy(update={"seed": new_seed()})
+    scenarios = expand_scenarios(payload)
+
+    is_sip = payload.investment_type == "sip"
+    periods_per_year = 12 if is_sip else 1
+
+    allocations = {_allocation_key(s.allocation): s.allocation for s in scenarios}
+    periods_needed = sorted({s.duration_years * periods_per_year for s in scenarios})
+    stats = [SimulationStats(params.goal_amount) for _ in scenarios]
+
+    for unit in iter_unit_values(params, is_sip, allocations, periods_needed):
+        for scenario, scenario_stats in zip(scenarios, stats):
+            amount = scenario.monthly_amount if is_sip else scenario.lumpsum_amount
+            key = (_allocation_key(scenario.allocation), scenario.duration_years * periods_per_year)
+            scenario_stats.update((amount or 0.0) * unit[key])
+
+    results = [
+        ScenarioResult(
+            allocation=scenario.allocation,
+            monthly_amount=scenario.monthly_amount,
+            lumpsum_amount=scenario.lumpsum_amount,
+            duration_years=scenario.duration_years,
+            expected_value=s.estimate,
+            worst_case=s.percentile(0.05),
+            median=s.percentile(0.50),
+            best_case=s.percentile(0.95),
+            probability_of_goal_achievement=s.goal_probability,
+            standard_error=s.std_error,
+        )
+        for scenario, s in zip(scenarios, stats)
+    ]
+
+    return BatchSimulationResponse(paths=params.num_simulations, seed=params.seed, results=results)
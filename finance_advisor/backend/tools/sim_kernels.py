@@ -0,0 +1,213 @@
+# backend/tools/sim_kernels.py
+
+"""
+Optional Numba kernels for the path-dependent parts of the simulator:
+- drawdown / months under water (running peak per path)
+- withdrawal schedules with ruin detection (floored recurrence)
+- per-asset rebalancing (calendar / threshold, buy-and-hold twin)
+
+The NumPy versions in portfolio_sim.py step every path through time
+together and need (paths x periods) temporaries. These kernels walk one
+path at a time in compiled loops, with no temporaries, and return the
+same numbers.
+
+They are used when numba is importable (requirements.txt lists it as
+optional) unless SIMULATION_NUMBA=0. Compilation is cached on disk and
+triggered by warmup_kernels() at startup and in every pool worker, so
+no request pays for it.
+"""
+
+import os
+import time
+
+import numpy as np
+
+from ..utils.logger import get_logger
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Without numba the kernels stay plain Python (never dispatched to)."""
+        return lambda func: func
+
+
+NUMBA_ENABLED = NUMBA_AVAILABLE and os.getenv("SIMULATION_NUMBA", "1") != "0"
+
+logger = get_logger("sim-kernels")
+
+
+# -------------------------------------------------------------
+# Kernels
+# -------------------------------------------------------------
+@njit(cache=True, nogil=True)
+def _path_risk_kernel(factors, max_drawdown, under_water):
+    for i in range(factors.shape[0]):
+        index = 1.0
+        peak = 1.0
+        worst = 0.0
+        months = 0
+        for t in range(factors.shape[1]):
+            index *= factors[i, t]
+            if index > peak:
+                peak = index
+            ratio = index / peak
+            if 1.0 - ratio > worst:
+                worst = 1.0 - ratio
+            if ratio < 1.0 - 1e-12:
+                months += 1
+        max_drawdown[i] = worst
+        under_water[i] = months
+
+
+@njit(cache=True, nogil=True)
+def _withdrawals_kernel(factors, initial, flows, values, depleted):
+    for i in range(factors.shape[0]):
+        value = initial
+        ran_out = False
+        for t in range(flows.shape[0]):
+            value = value * factors[i, t] + flows[t]
+            if flows[t] < 0 and value < 0:
+                ran_out = True
+                value = 0.0
+        values[i] = value
+        depleted[i] = ran_out
+
+
+@njit(cache=True, nogil=True)
+def _rebalance_kernel(factors, weights, initial, flows, every, threshold,
+                      values, portfolio, depleted, rebalances, turnover, buy_and_hold):
+    assets = weights.shape[0]
+    holdings = np.empty(assets)
+    held = np.empty(assets)
+
+    for i in range(factors.shape[0]):
+        for a in range(assets):
+            holdings[a] = initial * weights[a]
+            held[a] = initial * weights[a]
+        previous = initial
+        ran_out = False
+        count = 0.0
+        traded = 0.0
+
+        for t in range(factors.shape[1]):
+            total = 0.0
+            target_growth = 0.0
+            for a in range(assets):
+                g = factors[i, t, a]
+                holdings[a] *= g
+                held[a] *= g
+                total += holdings[a]
+                target_growth += g * weights[a]
+            portfolio[i, t] = total / previous if previous > 0 else target_growth
+
+            flow = flows[t]
+            if flow > 0:
+                for a in range(assets):
+                    holdings[a] += flow * weights[a]
+                    held[a] += flow * weights[a]
+                total += flow
+            elif flow < 0:
+                if total + flow < 0:
+                    ran_out = True
+                held_total = 0.0
+                for a in range(assets):
+                    held_total += held[a]
+                scale = max(total + flow, 0.0) / total if total > 0 else 0.0
+                held_scale = max(held_total + flow, 0.0) / held_total if held_total > 0 else 0.0
+                total = 0.0
+                for a in range(assets):
+                    holdings[a] *= scale
+                    held[a] *= held_scale
+                    total += holdings[a]
+
+            due = every > 0 and (t + 1) % every == 0
+            if due or threshold > 0:
+                gap = 0.0
+                drifted = False
+                for a in range(assets):
+                    d = abs(holdings[a] - total * weights[a])
+                    gap += d
+                    if d > threshold * total:
+                        drifted = True
+                if (total > 0) if due else drifted:
+                    traded += gap / (2 * total)
+                    count += 1.0
+                    for a in range(assets):
+                        holdings[a] = total * weights[a]
+
+            previous = total
+
+        value = 0.0
+        held_value = 0.0
+        for a in range(assets):
+            value += holdings[a]
+            held_value += held[a]
+        values[i] = value
+        buy_and_hold[i] = held_value
+        depleted[i] = ran_out
+        rebalances[i] = count
+        turnover[i] = traded
+
+
+# -------------------------------------------------------------
+# Wrappers (same signatures / results as the NumPy versions)
+# -------------------------------------------------------------
+def path_risk(factors: np.ndarray, periods_per_year: int):
+    max_drawdown = np.empty(factors.shape[0])
+    under_water = np.empty(factors.shape[0])
+    _path_risk_kernel(np.ascontiguousarray(factors), max_drawdown, under_water)
+    under_water *= 12 // periods_per_year
+    return max_drawdown, under_water
+
+
+def evolve_with_withdrawals(factors: np.ndarray, initial: float, flows: np.ndarray):
+    values = np.empty(factors.shape[0])
+    depleted = np.empty(factors.shape[0], dtype=np.bool_)
+    _withdrawals_kernel(np.ascontiguousarray(factors), float(initial), np.array(flows, dtype=np.float64),
+                        values, depleted)
+    return values, depleted
+
+
+def simulate_rebalanced(asset_factors, weights, initial, flows, every, threshold):
+    """every / threshold: 0 = that trigger is off."""
+    num_paths, periods, _ = asset_factors.shape
+    values = np.empty(num_paths)
+    portfolio = np.empty((num_paths, periods), dtype=asset_factors.dtype)
+    depleted = np.empty(num_paths, dtype=np.bool_)
+    rebalances = np.empty(num_paths)
+    turnover = np.empty(num_paths)
+    buy_and_hold = np.empty(num_paths)
+
+    _rebalance_kernel(
+        np.ascontiguousarray(asset_factors), np.asarray(weights, dtype=np.float64), float(initial),
+        np.array(flows, dtype=np.float64), int(every), float(threshold),
+        values, portfolio, depleted, rebalances, turnover, buy_and_hold,
+    )
+    return values, portfolio, depleted, (rebalances, turnover, buy_and_hold)
+
+
+# -------------------------------------------------------------
+# Warm-up
+# -------------------------------------------------------------
+def warmup_kernels():
+    """
+    Compiles (or loads from the on-disk cache) every kernel for the
+    float64 and float32 layouts the engine produces. No-op when the
+    kernels are disabled.
+    """
+    if not NUMBA_ENABLED:
+        return
+
+    started = time.perf_counter()
+    weights = np.full(4, 0.25)
+    flows = np.array([1.0, -1.0])
+    for dtype in (np.float64, np.float32):
+        path_risk(np.ones((2, 2), dtype=dtype), 12)
+        evolve_with_withdrawals(np.ones((2, 2), dtype=dtype), 1.0, flows)
+        simulate_rebalanced(np.ones((2, 2, 4), dtype=dtype), weights, 1.0, flows, 1, 0.05)
+
+    logger.info(f"Numba simulation kernels ready in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,137 @@
+# backend/tools/simulation_cache.py
+
+"""
+Result cache for Monte Carlo simulations.
+
+Requests are keyed by a canonical hash of PortfolioSimulationRequest
+(without session_id and other fields that cannot change the numbers).
+Two tiers:
+- in-process LRU (always on, sub-millisecond hits)
+- Redis (opt-in via SIMULATION_CACHE_REDIS=1), shared across workers
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+from ..models.simulate import PortfolioSimulationRequest, PortfolioSimulationResponse
+from ..utils.cache import LRUCache
+from ..utils.logger import get_logger
+
+
+CACHE_PREFIX = "simulation_cache:"
+
+CACHE_TTL = float(os.getenv("SIMULATION_CACHE_TTL", "900"))                 # seconds
+CACHE_MAX_ENTRIES = int(os.getenv("SIMULATION_CACHE_MAX_ENTRIES", "256"))
+CACHE_MAX_VALUES = 50_000        # results carrying more raw final_values are not cached
+REDIS_ENABLED = os.getenv("SIMULATION_CACHE_REDIS", "0") == "1"
+
+# Fields that only affect how a run is executed, not its result
+_EXCLUDED_PARAMS = {"workers", "use_cache"}
+
+logger = get_logger("simulation-cache")
+
+_memory_tier = LRUCache(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL)
+_redis_counters = {"hits": 0, "misses": 0, "errors": 0}
+
+
+# -------------------------------------------------------------
+# Keys
+# -------------------------------------------------------------
+def simulation_cache_key(payload: PortfolioSimulationRequest) -> str:
+    """sha256 of the request as canonical JSON (sorted keys, no whitespace)."""
+    data = payload.model_dump(exclude={"session_id"})
+    for field in _EXCLUDED_PARAMS:
+        data["simulation_params"].pop(field, None)
+
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def seed_from_key(key: str) -> int:
+    """
+    Deterministic seed for unseeded requests, so a cache hit returns
+    exactly what recomputing the same request would have produced.
+    """
+    return int(key[:16], 16)
+
+
+# -------------------------------------------------------------
+# Lookup / Store
+# -------------------------------------------------------------
+def _redis():
+    from ..db.redis_client import redis_client
+    return redis_client
+
+
+def get_cached_simulation(key: str) -> Optional[PortfolioSimulationResponse]:
+    """A private deep copy: callers may mutate lists and nested models."""
+    cached = _memory_tier.get(key)
+    if cached is not None:
+        return cached.model_copy(deep=True)
+
+    if not REDIS_ENABLED:
+        return None
+
+    try:
+        raw = _redis().get(f"{CACHE_PREFIX}{key}")
+    except Exception as ex:
+        _redis_counters["errors"] += 1
+        logger.warning(f"Redis simulation cache unavailable: {ex}")
+        return None
+
+    if raw is None:
+        _redis_counters["misses"] += 1
+        return None
+
+    _redis_counters["hits"] += 1
+    result = PortfolioSimulationResponse.model_validate_json(raw)
+    _memory_tier.set(key, result)        # promote to the in-process tier
+    return result.model_copy(deep=True)
+
+
+def set_cached_simulation(key: str, result: PortfolioSimulationResponse):
+    if result.final_values is not None and len(result.final_values) > CACHE_MAX_VALUES:
+        return
+
+    _memory_tier.set(key, result.model_copy(deep=True))     # the caller keeps `result`
+
+    if not REDIS_ENABLED:
+        return
+
+    try:
+        _redis().setex(f"{CACHE_PREFIX}{key}", int(CACHE_TTL), result.model_dump_json())
+    except Exception as ex:
+        _redis_counters["errors"] += 1
+        logger.warning(f"Redis simulation cache unavailable: {ex}")
+
+
+def clear_simulation_cache() -> Dict[str, Optional[int]]:
+    """
+    Empties both tiers. Returns the entries dropped per tier; "redis" is
+    None when Redis is enabled but could not be cleared.
+    """
+    cleared: Dict[str, Optional[int]] = {"memory": _memory_tier.stats()["entries"], "redis": 0}
+    _memory_tier.clear()
+
+    if not REDIS_ENABLED:
+        return cleared
+
+    try:
+        redis = _redis()
+        keys = list(redis.scan_iter(match=f"{CACHE_PREFIX}*", count=500))
+        for start in range(0, len(keys), 500):
+            cleared["redis"] += redis.delete(*keys[start:start + 500])
+    except Exception as ex:
+        _redis_counters["errors"] += 1
+        logger.warning(f"Redis simulation cache unavailable: {ex}")
+        cleared["redis"] = None
+    return cleared
+
+
+def simulation_cache_stats() -> Dict[str, Any]:
+    return {
+        "memory": _memory_tier.stats(),
+        "redis": {"enabled": REDIS_ENABLED, **_redis_counters},
+    }
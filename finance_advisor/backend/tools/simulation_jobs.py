@@ -0,0 +1,168 @@
+# backend/tools/simulation_jobs.py
+
+"""
+Background job queue for Monte Carlo simulations.
+
+Long runs are submitted as jobs and polled instead of holding an HTTP
+request (and a threadpool slot) open for the whole simulation:
+- jobs run on a small thread pool; each job can still fan out to the
+  process pool through simulation_params.workers
+- progress is updated after every completed shard / adaptive batch
+- cancellation takes effect at the next shard boundary
+- at most SIMULATION_JOB_MAX_PENDING jobs may be queued or running;
+  further submissions are rejected (JobQueueFullException)
+- finished jobs are kept for SIMULATION_JOB_TTL seconds
+"""
+
+import os
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Dict, Optional
+
+from ..models.simulate import PortfolioSimulationRequest, SimulationJobStatus
+from ..utils.exceptions import AdvisorException
+from ..utils.logger import get_logger
+from .portfolio_sim import run_monte_carlo_simulation
+
+
+JOB_WORKERS = int(os.getenv("SIMULATION_JOB_WORKERS", "2"))
+JOB_MAX_PENDING = int(os.getenv("SIMULATION_JOB_MAX_PENDING", "32"))
+JOB_TTL = float(os.getenv("SIMULATION_JOB_TTL", "3600"))          # seconds after finishing
+
+FINISHED = {"completed", "failed", "cancelled"}
+
+logger = get_logger("simulation-jobs")
+
+
+class JobQueueFullException(AdvisorException):
+    """Raised when too many simulation jobs are already queued or running."""
+    pass
+
+
+class JobCancelledException(AdvisorException):
+    """Raised inside a running job to stop it at the next shard boundary."""
+    pass
+
+
+class _Job:
+    def __init__(self, job_id: str, payload: PortfolioSimulationRequest):
+        self.status = SimulationJobStatus(job_id=job_id, status="queued", created_at=time.time())
+        self.payload = payload
+        self.cancel_requested = False
+        self.future: Optional[Future] = None
+
+
+# -------------------------------------------------------------
+# Job Manager (in-process)
+# -------------------------------------------------------------
+class SimulationJobManager:
+
+    def __init__(self, workers: int = JOB_WORKERS, max_pending: int = JOB_MAX_PENDING, ttl: float = JOB_TTL):
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="simulation-job")
+        self._jobs: Dict[str, _Job] = {}
+        self._lock = Lock()
+
+    # -----------------------------------------------------
+    # Public API
+    # -----------------------------------------------------
+    def submit(self, payload: PortfolioSimulationRequest) -> SimulationJobStatus:
+        with self._lock:
+            self._purge_expired()
+
+            pending = sum(1 for job in self._jobs.values() if job.status.status not in FINISHED)
+            if pending >= self.max_pending:
+                raise JobQueueFullException(f"{pending} simulation jobs already pending; retry later.")
+
+            job = _Job(uuid.uuid4().hex, payload)
+            self._jobs[job.status.job_id] = job
+            job.future = self._executor.submit(self._run, job)
+            return job.status.model_copy()
+
+    def get(self, job_id: str) -> Optional[SimulationJobStatus]:
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(job_id)
+            return job.status.model_copy() if job else None
+
+    def cancel(self, job_id: str) -> Optional[SimulationJobStatus]:
+        """
+        Queued jobs are dropped at once; running jobs stop after their
+        current shard. Finished jobs are returned unchanged.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+
+            if job.status.status not in FINISHED:
+                job.cancel_requested = True
+                if job.future.cancel():          # never started
+                    self._finish(job, "cancelled")
+            return job.status.model_copy()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {state: 0 for state in ("queued", "running", "completed", "failed", "cancelled")}
+            for job in self._jobs.values():
+                counts[job.status.status] += 1
+            return counts
+
+    # -----------------------------------------------------
+    # Worker side
+    # -----------------------------------------------------
+    def _run(self, job: _Job):
+        total = job.payload.simulation_params.num_simulations
+
+        def progress(paths: int):
+            with self._lock:
+                if job.cancel_requested:
+                    raise JobCancelledException("Job cancelled.")
+                job.status.paths_completed += paths
+                job.status.progress = min(1.0, job.status.paths_completed / total)
+
+        with self._lock:
+            if job.cancel_requested:
+                self._finish(job, "cancelled")
+                return
+            job.status.status = "running"
+            job.status.started_at = time.time()
+
+        try:
+            result = run_monte_carlo_simulation(job.payload, progress=progress)
+        except JobCancelledException:
+            with self._lock:
+                self._finish(job, "cancelled")
+            return
+        except Exception as ex:
+            logger.error(f"Simulation job {job.status.job_id} failed: {ex}")
+            with self._lock:
+                job.status.error = str(ex)
+                self._finish(job, "failed")
+            return
+
+        with self._lock:
+            job.status.result = result
+            job.status.paths_completed = result.paths_used
+            job.status.progress = 1.0
+            self._finish(job, "completed")
+
+    def _finish(self, job: _Job, state: str):
+        job.status.status = state
+        job.status.finished_at = time.time()
+        job.payload = None                       # only the result is retained
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status.finished_at is not None and job.status.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+simulation_jobs = SimulationJobManager()
@@ -0,0 +1,434 @@
+# backend/tools/simulation_stats.py
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# -------------------------------------------------------------
+# Quantile Sketch
+# -------------------------------------------------------------
+class _BucketStore:
+    """Dense bucket counts for a contiguous range of integer keys."""
+
+    def __init__(self):
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def _extend(self, lo: int, hi: int):
+        """Make sure keys lo..hi fit, keeping existing counts in place."""
+        if self.counts.size == 0:
+            self.offset = lo
+            self.counts = np.zeros(hi - lo + 1, dtype=np.int64)
+            return
+
+        new_lo = min(lo, self.offset)
+        new_hi = max(hi, self.offset + self.counts.size - 1)
+        if new_lo == self.offset and new_hi == self.offset + self.counts.size - 1:
+            return
+
+        counts = np.zeros(new_hi - new_lo + 1, dtype=np.int64)
+        start = self.offset - new_lo
+        counts[start:start + self.counts.size] = self.counts
+        self.offset, self.counts = new_lo, counts
+
+    def add(self, keys: np.ndarray):
+        if keys.size == 0:
+            return
+        lo, hi = int(keys.min()), int(keys.max())
+        self._extend(lo, hi)
+        self.counts[lo - self.offset:hi - self.offset + 1] += np.bincount(keys - lo, minlength=hi - lo + 1)
+
+    def merge(self, other: "_BucketStore"):
+        if other.counts.size == 0:
+            return
+        self._extend(other.offset, other.offset + other.counts.size - 1)
+        start = other.offset - self.offset
+        self.counts[start:start + other.counts.size] += other.counts
+
+    def keys(self) -> np.ndarray:
+        return np.arange(self.offset, self.offset + self.counts.size)
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative-error guarantees (DDSketch).
+
+    Values are counted in logarithmic buckets of width `gamma`, so any
+    quantile comes back within `relative_accuracy` of the true value,
+    while memory depends only on the value range, not on the path count.
+    Two sketches with the same accuracy merge by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.005):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+
+        self._positive = _BucketStore()
+        self._negative = _BucketStore()     # buckets of |x| for x < 0
+        self.zero_count = 0
+
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    # -----------------------------------------------------
+    # Accumulate
+    # -----------------------------------------------------
+    def _keys(self, values: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(values) / self._log_gamma).astype(np.int64)
+
+    def add(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 0:
+            return
+
+        positive = values[values > 0]
+        negative = values[values < 0]
+
+        self._positive.add(self._keys(positive))
+        self._negative.add(self._keys(-negative))
+        self.zero_count += values.size - positive.size - negative.size
+
+        self.count += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other: "QuantileSketch"):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy.")
+
+        self._positive.merge(other._positive)
+        self._negative.merge(other._negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    # -----------------------------------------------------
+    # Read out
+    # -----------------------------------------------------
+    def _buckets(self):
+        """(representative values, counts) in ascending value order."""
+        def value(keys):
+            return 2.0 * self.gamma ** keys / (self.gamma + 1.0)
+
+        neg_keys = self._negative.keys()[::-1]
+        pos_keys = self._positive.keys()
+
+        values = np.concatenate([-value(neg_keys), [0.0], value(pos_keys)])
+        counts = np.concatenate([self._negative.counts[::-1], [self.zero_count], self._positive.counts])
+        return values, counts
+
+    def quantile(self, q: float) -> float:
+        """
+        Value at rank int(q * (count - 1)), the same index rule the
+        simulator used on its sorted array, clamped to the seen range.
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = int(q * (self.count - 1))
+        values, counts = self._buckets()
+        idx = int(np.searchsorted(np.cumsum(counts), rank, side="right"))
+        return float(min(max(values[idx], self.min), self.max))
+
+    def survival(self, thresholds) -> np.ndarray:
+        """Share of values >= each threshold (1 - CDF), at bucket resolution."""
+        thresholds = np.asarray(thresholds, dtype=float)
+        if self.count == 0:
+            return np.zeros(thresholds.shape)
+
+        values, counts = self._buckets()
+        values = np.clip(values, self.min, self.max)
+        at_or_above = np.concatenate([np.cumsum(counts[::-1])[::-1], [0]])
+        return at_or_above[np.searchsorted(values, thresholds, side="left")] / self.count
+
+    def tail_mean(self, q: float) -> float:
+        """
+        Mean of the lowest q share of values (CVaR / expected shortfall),
+        counting the boundary bucket pro rata.
+        """
+        if self.count == 0:
+            return 0.0
+
+        values, counts = self._buckets()
+        values = np.clip(values, self.min, self.max)
+        tail = max(q * self.count, 1.0)
+
+        # Take whole buckets until the tail is filled, then part of the next
+        taken = np.minimum(counts, np.maximum(tail - (np.cumsum(counts) - counts), 0.0))
+        return float(values @ taken / taken.sum())
+
+    def histogram(self, bins: int = 50) -> Dict[str, List[float]]:
+        """
+        Equal-width histogram over [min, max], built from bucket counts.
+        Chart-ready: `bin_edges` has bins + 1 entries, `counts` has bins.
+        """
+        if self.count == 0:
+            return {"bin_edges": [], "counts": []}
+
+        values, counts = self._buckets()
+        keep = counts > 0
+        lo = self.min
+        hi = self.max if self.max > self.min else self.min + 1.0
+
+        hist, edges = np.histogram(
+            np.clip(values[keep], lo, hi), bins=bins, range=(lo, hi), weights=counts[keep]
+        )
+        return {"bin_edges": edges.tolist(), "counts": hist.astype(int).tolist()}
+
+
+# -------------------------------------------------------------
+# Path Risk Statistics
+# -------------------------------------------------------------
+class PathRiskStats:
+    """
+    Mergeable distributions of per-path maximum drawdown (fraction of
+    the running peak) and months spent below a previous peak.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.drawdown_sum = 0.0
+        self.underwater_sum = 0.0
+        self.drawdown = QuantileSketch()
+        self.underwater = QuantileSketch()
+
+    def update(self, max_drawdown: np.ndarray, months_under_water: np.ndarray):
+        self.count += max_drawdown.size
+        self.drawdown_sum += float(max_drawdown.sum())
+        self.underwater_sum += float(months_under_water.sum())
+        self.drawdown.add(max_drawdown)
+        self.underwater.add(months_under_water)
+
+    def merge(self, other: "PathRiskStats"):
+        self.count += other.count
+        self.drawdown_sum += other.drawdown_sum
+        self.underwater_sum += other.underwater_sum
+        self.drawdown.merge(other.drawdown)
+        self.underwater.merge(other.underwater)
+
+    @property
+    def mean_drawdown(self) -> float:
+        return self.drawdown_sum / self.count if self.count else 0.0
+
+    @property
+    def mean_underwater(self) -> float:
+        return self.underwater_sum / self.count if self.count else 0.0
+
+
+# -------------------------------------------------------------
+# Rebalancing Statistics
+# -------------------------------------------------------------
+class RebalancingStats:
+    """Mergeable sums for comparing a rebalanced run with buy-and-hold on the same paths."""
+
+    def __init__(self):
+        self.count = 0
+        self.rebalances = 0.0
+        self.turnover = 0.0
+        self.buy_and_hold_sum = 0.0
+        self.excess_sum = 0.0
+        self.wins = 0
+
+    def update(self, values: np.ndarray, rebalances: np.ndarray, turnover: np.ndarray, buy_and_hold: np.ndarray):
+        self.count += values.size
+        self.rebalances += float(rebalances.sum())
+        self.turnover += float(turnover.sum())
+        self.buy_and_hold_sum += float(buy_and_hold.sum())
+        self.excess_sum += float((values - buy_and_hold).sum())
+        self.wins += int(np.count_nonzero(values > buy_and_hold))
+
+    def merge(self, other: "RebalancingStats"):
+        self.count += other.count
+        self.rebalances += other.rebalances
+        self.turnover += other.turnover
+        self.buy_and_hold_sum += other.buy_and_hold_sum
+        self.excess_sum += other.excess_sum
+        self.wins += other.wins
+
+
+# -------------------------------------------------------------
+# Simulation Statistics
+# -------------------------------------------------------------
+class SimulationStats:
+    """
+    Mergeable summary of simulated terminal values.
+
+    Each shard / batch of paths fills its own instance with update(),
+    and instances are combined with merge() — so results can be built
+    up incrementally without a single process seeing every path at once.
+
+    Mean and variance are tracked with Chan's parallel algorithm, which
+    stays numerically stable when merging many partial results.
+    Percentiles come from a QuantileSketch; raw values are only kept
+    when `keep_values` is set.
+
+    Optionally a control variate (per-path values with a known mean,
+    `control_expectation`) is tracked alongside, and `estimate` returns
+    the regression-adjusted mean, and per-path drawdown figures go
+    into `path_risk`.
+    """
+
+    def __init__(self, goal_amount: float, keep_values: bool = False):
+        self.goal_amount = goal_amount
+        self.keep_values = keep_values
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0                      # sum of squared deviations
+        self.goal_hits = 0
+        self.sketch = QuantileSketch()
+        self._chunks: List[np.ndarray] = []
+        self.path_risk = PathRiskStats()
+        self.depleted: Optional[int] = None  # paths that ran out of money, if tracked
+        self.rebalancing: Optional[RebalancingStats] = None
+
+        # Control variate
+        self.control_expectation: Optional[float] = None
+        self.control_mean = 0.0
+        self._control_m2 = 0.0
+        self._comoment = 0.0                # sum of (x - mean) * (c - control_mean)
+
+    # -----------------------------------------------------
+    # Accumulate
+    # -----------------------------------------------------
+    def update(
+        self,
+        values: np.ndarray,
+        control: Optional[np.ndarray] = None,
+        path_risk: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        depleted: Optional[np.ndarray] = None,
+        rebalancing: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+    ):
+        """
+        `path_risk` is (max drawdown, months under water) per path,
+        `depleted` flags paths whose withdrawals emptied the corpus and
+        `rebalancing` is (rebalances, turnover, buy-and-hold value) per path.
+        """
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+
+        batch = SimulationStats(self.goal_amount, self.keep_values)
+        batch.count = values.size
+        batch.mean = float(values.mean())
+        deviations = values - batch.mean
+        batch._m2 = float(deviations @ deviations)
+        batch.goal_hits = int(np.count_nonzero(values >= self.goal_amount))
+        batch.sketch.add(values)
+        if self.keep_values:
+            batch._chunks = [values]
+
+        if control is not None:
+            batch.control_mean = float(control.mean())
+            control_deviations = control - batch.control_mean
+            batch._control_m2 = float(control_deviations @ control_deviations)
+            batch._comoment = float(deviations @ control_deviations)
+
+        if path_risk is not None:
+            batch.path_risk.update(*path_risk)
+        if depleted is not None:
+            batch.depleted = int(np.count_nonzero(depleted))
+        if rebalancing is not None:
+            batch.rebalancing = RebalancingStats()
+            batch.rebalancing.update(values, *rebalancing)
+
+        self.merge(batch)
+
+    def merge(self, other: "SimulationStats"):
+        if other.count == 0:
+            return
+
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        control_delta = other.control_mean - self.control_mean
+        weight = self.count * other.count / total
+
+        self.mean += delta * other.count / total
+        self._m2 += other._m2 + delta * delta * weight
+        self.control_mean += control_delta * other.count / total
+        self._control_m2 += other._control_m2 + control_delta * control_delta * weight
+        self._comoment += other._comoment + delta * control_delta * weight
+
+        self.count = total
+        self.goal_hits += other.goal_hits
+        self.sketch.merge(other.sketch)
+        self._chunks.extend(other._chunks)
+        self.path_risk.merge(other.path_risk)
+        if other.depleted is not None:
+            self.depleted = (self.depleted or 0) + other.depleted
+        if other.rebalancing is not None:
+            if self.rebalancing is None:
+                self.rebalancing = RebalancingStats()
+            self.rebalancing.merge(other.rebalancing)
+
+    # -----------------------------------------------------
+    # Read out
+    # -----------------------------------------------------
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def _uses_control(self) -> bool:
+        return self.control_expectation is not None and self._control_m2 > 0
+
+    @property
+    def estimate(self) -> float:
+        """Expected terminal value, control-variate adjusted when available."""
+        if not self._uses_control:
+            return self.mean
+        beta = self._comoment / self._control_m2
+        return self.mean - beta * (self.control_mean - self.control_expectation)
+
+    @property
+    def std_error(self) -> float:
+        """
+        Standard error of `estimate`. Assumes independent paths, so it is
+        conservative for antithetic pairs and Sobol draws.
+        """
+        if self.count < 2:
+            return 0.0
+        variance = self.variance
+        if self._uses_control:
+            rho2 = self._comoment ** 2 / (self._m2 * self._control_m2) if self._m2 > 0 else 0.0
+            variance *= max(0.0, 1.0 - rho2)
+        return math.sqrt(variance / self.count)
+
+    @property
+    def goal_probability(self) -> float:
+        return self.goal_hits / self.count if self.count else 0.0
+
+    @property
+    def probability_std_error(self) -> float:
+        """
+        Standard error of goal_probability. Uses the (hits + 1) / (n + 2)
+        estimate so that 0 or 100% after a few paths is not taken as exact.
+        """
+        if self.count == 0:
+            return 0.0
+        p = (self.goal_hits + 1) / (self.count + 2)
+        return math.sqrt(p * (1 - p) / self.count)
+
+    @property
+    def depletion_probability(self) -> Optional[float]:
+        if self.depleted is None or self.count == 0:
+            return None
+        return self.depleted / self.count
+
+    def percentile(self, q: float) -> float:
+        """q in [0, 1]."""
+        return self.sketch.quantile(q)
+
+    def sorted_values(self) -> Optional[np.ndarray]:
+        """All values, ascending — only available with keep_values."""
+        if not self.keep_values:
+            return None
+        if len(self._chunks) != 1:
+            self._chunks = [np.concatenate(self._chunks) if self._chunks else np.empty(0)]
+        values = self._chunks[0]
+        values.sort()
+        return values
@@ -0,0 +1,158 @@
+# backend/tools/stress_replay.py
+
+"""
+Historical stress-scenario replay.
+
+"What would 2008 have done to this portfolio?" The stored monthly
+returns per asset class of a few market episodes
+(data/stress_scenarios/historical.json) are replayed against an
+allocation and its cashflows:
+- the scenario's months start at `shock_month` of the horizon
+- every other month grows at the expected returns (EXPECTED_RETURNS)
+- contributions / withdrawals follow the investment as in the simulator
+  (end of month, floored at zero)
+
+All scenarios, plus the unstressed baseline, are evaluated together as
+rows of one (scenarios x months) return matrix.
+"""
+
+import json
+import os
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+from ..models.simulate import StressScenarioResult, StressTestRequest, StressTestResponse
+from ..utils.exceptions import SimulationException
+from .portfolio_sim import ASSET_CLASSES, EXPECTED_RETURNS, _cashflow_vector
+
+
+STRESS_FILE = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "..", "data", "stress_scenarios", "historical.json"
+))
+
+
+# -------------------------------------------------------------
+# Scenario Library
+# -------------------------------------------------------------
+class StressLibrary:
+    """
+    returns: (scenarios, longest, assets) monthly returns, zero-padded
+    months:  (scenarios,) length of each scenario
+    """
+
+    def __init__(self, ids: List[str], meta: List[dict], returns: np.ndarray, months: np.ndarray):
+        self.ids = ids
+        self.meta = meta
+        self.returns = returns
+        self.months = months
+
+        for array in (returns, months):
+            array.setflags(write=False)      # shared between requests
+
+    def select(self, scenario_ids: Optional[List[str]]) -> List[int]:
+        if scenario_ids is None:
+            return list(range(len(self.ids)))
+
+        unknown = [s for s in scenario_ids if s not in self.ids]
+        if unknown:
+            raise SimulationException(f"Unknown stress scenarios: {', '.join(unknown)}")
+        return [self.ids.index(s) for s in scenario_ids]
+
+
+@lru_cache(maxsize=1)
+def load_stress_library(path: str = STRESS_FILE) -> StressLibrary:
+    with open(path, encoding="utf-8") as f:
+        scenarios = json.load(f)["scenarios"]
+
+    longest = max(len(s["monthly_returns_pct"]["equity"]) for s in scenarios.values())
+    returns = np.zeros((len(scenarios), longest, len(ASSET_CLASSES)))
+    months = np.zeros(len(scenarios), dtype=int)
+
+    for i, scenario in enumerate(scenarios.values()):
+        series = scenario["monthly_returns_pct"]
+        months[i] = len(series["equity"])
+        for a, asset in enumerate(ASSET_CLASSES):
+            if len(series[asset]) != months[i]:
+                raise SimulationException(f"Stress scenario {list(scenarios)[i]} has uneven {asset} returns.")
+            returns[i, :months[i], a] = np.array(series[asset]) / 100.0
+
+    meta = [
+        {"name": s["name"], "description": s.get("description", ""), "start": s["start"]}
+        for s in scenarios.values()
+    ]
+    return StressLibrary(list(scenarios), meta, returns, months)
+
+
+# -------------------------------------------------------------
+# Replay
+# -------------------------------------------------------------
+def run_stress_test(payload: StressTestRequest) -> StressTestResponse:
+    investment = payload.investment
+    horizon = investment.duration_years * 12
+    shock = payload.shock_month
+    if shock >= horizon:
+        raise SimulationException("shock_month must fall inside the investment horizon.")
+
+    library = load_stress_library()
+    chosen = library.select(payload.scenario_ids)
+    weights = np.array([(getattr(payload.allocation, a) or 0.0) / 100.0 for a in ASSET_CLASSES])
+
+    # Row 0 is the baseline: expected monthly returns, rebalanced monthly
+    expected = np.array([(1 + EXPECTED_RETURNS[a]) ** (1 / 12) - 1 for a in ASSET_CLASSES])
+    returns = np.full((len(chosen) + 1, horizon), float(expected @ weights))
+
+    asset_returns = library.returns[chosen]                      # (scenarios, longest, assets)
+    applied = np.minimum(library.months[chosen], horizon - shock)
+    offsets = np.arange(asset_returns.shape[1])
+    inside = offsets[None, :] < applied[:, None]
+    rows, cols = np.nonzero(inside)
+    returns[rows + 1, shock + cols] = (asset_returns @ weights)[rows, cols]
+
+    # Values with cashflows, all scenarios stepped together
+    initial, flows = _cashflow_vector(investment, horizon)
+    values = np.empty((len(returns), horizon + 1))
+    values[:, 0] = initial
+    for t in range(horizon):
+        values[:, t + 1] = np.maximum(values[:, t] * (1 + returns[:, t]) + flows[t], 0.0)
+
+    # Unit value from the shock on (returns only)
+    unit = np.cumprod(1 + returns[1:, shock:], axis=1)
+    baseline_terminal = float(values[0, -1])
+
+    results = []
+    for row, (i, months) in enumerate(zip(chosen, applied)):
+        window = unit[row, :months]
+        peaks = np.maximum.accumulate(np.maximum(window, 1.0))
+
+        recovery = 0
+        if window.min() < 1.0:
+            trough = int(np.argmin(window))
+            back = np.flatnonzero(unit[row, trough:] >= 1.0)
+            recovery = int(trough + back[0] + 1) if back.size else None
+
+        path = values[row + 1]
+        results.append(StressScenarioResult(
+            scenario_id=library.ids[i],
+            **library.meta[i],
+            months_applied=int(months),
+            asset_returns={
+                a: float(np.prod(1 + asset_returns[row, :months, k]) - 1) for k, a in enumerate(ASSET_CLASSES)
+            },
+            portfolio_return=float(window[-1] - 1),
+            max_drawdown=float((1 - window / peaks).max()),
+            worst_month=float(returns[row + 1, shock:shock + months].min()),
+            recovery_months=recovery,
+            value_before=float(path[shock]),
+            trough_value=float(path[shock + 1:shock + months + 1].min()),
+            value_after=float(path[shock + months]),
+            terminal_value=float(path[-1]),
+            terminal_shortfall=baseline_terminal - float(path[-1]),
+        ))
+
+    return StressTestResponse(
+        shock_month=shock,
+        baseline_terminal_value=baseline_terminal,
+        results=results,
+    )
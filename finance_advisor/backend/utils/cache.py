@@ -1,5 +1,6 @@
 # backend/utils/cache.py
 
+from collections import OrderedDict
 from typing import Any, Dict
 from threading import Lock
 import time
@@ -38,6 +39,49 @@ class SimpleCache:
             self._expiry[key] = time.time() + ttl
 
 
+class LRUCache:
+    """
+    Bounded in-memory cache: least-recently-used eviction once
+    `max_entries` is reached, per-entry TTL, and hit/miss counters.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._store: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self._store[key]     # expired
+                self.misses += 1
+                return None
+
+            self._store.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        with self._lock:
+            self._store[key] = (time.time() + (ttl or self.ttl), value)
+            self._store.move_to_end(key)
+            while len(self._store) > self.max_entries:
+                self._store.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._store), "hits": self.hits, "misses": self.misses}
+
+
 # ------------------------------------------------------
 # Global cache instance
 # ------------------------------------------------------
@@ -0,0 +1,200 @@
+# evaluation/rag_benchmark.py
+
+"""
+RAG Index Benchmark
+-------------------
+
+Recall@k and per-query latency of the approximate search indexes
+(HNSW, IVF-PQ; backend/rag/ann_index.py) against the exact flat index
+they are derived from.
+
+The corpus is synthetic, clustered unit vectors of embedding size, so
+the benchmark runs without Azure and at any size. Pass --real to use
+the vectors of data/rag_index/index.faiss instead (queries are then
+perturbed copies of stored vectors).
+
+--memory instead measures what each of N worker processes holds once
+the index and metadata are loaded: heap copies (faiss.read_index +
+meta.pkl) against the shared mappings the VectorStore now uses
+(read_index_shared + meta.bin). RSS counts shared pages in every
+process; PSS splits them between the processes mapping them.
+
+Run from the finance_advisor/ folder:
+    python -m evaluation.rag_benchmark [num_vectors] [--real]
+    python -m evaluation.rag_benchmark [num_vectors] --memory [workers]
+"""
+
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from backend.rag import ann_index
+from backend.rag.meta_store import MappedMeta, write_meta
+
+
+DIM = 1536
+NUM_VECTORS = 100_000
+NUM_QUERIES = 200
+TOP_K = 10
+NUM_CLUSTERS = 256              # topics in the synthetic corpus
+
+HNSW_EF_SEARCH = (16, 64, 256)
+IVF_NPROBE = (4, 16, 64)
+
+
+def synthetic_corpus(num_vectors: int, dim: int = DIM, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((NUM_CLUSTERS, dim)).astype("float32")
+    labels = rng.integers(0, NUM_CLUSTERS, size=num_vectors + NUM_QUERIES)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((len(labels), dim)).astype("float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors[:num_vectors], vectors[num_vectors:]
+
+
+def real_corpus(seed: int = 0):
+    from backend.rag.vector_store import INDEX_FILE
+
+    _, vectors = ann_index.index_vectors(faiss.read_index(INDEX_FILE))
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(vectors), size=NUM_QUERIES)
+    queries = vectors[picks] + 0.01 * rng.standard_normal((NUM_QUERIES, vectors.shape[1])).astype("float32")
+    return np.ascontiguousarray(vectors), queries
+
+
+def exact_index(vectors: np.ndarray):
+    index = faiss.IndexIDMap2(faiss.IndexFlatL2(vectors.shape[1]))
+    index.add_with_ids(vectors, np.arange(len(vectors), dtype="int64"))
+    return index
+
+
+def query_latency(index, queries: np.ndarray):
+    """(mean ms per single query, ids of the top-k per query)."""
+    found = np.empty((len(queries), TOP_K), dtype="int64")
+    started = time.perf_counter()
+    for i, q in enumerate(queries):
+        found[i] = index.search(q[None, :], TOP_K)[1][0]
+    return (time.perf_counter() - started) / len(queries) * 1e3, found
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(t)) / TOP_K for f, t in zip(found, truth)]))
+
+
+def bench_indexes(vectors: np.ndarray, queries: np.ndarray):
+    flat = exact_index(vectors)
+    flat_ms, truth = query_latency(flat, queries)
+    mb = vectors.nbytes / 2**20
+
+    print(f"\n== {len(vectors):,} vectors x {vectors.shape[1]} dims, {len(queries)} queries, recall@{TOP_K} ==")
+    print(f"{'index':>8} {'setting':>14} {'build (s)':>10} {'ms/query':>9} {'speedup':>8} {'recall':>7}")
+    print(f"{'flat':>8} {'-':>14} {0.0:>10.2f} {flat_ms:>9.3f} {1.0:>7.1f}x {1.0:>7.3f}   ({mb:.0f} MB)")
+
+    for index_type, knob, settings in (("hnsw", "ef_search", HNSW_EF_SEARCH), ("ivfpq", "nprobe", IVF_NPROBE)):
+        started = time.perf_counter()
+        index, params = ann_index.build_search_index(flat, index_type, min_vectors=0)
+        build = time.perf_counter() - started
+
+        for value in settings:
+            ann_index.configure(index, {**params, knob: value})
+            ms, found = query_latency(index, queries)
+            print(f"{index_type:>8} {f'{knob}={value}':>14} {build:>10.2f} {ms:>9.3f} "
+                  f"{flat_ms / ms:>7.1f}x {recall(found, truth):>7.3f}")
+
+
+# -------------------------------------------------------------------
+# Worker memory: heap copies vs shared mappings
+# -------------------------------------------------------------------
+def memory_mb() -> dict:
+    """Rss / Pss / private (unshared) memory of this process, in MB (Linux)."""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "private": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def _memory_worker(mode, index_file, meta_file, queries, results, done):
+    before = memory_mb()
+    started = time.perf_counter()
+    if mode == "heap":
+        index = faiss.read_index(index_file)
+        with open(meta_file, "rb") as f:
+            meta = pickle.load(f)
+    else:
+        index = ann_index.read_index_shared(index_file)
+        meta = MappedMeta(meta_file)
+    load = time.perf_counter() - started
+
+    # Serve a few queries so mapped pages are actually touched
+    ids = index.search(queries, TOP_K)[1]
+    assert all(meta.get(int(i)) is not None for i in ids.ravel() if i >= 0)
+
+    results.put((before, memory_mb(), load))
+    done.wait()          # stay alive until every worker has measured
+
+
+def bench_worker_memory(vectors: np.ndarray, queries: np.ndarray, workers: int = 4):
+    meta = {i: {"text": f"chunk {i} " + "lorem ipsum " * 60, "source": f"docs/file_{i % 500}.txt"}
+            for i in range(len(vectors))}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index_file = os.path.join(tmp, "index.faiss")
+        faiss.write_index(exact_index(vectors), index_file)
+        with open(os.path.join(tmp, "meta.pkl"), "wb") as f:
+            pickle.dump(meta, f)
+        write_meta(os.path.join(tmp, "meta.bin"), meta)
+
+        print(f"\n== {workers} workers, {len(vectors):,} vectors ({vectors.nbytes / 2**20:.0f} MB) ==")
+        print(f"{'mode':>7} {'load (s)':>9} {'RSS before':>11} {'RSS after':>10} {'PSS after':>10} "
+              f"{'private':>8}   (MB per worker, mean)")
+
+        ctx = multiprocessing.get_context("spawn")
+        for mode, meta_name in (("heap", "meta.pkl"), ("mmap", "meta.bin")):
+            results, done = ctx.Queue(), ctx.Event()
+            procs = [
+                ctx.Process(target=_memory_worker,
+                            args=(mode, index_file, os.path.join(tmp, meta_name), queries, results, done))
+                for _ in range(workers)
+            ]
+            for p in procs:
+                p.start()
+            measured = [results.get() for _ in procs]
+            done.set()
+            for p in procs:
+                p.join()
+
+            before = np.mean([m[0]["rss"] for m in measured])
+            after = {k: np.mean([m[1][k] for m in measured]) for k in ("rss", "pss", "private")}
+            load = np.mean([m[2] for m in measured])
+            print(f"{mode:>7} {load:>9.3f} {before:>11.0f} {after['rss']:>10.0f} {after['pss']:>10.0f} "
+                  f"{after['private']:>8.0f}")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if "--memory" in sys.argv:
+        corpus, queries = synthetic_corpus(int(args[0]) if args else 50_000)
+        bench_worker_memory(corpus, queries[:20], workers=int(args[1]) if len(args) > 1 else 4)
+        sys.exit()
+
+    if "--real" in sys.argv:
+        corpus, queries = real_corpus()
+    else:
+        corpus, queries = synthetic_corpus(int(args[0]) if args else NUM_VECTORS)
+
+    # Search-time env overrides would hide the sweep
+    for name in ("RAG_HNSW_EF_SEARCH", "RAG_IVF_NPROBE"):
+        os.environ.pop(name, None)
+    bench_indexes(corpus, queries)
@@ -0,0 +1,340 @@
+# evaluation/simulation_benchmark.py
+
+"""
+Monte Carlo Engine Benchmark
+----------------------------
+
+Times the pure-Python reference engine against the vectorized NumPy
+engine for a 30-year SIP at increasing path counts.
+
+Run from the finance_advisor/ folder:
+    python -m evaluation.simulation_benchmark
+"""
+
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+from backend.tools import sim_kernels
+from backend.tools.efficient_frontier import build_frontier, get_frontier
+from backend.tools.portfolio_engine import build_portfolio
+from backend.tools.portfolio_sim import run_monte_carlo_simulation
+from backend.tools.scenario_sim import run_batch_simulation
+from backend.models.simulate import (
+    PortfolioSimulationRequest,
+    CashflowSchedule,
+    BatchSimulationRequest,
+    ScenarioGrid,
+    Allocation,
+    InvestmentDetails,
+    RebalancingPolicy,
+    ReturnDistribution,
+    SimulationParams,
+)
+
+
+PATH_COUNTS = [1_000, 10_000, 100_000]
+
+
+def make_request(num_simulations: int, **params) -> PortfolioSimulationRequest:
+    # Cache off unless asked for, otherwise repeats would measure cache hits
+    params.setdefault("use_cache", False)
+    return PortfolioSimulationRequest(
+        session_id="benchmark",
+        allocation=Allocation(equity=50, debt=30, gold=10, other=10),
+        investment=InvestmentDetails(type="sip", monthly_amount=10_000, duration_years=30),
+        simulation_params=SimulationParams(num_simulations=num_simulations, **params),
+    )
+
+
+def time_run(request: PortfolioSimulationRequest, repeats: int = 1) -> float:
+    """Best-of-N wall clock time in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run_monte_carlo_simulation(request)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# -------------------------------------------------------------------
+# Reference vs Vectorized
+# -------------------------------------------------------------------
+def bench_engines():
+    print("\n== Reference vs vectorized engine (30y SIP) ==")
+    print(f"{'paths':>10} {'reference (s)':>15} {'vectorized (s)':>15} {'speedup':>10}")
+
+    for n in PATH_COUNTS:
+        ref = time_run(make_request(n, engine="reference"))
+        vec = time_run(make_request(n, engine="vectorized"), repeats=3)
+        print(f"{n:>10} {ref:>15.3f} {vec:>15.4f} {ref / vec:>9.1f}x")
+
+
+# -------------------------------------------------------------------
+# Parametric vs historical bootstrap returns
+# -------------------------------------------------------------------
+def bench_return_models(num_simulations: int = 20_000):
+    print(f"\n== Return models ({num_simulations:,} paths) ==")
+    print(f"{'return model':>14} {'model':>12} {'time (s)':>10} {'expected':>14} {'p5':>14}")
+
+    for return_model in ["parametric", "bootstrap"]:
+        for model in ["blended", "multi_asset"]:
+            request = make_request(num_simulations, return_model=return_model, model=model, seed=1)
+            elapsed = time_run(request, repeats=3)
+            result = run_monte_carlo_simulation(request)
+            print(f"{return_model:>14} {model:>12} {elapsed:>10.3f} "
+                  f"{result.expected_value:>14,.0f} {result.worst_case:>14,.0f}")
+
+
+# -------------------------------------------------------------------
+# Process-pool sharding
+# -------------------------------------------------------------------
+def bench_sharding(num_simulations: int = 200_000):
+    print(f"\n== Sharded execution ({num_simulations:,} paths, {os.cpu_count()} CPUs) ==")
+    print(f"{'workers':>10} {'time (s)':>10} {'speedup':>10}")
+
+    # Warm the pool so worker start-up is not billed to the first row
+    time_run(make_request(20_000, workers=os.cpu_count() or 1))
+
+    base = None
+    for workers in [1, 2, 4, 8]:
+        if workers > (os.cpu_count() or 1):
+            break
+        elapsed = time_run(make_request(num_simulations, workers=workers, seed=7))
+        base = base or elapsed
+        print(f"{workers:>10} {elapsed:>10.3f} {base / elapsed:>9.2f}x")
+
+
+# -------------------------------------------------------------------
+# Result cache
+# -------------------------------------------------------------------
+def bench_cache(num_simulations: int = 5_000, hits: int = 1_000):
+    print(f"\n== Result cache ({num_simulations:,} paths) ==")
+    request = make_request(num_simulations, use_cache=True)
+
+    start = time.perf_counter()
+    run_monte_carlo_simulation(request)
+    miss = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(hits):
+        run_monte_carlo_simulation(request)
+    hit = (time.perf_counter() - start) / hits
+
+    print(f"miss: {miss * 1000:.2f} ms   hit: {hit * 1e6:.1f} us")
+
+
+# -------------------------------------------------------------------
+# Variance reduction: standard error vs wall-clock time
+# -------------------------------------------------------------------
+def bench_variance_reduction(path_counts=(1_000, 4_000), replicates: int = 20):
+    """
+    Empirical standard error (std of the estimate over independent seeds)
+    of the expected value and the 5th percentile, per mode.
+    """
+    print(f"\n== Variance reduction ({replicates} replicates per row) ==")
+    print(f"{'mode':>16} {'paths':>7} {'SE mean':>12} {'SE p5':>12} {'time/run (s)':>13}")
+
+    for mode in ["none", "antithetic", "control_variate", "sobol"]:
+        for n in path_counts:
+            means, p5s = [], []
+            start = time.perf_counter()
+            for seed in range(replicates):
+                result = run_monte_carlo_simulation(make_request(n, variance_reduction=mode, seed=seed))
+                means.append(result.expected_value)
+                p5s.append(result.worst_case)
+            per_run = (time.perf_counter() - start) / replicates
+            print(f"{mode:>16} {n:>7} {np.std(means):>12,.0f} {np.std(p5s):>12,.0f} {per_run:>13.4f}")
+
+
+# -------------------------------------------------------------------
+# Scenario grid: one batch vs sequential single runs
+# -------------------------------------------------------------------
+def bench_batch(num_simulations: int = 5_000):
+    grid = ScenarioGrid(
+        allocations=[
+            Allocation(equity=e, debt=90 - e, gold=10, other=0) for e in (30, 40, 50, 60)
+        ],
+        monthly_amounts=[10_000, 15_000, 20_000],
+        duration_years=[10, 15, 20, 25],
+    )
+    scenarios = len(grid.allocations) * len(grid.monthly_amounts) * len(grid.duration_years)
+    print(f"\n== Scenario grid ({scenarios} scenarios, {num_simulations:,} paths) ==")
+
+    start = time.perf_counter()
+    run_batch_simulation(BatchSimulationRequest(
+        session_id="benchmark",
+        investment_type="sip",
+        grid=grid,
+        simulation_params=SimulationParams(num_simulations=num_simulations),
+    ))
+    batch = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for allocation in grid.allocations:
+        for monthly in grid.monthly_amounts:
+            for years in grid.duration_years:
+                run_monte_carlo_simulation(PortfolioSimulationRequest(
+                    session_id="benchmark",
+                    allocation=allocation,
+                    investment=InvestmentDetails(type="sip", monthly_amount=monthly, duration_years=years),
+                    simulation_params=SimulationParams(num_simulations=num_simulations, use_cache=False),
+                ))
+    sequential = time.perf_counter() - start
+
+    print(f"batch: {batch:.3f} s   sequential: {sequential:.3f} s   ({sequential / batch:.1f}x)")
+
+
+# -------------------------------------------------------------------
+# Rebalancing policies
+# -------------------------------------------------------------------
+def bench_rebalancing(num_simulations: int = 20_000):
+    print(f"\n== Rebalancing ({num_simulations:,} paths, multi_asset) ==")
+    print(f"{'policy':>18} {'time (s)':>10} {'vs none':>8} {'rebal/yr':>9} {'turnover':>9} {'excess vs B&H':>14}")
+
+    policies = {
+        "none": None,
+        "monthly": RebalancingPolicy(frequency_months=1),
+        "yearly": RebalancingPolicy(frequency_months=12),
+        "5pp threshold": RebalancingPolicy(frequency_months=None, threshold_pct=5),
+        "yearly + 5pp": RebalancingPolicy(frequency_months=12, threshold_pct=5),
+    }
+
+    base = None
+    for name, policy in policies.items():
+        request = make_request(num_simulations, model="multi_asset", rebalancing=policy, seed=1)
+        elapsed = time_run(request, repeats=3)
+        base = base or elapsed
+        report = run_monte_carlo_simulation(request).rebalancing
+        if report is None:
+            print(f"{name:>18} {elapsed:>10.3f} {1.0:>7.1f}x")
+            continue
+        print(f"{name:>18} {elapsed:>10.3f} {elapsed / base:>7.1f}x {report.rebalances_per_year:>9.2f} "
+              f"{report.annual_turnover:>9.2%} {report.excess_over_buy_and_hold:>14,.0f}")
+
+
+# -------------------------------------------------------------------
+# Return distributions
+# -------------------------------------------------------------------
+def bench_return_distributions(num_simulations: int = 10_000):
+    print(f"\n== Return distributions ({num_simulations:,} paths x 360 months) ==")
+    print(f"{'distribution':>18} {'model':>12} {'time (s)':>10} {'vs normal':>10} {'p5':>14} {'CVaR 5%':>14}")
+
+    for model in ["blended", "multi_asset"]:
+        base = None
+        for kind in ["normal", "student_t", "regime_switching", "jump_diffusion"]:
+            request = make_request(
+                num_simulations, model=model, seed=1, path_risk_metrics=False,
+                return_distribution=ReturnDistribution(type=kind),
+            )
+            elapsed = time_run(request, repeats=3)
+            base = base or elapsed
+            result = run_monte_carlo_simulation(request)
+            print(f"{kind:>18} {model:>12} {elapsed:>10.3f} {elapsed / base:>9.2f}x "
+                  f"{result.worst_case:>14,.0f} {result.conditional_value_at_risk:>14,.0f}")
+
+
+# -------------------------------------------------------------------
+# Peak memory (memory_limit_mb / precision)
+# -------------------------------------------------------------------
+def bench_memory(num_simulations: int = 100_000, years: int = 40):
+    months = years * 12
+    print(f"\n== Peak memory ({num_simulations:,} paths x {months} months) ==")
+    print(f"   one unsharded float64 draw matrix would be {num_simulations * months * 8 / 2**20:,.0f} MB")
+    print(f"{'model':>12} {'precision':>10} {'limit (MB)':>11} {'peak (MB)':>10} {'time (s)':>9} {'expected':>14}")
+
+    for model in ["blended", "multi_asset"]:
+        for precision in ["float64", "float32"]:
+            for limit in [None, 64, 16]:
+                request = make_request(
+                    num_simulations, model=model, precision=precision, memory_limit_mb=limit, seed=1
+                )
+                request.investment.duration_years = years
+
+                # tracemalloc sees NumPy's buffers; the first run also pays imports
+                tracemalloc.start()
+                start = time.perf_counter()
+                result = run_monte_carlo_simulation(request)
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+
+                print(f"{model:>12} {precision:>10} {limit or 'default':>11} {peak:>10.1f} "
+                      f"{elapsed:>9.2f} {result.expected_value:>14,.0f}")
+
+
+# -------------------------------------------------------------------
+# Numba kernels vs NumPy (path-dependent features)
+# -------------------------------------------------------------------
+def bench_kernels(num_simulations: int = 20_000):
+    print(f"\n== Path-dependent kernels ({num_simulations:,} paths, 30y) ==")
+    if not sim_kernels.NUMBA_AVAILABLE:
+        print("   numba is not installed; only the NumPy versions are available")
+        return
+
+    started = time.perf_counter()
+    sim_kernels.warmup_kernels()
+    print(f"   warm-up (compile or load cache): {time.perf_counter() - started:.2f}s")
+    print(f"{'feature':>22} {'numpy (s)':>10} {'numba (s)':>10} {'speedup':>8}")
+
+    swp = InvestmentDetails(
+        type="schedule", duration_years=30,
+        schedule=CashflowSchedule(initial_lumpsum=3_000_000, swp_monthly=20_000, inflation_pct=5),
+    )
+    cases = {
+        "drawdown tracking": make_request(num_simulations, seed=1),
+        "SWP + ruin": make_request(num_simulations, seed=1, path_risk_metrics=False),
+        "threshold rebalancing": make_request(
+            num_simulations, seed=1, model="multi_asset",
+            rebalancing=RebalancingPolicy(frequency_months=None, threshold_pct=5),
+        ),
+    }
+    cases["SWP + ruin"].investment = swp
+
+    enabled = sim_kernels.NUMBA_ENABLED
+    try:
+        for name, request in cases.items():
+            timings = []
+            for flag in (False, True):
+                sim_kernels.NUMBA_ENABLED = flag
+                timings.append(time_run(request, repeats=3))
+            print(f"{name:>22} {timings[0]:>10.3f} {timings[1]:>10.3f} {timings[0] / timings[1]:>7.1f}x")
+    finally:
+        sim_kernels.NUMBA_ENABLED = enabled
+
+
+# -------------------------------------------------------------------
+# Efficient frontier: build once, then per-request lookups
+# -------------------------------------------------------------------
+def bench_frontier(lookups: int = 10_000):
+    print("\n== Efficient frontier ==")
+    print(f"{'assumptions':>12} {'risk':>11} {'points':>7} {'build (s)':>10}")
+    for assumptions in ("parametric", "fund_data"):
+        for risk_measure in ("volatility", "cvar"):
+            started = time.perf_counter()
+            frontier = build_frontier(assumptions, risk_measure)
+            elapsed = time.perf_counter() - started
+            print(f"{assumptions:>12} {risk_measure:>11} {len(frontier.returns):>7} {elapsed:>10.3f}")
+
+    get_frontier()
+    started = time.perf_counter()
+    for i in range(lookups):
+        build_portfolio("moderate", tenure_years=1 + i % 30, risk_score=i % 100)
+    per_call = (time.perf_counter() - started) / lookups
+    print(f"   build_portfolio on the cached frontier: {per_call * 1e6:.1f}us per call")
+
+
+if __name__ == "__main__":
+    bench_engines()
+    bench_return_models()
+    bench_sharding()
+    bench_cache()
+    bench_variance_reduction()
+    bench_batch()
+    bench_rebalancing()
+    bench_return_distributions()
+    bench_memory()
+    bench_kernels()
+    bench_frontier()
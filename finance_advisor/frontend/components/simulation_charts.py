@@ -8,7 +8,6 @@ def show_simulation_results(result):
     best = result["best_case"]
     worst = result["worst_case"]
     prob = result["probability_of_goal_achievement"]
-    values = result["final_values"]
 
     st.subheader("Simulation Summary")
 
@@ -21,7 +20,16 @@ def show_simulation_results(result):
 
     # Chart
     fig = go.Figure()
-    fig.add_trace(go.Histogram(x=values, nbinsx=50, marker_color="#0070C9"))
+    histogram = result.get("histogram")
+    if histogram and histogram["counts"]:
+        # Backend already binned the paths — plot the bins as bars
+        edges = histogram["bin_edges"]
+        centers = [(lo + hi) / 2 for lo, hi in zip(edges[:-1], edges[1:])]
+        widths = [hi - lo for lo, hi in zip(edges[:-1], edges[1:])]
+        fig.add_trace(go.Bar(x=centers, y=histogram["counts"], width=widths, marker_color="#0070C9"))
+        fig.update_layout(bargap=0)
+    else:
+        fig.add_trace(go.Histogram(x=result.get("final_values", []), nbinsx=50, marker_color="#0070C9"))
     fig.update_layout(
         title="Distribution of Final Portfolio Values",
         xaxis_title="Portfolio Value (₹)",
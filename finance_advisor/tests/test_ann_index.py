@@ -0,0 +1,25 @@
+from backend.rag import ann_index
+from evaluation.rag_benchmark import exact_index, recall, synthetic_corpus, TOP_K
+
+
+def test_ann_indexes_recall_and_fallback(tmp_path):
+    vectors, queries = synthetic_corpus(4_000, dim=64)
+    flat = exact_index(vectors)
+    truth = flat.search(queries, TOP_K)[1]
+
+    # Small corpora stay exact whatever is configured
+    index, params = ann_index.build_search_index(flat, "hnsw", min_vectors=10_000)
+    assert index is None and params["type"] == "flat"
+
+    for index_type, minimum in (("hnsw", 0.9), ("ivfpq", 0.5)):
+        index, params = ann_index.build_search_index(flat, index_type, min_vectors=0)
+        assert params["type"] == index_type and params["ntotal"] == len(vectors)
+        assert recall(index.search(queries, TOP_K)[1], truth) >= minimum
+
+    # Saved next to the exact index and reloaded with its parameters
+    ann_file, params_file = str(tmp_path / "index.ann.faiss"), str(tmp_path / "index_params.json")
+    ann_index.write_search_index(flat, ann_file, params_file, "hnsw", min_vectors=0)
+    loaded, saved = ann_index.read_search_index(ann_file, params_file, len(vectors))
+    assert saved["type"] == "hnsw"
+    assert recall(loaded.search(queries, TOP_K)[1], truth) >= 0.9
+    assert ann_index.read_search_index(ann_file, params_file, len(vectors) + 1) == (None, None)
@@ -7,3 +7,73 @@ client = TestClient(app)
 def test_health():
     r = client.get("/health")
     assert r.status_code == 200
+
+
+def test_simulation_job_lifecycle():
+    import time
+
+    payload = {
+        "session_id": "1",
+        "allocation": {"equity": 50, "debt": 40, "gold": 5, "other": 5},
+        "investment": {"type": "sip", "monthly_amount": 10000, "duration_years": 10},
+        "simulation_params": {"num_simulations": 20000, "seed": 1, "use_cache": False},
+    }
+    r = client.post("/simulate/jobs", json=payload)
+    assert r.status_code == 202
+    job_id = r.json()["job_id"]
+
+    for _ in range(200):
+        job = client.get(f"/simulate/jobs/{job_id}").json()
+        if job["status"] == "completed":
+            break
+        time.sleep(0.05)
+
+    assert job["status"] == "completed"
+    assert job["progress"] == 1.0
+    assert job["result"]["paths_used"] == 20000
+    assert client.get("/simulate/jobs/unknown").status_code == 404
+
+
+def test_debug_simulation_cache_clear_is_delete(monkeypatch):
+    import fnmatch
+    from backend.tools import simulation_cache
+
+    class FakeRedis(dict):
+        def setex(self, key, ttl, value):
+            self[key] = value
+
+        def scan_iter(self, match, count=None):
+            return [k for k in list(self) if fnmatch.fnmatch(k, match)]
+
+        def delete(self, *keys):
+            return sum(self.pop(k, None) is not None for k in keys)
+
+    redis = FakeRedis({"session:1": "kept"})
+    monkeypatch.setattr(simulation_cache, "REDIS_ENABLED", True)
+    monkeypatch.setattr(simulation_cache, "_redis", lambda: redis)
+
+    payload = {
+        "session_id": "1",
+        "allocation": {"equity": 50, "debt": 40, "gold": 5, "other": 5},
+        "investment": {"type": "sip", "monthly_amount": 10000, "duration_years": 10},
+        "simulation_params": {"num_simulations": 1000, "seed": 9},
+    }
+    assert client.post("/simulate_portfolio", json=payload).status_code == 200
+    assert any(k.startswith(simulation_cache.CACHE_PREFIX) for k in redis)
+
+    assert client.get("/debug/simulation_cache/clear").status_code == 404
+    r = client.delete("/debug/simulation_cache")
+    assert r.status_code == 200
+    assert r.json()["cleared"]["redis"] == 1
+    assert list(redis) == ["session:1"]            # only simulation entries go
+    assert client.get("/debug/simulation_cache").json()["memory"]["entries"] == 0
+
+
+def test_batch_rejects_non_positive_durations():
+    allocation = {"equity": 60, "debt": 30, "gold": 5, "other": 5}
+    for body in (
+        {"scenarios": [{"allocation": allocation, "monthly_amount": 10000, "duration_years": -5}]},
+        {"grid": {"allocations": [allocation], "monthly_amounts": [10000], "duration_years": [10, 0]}},
+    ):
+        r = client.post("/simulate_portfolio/batch", json={"session_id": "1", "investment_type": "sip", **body})
+        assert r.status_code == 422
@@ -0,0 +1,80 @@
+import random
+import time
+
+import httpx
+from openai import RateLimitError
+
+from backend.rag import embedding_batches
+from backend.rag.embedding_batches import EmbeddingStats, RateLimiter, embed_in_batches, make_batches
+
+
+def test_make_batches_respects_limits():
+    batches = make_batches([5, 5, 5, 20, 1, 1, 1], max_tokens=10, max_items=2)
+    assert batches == [[0, 1], [2], [3], [4, 5], [6]]
+
+
+def test_batched_embedding_keeps_order_and_retries(monkeypatch):
+    monkeypatch.setattr(embedding_batches, "make_batches", lambda tokens: [[i] for i in range(len(tokens))])
+    monkeypatch.setattr(embedding_batches, "_retry_after", lambda ex, attempt: 0.0)
+
+    throttled = set()
+
+    def fake_embed(batch):
+        time.sleep(random.random() / 100)
+        if batch[0] not in throttled and int(batch[0]) % 3 == 0:
+            throttled.add(batch[0])
+            response = httpx.Response(429, request=httpx.Request("POST", "https://example.invalid"))
+            raise RateLimitError("rate limited", response=response, body=None)
+        return [[float(t)] for t in batch]
+
+    texts = [str(i) for i in range(20)]
+    stats = EmbeddingStats()
+    vectors = embed_in_batches(texts, fake_embed, limiter=RateLimiter(0, 0), workers=4, stats=stats)
+
+    assert vectors == [[float(i)] for i in range(20)]
+    assert stats.retries == 7 and stats.requests == 20 and stats.chunks == 20
+
+
+def test_rate_limiter_waits_for_token_budget():
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=60_000)
+    limiter.acquire(60_000)               # drains the bucket
+    started = time.monotonic()
+    limiter.acquire(100)                  # 100 tokens refill in 0.1s
+    assert 0.05 < time.monotonic() - started < 1.0
+
+
+def test_calls_share_the_default_rate_limiter(monkeypatch):
+    monkeypatch.setattr(embedding_batches, "rate_limiter", RateLimiter(requests_per_minute=0, tokens_per_minute=6_000))
+    monkeypatch.setattr(embedding_batches, "count_tokens", lambda text: 100)
+    fake_embed = lambda batch: [[0.0]] * len(batch)
+
+    embed_in_batches(["chunk"] * 60, fake_embed)          # drains the minute's 6,000 tokens
+    started = time.monotonic()
+    embed_in_batches(["query"], fake_embed)               # 100 tokens refill in 1s
+    assert 0.5 < time.monotonic() - started < 3.0
+
+
+def test_retries_happen_here_not_in_the_sdk(monkeypatch):
+    from openai import InternalServerError
+
+    from backend import azure_openai
+
+    assert azure_openai.embedding_client.max_retries == 0
+    assert azure_openai.client.max_retries > 0            # chat keeps the SDK default
+
+    monkeypatch.setattr(embedding_batches, "_retry_after", lambda ex, attempt: 0.0)
+    acquired, failures = [], [503]
+
+    class CountingLimiter(RateLimiter):
+        def acquire(self, tokens):
+            acquired.append(tokens)
+
+    def flaky_embed(batch):
+        if failures:
+            response = httpx.Response(failures.pop(), request=httpx.Request("POST", "https://example.invalid"))
+            raise InternalServerError("unavailable", response=response, body=None)
+        return [[1.0] for _ in batch]
+
+    stats = EmbeddingStats()
+    assert embed_in_batches(["a"], flaky_embed, limiter=CountingLimiter(), stats=stats) == [[1.0]]
+    assert len(acquired) == 2 and stats.retries == 1     # each attempt went through the limiter
@@ -0,0 +1,55 @@
+import numpy as np
+
+from backend.rag import embedder
+from backend.rag.embedding_cache import EmbeddingCache
+
+
+def test_embedding_cache_skips_known_texts(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_embeddings(texts):
+        calls.append(list(texts))
+        return [[float(len(t)), 1.0, 2.0] for t in texts]
+
+    cache = EmbeddingCache(str(tmp_path))
+    monkeypatch.setattr(embedder, "create_embeddings", fake_embeddings)
+    monkeypatch.setattr(embedder, "get_embedding_cache", lambda deployment: cache)
+
+    first = embedder.embed_texts(["equity funds", "debt  funds", "equity funds"])
+    assert calls == [["equity funds", "debt  funds"]]       # duplicates embedded once
+
+    # Normalized whitespace hits; only the new text goes out
+    second = embedder.embed_texts(["debt funds", "gold"])
+    assert calls[-1] == ["gold"]
+    assert second[0] == first[1]
+
+    # A fresh process reads the same rows back from disk, no calls at all
+    reopened = EmbeddingCache(str(tmp_path))
+    monkeypatch.setattr(embedder, "get_embedding_cache", lambda deployment: reopened)
+    assert embedder.embed_texts(["equity funds", "gold"]) == [first[0], second[1]]
+    assert len(calls) == 2
+    assert isinstance(reopened.vectors, np.memmap)
+
+    # Query embeddings bypass the cache entirely
+    rows = len(reopened.rows)
+    embedder.embed_texts(["what is my sip return"], cache=False)
+    assert calls[-1] == ["what is my sip return"] and len(reopened.rows) == rows
+
+
+def test_embedding_cache_shared_between_processes(tmp_path):
+    # Two workers open the same directory before either has written a row
+    a, b = EmbeddingCache(str(tmp_path)), EmbeddingCache(str(tmp_path))
+    alpha, beta, gamma = (np.full((1, 4), v, dtype=np.float32) for v in (1.0, 2.0, 3.0))
+    key_alpha, key_beta, key_gamma = b"a" * 32, b"b" * 32, b"c" * 32
+
+    a.put([key_alpha], alpha)
+    b.put([key_beta], beta)          # appended after alpha, not over it
+    a.put([key_gamma, key_beta], np.vstack([gamma, beta]))
+
+    assert np.array_equal(b.get([key_beta])[0], beta[0])
+    assert np.array_equal(a.get([key_beta])[0], beta[0])
+
+    fresh = EmbeddingCache(str(tmp_path))
+    assert len(fresh.rows) == 3
+    for key, vector in ((key_alpha, alpha), (key_beta, beta), (key_gamma, gamma)):
+        assert np.array_equal(fresh.get([key])[0], vector[0])
@@ -0,0 +1,56 @@
+import os
+
+import faiss
+import numpy as np
+
+from backend.rag import index_builder
+
+
+def test_incremental_index_build(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for name, text in {"a.txt": "equity funds", "b.txt": "debt funds", "c.txt": "gold etfs"}.items():
+        (docs / name).write_text(text)
+
+    index_dir = tmp_path / "index"
+    for name, file in (("INDEX_FILE", "index.faiss"), ("META_FILE", "meta.bin"), ("MANIFEST_FILE", "manifest.json"),
+                       ("ANN_FILE", "index.ann.faiss"), ("ANN_PARAMS_FILE", "index_params.json")):
+        monkeypatch.setattr(index_builder, name, str(index_dir / file))
+    monkeypatch.setattr(index_builder, "INDEX_DIR", str(index_dir))
+    monkeypatch.setattr(index_builder, "list_data_files",
+                        lambda: [(f"docs/{f}", str(docs / f)) for f in sorted(os.listdir(docs))])
+
+    embedded = []
+
+    def fake_embed(texts, stats=None):
+        embedded.append(list(texts))
+        return [[float(len(t)), float(t.count("e")), 1.0] for t in texts]
+
+    monkeypatch.setattr(index_builder, "embed_texts", fake_embed)
+
+    def current():
+        state = index_builder._load_state()
+        assert state is not None
+        index, meta, manifest = state
+        assert index.ntotal == len(meta)
+        return {m["source"]: m["text"] for m in meta.values()}, index
+
+    index_builder.build_index()
+    assert current()[0] == {"docs/a.txt": "equity funds", "docs/b.txt": "debt funds", "docs/c.txt": "gold etfs"}
+
+    # Edit one file, delete another, touch a third without changing it
+    (docs / "a.txt").write_text("equity index funds")
+    os.remove(docs / "b.txt")
+    os.utime(docs / "c.txt", ns=(0, 0))
+    index_builder.build_index()
+    assert embedded[-1] == ["equity index funds"]
+
+    texts, index = current()
+    assert texts == {"docs/a.txt": "equity index funds", "docs/c.txt": "gold etfs"}
+    _, ids = index.search(np.array([[18.0, 2.0, 1.0]], dtype="float32"), 1)
+    assert index_builder._load_state()[1][int(ids[0][0])]["source"] == "docs/a.txt"
+    assert isinstance(index, faiss.IndexIDMap)
+
+    # Nothing changed: no embedding calls
+    index_builder.build_index()
+    assert len(embedded) == 2
@@ -0,0 +1,28 @@
+import faiss
+
+from backend.rag import vector_store
+from backend.rag.meta_store import MappedMeta, write_meta
+
+
+def test_mapped_meta_and_store_reload(tmp_path, monkeypatch):
+    meta = {7: {"text": "équité  funds", "source": "a.txt"}, 2: {"text": "", "source": "b.txt"},
+            40: {"text": "gold", "source": "a.txt"}}
+    write_meta(str(tmp_path / "meta.bin"), meta)
+    mapped = MappedMeta(str(tmp_path / "meta.bin"))
+    assert dict(mapped.items()) == meta
+    assert list(mapped) == [2, 7, 40] and 3 not in mapped and mapped.get(3) is None
+
+    # A store built from scratch is written as meta.bin and reopened mapped
+    for name, file in (("INDEX_FILE", "index.faiss"), ("META_FILE", "store_meta.bin"),
+                       ("LEGACY_META_FILE", "meta.pkl"), ("ANN_FILE", "index.ann.faiss"),
+                       ("ANN_PARAMS_FILE", "index_params.json")):
+        monkeypatch.setattr(vector_store, name, str(tmp_path / file))
+    monkeypatch.setattr(vector_store, "embed_texts", lambda texts, **kwargs: [[float(len(t))] * 1536 for t in texts])
+
+    store = vector_store.VectorStore()
+    store.add_documents(["sip", "nav"], ["x.txt", "y.txt"])
+    store.add_documents(["expense ratio"], ["z.txt"])
+
+    assert isinstance(store.meta, MappedMeta) and len(store.meta) == 3
+    assert isinstance(store.search_index, faiss.IndexIDMap)
+    assert store.search("expense ratio", 1) == [{"text": "expense ratio", "source": "z.txt"}]
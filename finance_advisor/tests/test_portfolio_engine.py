@@ -0,0 +1,23 @@
+from backend.tools.portfolio_engine import build_portfolio
+from backend.tools.efficient_frontier import get_frontier, ALLOCATION_BOUNDS
+
+
+def test_frontier_portfolios():
+    frontier = get_frontier()
+    assert (frontier.risks[1:] >= frontier.risks[:-1]).all()
+    assert (frontier.returns[1:] > frontier.returns[:-1]).all()
+
+    def equity(*args, **kwargs):
+        allocation = build_portfolio(*args, **kwargs)
+        assert abs(sum(allocation.values()) - 100.0) < 1e-9
+        for asset, (lo, hi) in ALLOCATION_BOUNDS.items():
+            assert lo <= allocation[asset] <= hi
+        return allocation["equity"]
+
+    # More risk appetite and longer horizons move up the frontier
+    assert equity("conservative") < equity("moderate") < equity("aggressive")
+    assert equity("aggressive", tenure_years=2) < equity("aggressive", tenure_years=15)
+    assert equity("moderate", risk_score=20) < equity("moderate", risk_score=85)
+    assert equity("unknown") == equity("moderate")
+
+    assert sum(build_portfolio("moderate", risk_measure="cvar").values()) == 100.0
@@ -1,3 +1,4 @@
+import pytest
 from backend.tools.portfolio_sim import run_monte_carlo_simulation
 from backend.models.simulate import *
 
@@ -11,3 +12,507 @@ def test_simulation_basic():
     )
     result = run_monte_carlo_simulation(req)
     assert result.expected_value > 0
+
+
+def test_vectorized_matches_reference():
+    def make(engine):
+        return PortfolioSimulationRequest(
+            session_id="1",
+            allocation=Allocation(equity=50, debt=40, gold=5, other=5),
+            investment=InvestmentDetails(type="sip", monthly_amount=10000, duration_years=10),
+            simulation_params=SimulationParams(num_simulations=2000, engine=engine)
+        )
+
+    ref = run_monte_carlo_simulation(make("reference"))
+    vec = run_monte_carlo_simulation(make("vectorized"))
+    assert abs(vec.expected_value - ref.expected_value) / ref.expected_value < 0.01
+    assert sum(vec.histogram.counts) == 2000
+    assert vec.final_values is None
+
+
+def test_multi_asset_diversifies():
+    def make(model):
+        return PortfolioSimulationRequest(
+            session_id="1",
+            allocation=Allocation(equity=50, debt=30, gold=10, other=10),
+            investment=InvestmentDetails(type="lumpsum", lumpsum_amount=100000, duration_years=10),
+            simulation_params=SimulationParams(num_simulations=5000, model=model)
+        )
+
+    blended = run_monte_carlo_simulation(make("blended"))
+    multi = run_monte_carlo_simulation(make("multi_asset"))
+
+    # Correlations below 1 shrink the spread of outcomes
+    assert multi.best_case - multi.worst_case < blended.best_case - blended.worst_case
+
+
+def test_sharded_run_is_reproducible():
+    def make(workers):
+        return PortfolioSimulationRequest(
+            session_id="1",
+            allocation=Allocation(equity=50, debt=40, gold=5, other=5),
+            investment=InvestmentDetails(type="sip", monthly_amount=10000, duration_years=5),
+            simulation_params=SimulationParams(
+                num_simulations=25000, workers=workers, seed=42,
+                return_final_values=True, use_cache=False
+            )
+        )
+
+    serial = run_monte_carlo_simulation(make(1))
+    sharded = run_monte_carlo_simulation(make(2))
+    assert serial.final_values == sharded.final_values
+    assert abs(serial.expected_value - sharded.expected_value) < 1e-6 * serial.expected_value
+
+
+def test_quantile_sketch_matches_sorted_values():
+    import numpy as np
+    from backend.tools.simulation_stats import QuantileSketch
+
+    values = np.random.default_rng(0).lognormal(15, 0.5, 20000)
+    left, right = QuantileSketch(), QuantileSketch()
+    left.add(values[:7000])
+    right.add(values[7000:])
+    left.merge(right)
+
+    exact = np.sort(values)
+    for q in (0.05, 0.5, 0.95):
+        true = exact[int(q * (len(exact) - 1))]
+        assert abs(left.quantile(q) - true) <= left.relative_accuracy * true
+
+
+def test_repeated_request_is_served_from_cache():
+    from backend.tools.simulation_cache import simulation_cache_stats
+
+    def make(session_id):
+        return PortfolioSimulationRequest(
+            session_id=session_id,
+            allocation=Allocation(equity=60, debt=30, gold=10, other=0),
+            investment=InvestmentDetails(type="sip", monthly_amount=15000, duration_years=15),
+            simulation_params=SimulationParams(num_simulations=3000)
+        )
+
+    first = run_monte_carlo_simulation(make("a"))
+    hits = simulation_cache_stats()["memory"]["hits"]
+
+    second = run_monte_carlo_simulation(make("b"))    # session_id is not part of the key
+    assert simulation_cache_stats()["memory"]["hits"] == hits + 1
+    assert second.expected_value == first.expected_value
+
+    # Every hit is a private copy: editing one leaves the cached entry alone
+    assert second is not first and second.percentiles is not first.percentiles
+    second.percentiles["p50"] = 0.0
+    second.histogram.counts.clear()
+    third = run_monte_carlo_simulation(make("c"))
+    assert third.percentiles == first.percentiles and third.histogram == first.histogram
+
+
+def test_variance_reduction_modes_agree():
+    def make(mode, n):
+        return PortfolioSimulationRequest(
+            session_id="1",
+            allocation=Allocation(equity=50, debt=40, gold=5, other=5),
+            investment=InvestmentDetails(type="sip", monthly_amount=10000, duration_years=10),
+            simulation_params=SimulationParams(num_simulations=n, variance_reduction=mode, seed=1)
+        )
+
+    baseline = run_monte_carlo_simulation(make("none", 20000)).expected_value
+    for mode in ("antithetic", "control_variate", "sobol"):
+        estimate = run_monte_carlo_simulation(make(mode, 2000)).expected_value
+        assert abs(estimate - baseline) / baseline < 0.005
+
+
+def test_float32_with_every_variance_reduction(monkeypatch):
+    from backend.tools import portfolio_sim
+
+    def run(mode, model):
+        return run_monte_carlo_simulation(PortfolioSimulationRequest(
+            session_id="1",
+            allocation=Allocation(equity=50, debt=40, gold=5, other=5),
+            investment=InvestmentDetails(type="sip", monthly_amount=10000, duration_years=10),
+            simulation_params=SimulationParams(
+                num_simulations=2001, variance_reduction=mode, model=model,
+                precision="float32", seed=2, use_cache=False
+            )
+        ))
+
+    for model in ("blended", "multi_asset"):
+        baseline = run("none", model)
+        for mode in ("antithetic", "sobol", "control_variate"):
+            result = run(mode, model)
+            assert result.paths_used == 2001
+            assert abs(result.expected_value - baseline.expected_value) < 4 * baseline.standard_error
+
+    # Too many dimensions for Sobol: falls back to antithetic draws
+    monkeypatch.setattr(portfolio_sim, "SOBOL_MAX_DIMENSIONS", 1)
+    assert run("sobol", "blended").paths_used == 2001
+
+
+def test_adaptive_mode_stops_at_target_precision():
+    req = PortfolioSimulationRequest(
+        session_id="1",
+        allocation=Allocation(equity=20, debt=60, gold=10, other=10),
+        investment=InvestmentDetails(type="lumpsum", lumpsum_amount=500000, duration_years=5),
+        simulation_params=SimulationParams(
+            num_simulations=200000, target_relative_error=0.005, seed=3
+        )
+    )
+    result = run_monte_carlo_simulation(req)
+
+    assert result.paths_used < 200000
+    assert result.standard_error <= 0.005 * result.expected_value
+    assert result.probability_standard_error <= 0.01
+
+
+def test_adaptive_mode_does_not_depend_on_workers():
+    def run(workers):
+        return run_monte_carlo_simulation(PortfolioSimulationRequest(
+            session_id="1",
+            allocation=Allocation(equity=60, debt=30, gold=5, other=5),
+            investment=InvestmentDetails(type="sip", monthly_amount=10000, duration_years=10),
+            simulation_params=SimulationParams(
+                num_simulations=100000, target_relative_error=0.0015, adaptive_batch_size=500,
+                workers=workers, seed=4, use_cache=False
+            )
+        ))
+
+    serial, parallel = run(1), run(4)
+    assert 2000 < serial.paths_used < 100000 and serial.paths_used % 2000 != 0
+    assert parallel.paths_used == serial.paths_used
+    assert parallel.expected_value == serial.expected_value
+    assert parallel.percentiles == serial.percentiles
+
+
+def test_batch_scenarios_share_random_draws():
+    from backend.tools.scenario_sim import run_batch_simulation
+
+    req = BatchSimulationRequest(
+        session_id="1",
+        investment_type="sip",
+        grid=ScenarioGrid(
+            allocations=[Allocation(equity=50, debt=40, gold=5, other=5)],
+            monthly_amounts=[10000, 15000],
+            duration_years=[10, 15],
+        ),
+        simulation_params=SimulationParams(num_simulations=2000, seed=5)
+    )
+    rows = run_batch_simulation(req).results
+    assert len(rows) == 4
+
+    # Common random numbers: a 1.5x SIP is exactly 1.5x on every path
+    by_key = {(r.monthly_amount, r.duration_years): r for r in rows}
+    assert abs(by_key[(15000, 10)].expected_value / by_key[(10000, 10)].expected_value - 1.5) < 1e-9
+    assert by_key[(10000, 15)].expected_value > by_key[(10000, 10)].expected_value
+
+
+def test_bootstrap_return_model_from_fund_csvs():
+    from backend.tools.return_model import build_return_model, load_return_model
+
+    model = load_return_model()
+    assert len(model.fund_ids) == len(build_return_model().fund_ids) > 0
+    assert set(model.asset_class) == {"equity", "debt", "other"}
+
+    def run(**params):
+        req = PortfolioSimulationRequest(
+            session_id="1",
+            allocation=Allocation(equity=60, debt=30, gold=5, other=5),
+            investment=InvestmentDetails(type="sip", monthly_amount=10000, duration_years=10),
+            simulation_params=SimulationParams(
+                num_simulations=2000, seed=3, use_cache=False, return_model="bootstrap", **params
+            )
+        )
+        return run_monte_carlo_simulation(req)
+
+    first, again = run(), run()
+    assert first.expected_value == again.expected_value
+    assert first.worst_case < first.expected_value < first.best_case
+
+    # Narrowing to small caps widens the spread of outcomes
+    small_caps = run(sub_categories=["Small Cap"])
+    assert small_caps.best_case - small_caps.worst_case > first.best_case - first.worst_case
+
+    # A class the filter leaves without funds uses the parametric figures
+    fallback = {"equity": (0.12, 0.18), "debt": (0.07, 0.05)}
+    (equity, _), (debt, debt_residuals) = model.pools(("equity", "debt"), fallback, ["Small Cap"])
+    assert len(equity) == len(model.select("equity", ["Small Cap"])) > 0
+    assert (debt == 0.07).all() and debt_residuals.tolist() == [0.05]
+
+    nothing = model.pools(("equity", "debt"), fallback, ["No Such Category"])
+    assert [(h.shape[0], float(h[0, 0])) for h, _ in nothing] == [(1, 0.12), (1, 0.07)]
+
+
+def test_path_risk_metrics():
+    import numpy as np
+    from backend.tools.portfolio_sim import _path_risk
+
+    # Up 10%, down to 0.77 (-30% from peak), back above the peak
+    factors = np.array([[1.1, 0.7, 1.5, 1.0]])
+    max_drawdown, under_water = _path_risk(factors, periods_per_year=1)
+    assert abs(max_drawdown[0] - 0.3) < 1e-12
+    assert under_water[0] == 12          # one year below the peak
+
+    req = PortfolioSimulationRequest(
+        session_id="1",
+        allocation=Allocation(equity=80, debt=10, gold=5, other=5),
+        investment=InvestmentDetails(type="lumpsum", lumpsum_amount=100000, duration_years=20),
+        simulation_params=SimulationParams(num_simulations=5000, seed=2, use_cache=False)
+    )
+    result = run_monte_carlo_simulation(req)
+    dd = result.risk_metrics.max_drawdown
+    assert 0 <= dd["p5"] <= dd["p50"] <= dd["p95"] <= 1
+    assert result.conditional_value_at_risk < result.worst_case
+
+
+def test_goal_solver_matches_simulation():
+    from backend.tools.goal_solver import solve_goal
+
+    allocation = Allocation(equity=60, debt=30, gold=5, other=5)
+    params = SimulationParams(num_simulations=4000, seed=4, goal_amount=10_000_000, use_cache=False)
+    solved = solve_goal(GoalSolveRequest(
+        session_id="1", allocation=allocation, investment_type="sip",
+        goal_amount=10_000_000, target_probability=0.8, duration_years=15,
+        simulation_params=params,
+    ))
+    assert solved.achieved_probability >= 0.8
+
+    # Same seed -> same draws: the engine agrees with the solved amount
+    check = run_monte_carlo_simulation(PortfolioSimulationRequest(
+        session_id="1", allocation=allocation,
+        investment=InvestmentDetails(type="sip", monthly_amount=solved.required_amount, duration_years=15),
+        simulation_params=params,
+    ))
+    assert abs(check.probability_of_goal_achievement - 0.8) < 0.01
+
+    tenure = solve_goal(GoalSolveRequest(
+        session_id="1", allocation=allocation, investment_type="sip",
+        goal_amount=10_000_000, solve_for="duration", monthly_amount=solved.required_amount,
+        simulation_params=params,
+    ))
+    assert tenure.required_duration_years == 15
+
+
+def test_cashflow_schedules():
+    def run(investment):
+        return run_monte_carlo_simulation(PortfolioSimulationRequest(
+            session_id="1",
+            allocation=Allocation(equity=60, debt=30, gold=5, other=5),
+            investment=investment,
+            simulation_params=SimulationParams(num_simulations=2000, seed=3, use_cache=False)
+        ))
+
+    # A flat schedule is the plain SIP, path for path
+    flat = run(InvestmentDetails(type="sip", monthly_amount=10000, duration_years=10))
+    schedule = run(InvestmentDetails(
+        type="schedule", duration_years=10, schedule=CashflowSchedule(monthly_sip=10000)
+    ))
+    assert abs(schedule.expected_value - flat.expected_value) < 1e-6 * flat.expected_value
+    assert schedule.depletion_probability is None
+
+    step_up = run(InvestmentDetails(
+        type="schedule", duration_years=10,
+        schedule=CashflowSchedule(monthly_sip=10000, sip_step_up_pct=10)
+    ))
+    assert step_up.expected_value > flat.expected_value
+
+    # Withdrawals larger than the corpus can sustain empty it on every path
+    swp = run(InvestmentDetails(
+        type="schedule", duration_years=20,
+        schedule=CashflowSchedule(initial_lumpsum=1_000_000, swp_monthly=20000)
+    ))
+    assert swp.depletion_probability == 1.0
+    assert swp.expected_value == 0.0
+
+
+def test_float32_schedule_accumulates_in_float64():
+    import numpy as np
+    from backend.tools.cashflows import compile_cashflows
+    from backend.tools.portfolio_sim import _evolve
+
+    payload = PortfolioSimulationRequest(
+        session_id="1",
+        allocation=Allocation(equity=60, debt=30, gold=5, other=5),
+        investment=InvestmentDetails(
+            type="schedule", duration_years=30,
+            schedule=CashflowSchedule(initial_lumpsum=500000, monthly_sip=10000, sip_step_up_pct=10)
+        ),
+        simulation_params=SimulationParams(precision="float32"),
+    )
+    factors = np.random.default_rng(0).normal(1.008, 0.04, size=(500, 360)).astype(np.float32)
+
+    # The cumulative product stays float32; only the cashflow sum is widened
+    growth = np.multiply.accumulate(factors[:, ::-1], axis=1)[:, ::-1].astype(np.float64)
+    initial, flows = compile_cashflows(payload.investment)
+    expected = growth[:, 1:] @ flows[:-1] + flows[-1] + initial * growth[:, 0]
+
+    values, _ = _evolve(factors, payload)
+    assert values.dtype == np.float64
+    assert np.allclose(values, expected, rtol=1e-12, atol=0)
+
+
+def test_rebalancing_policies():
+    def run(policy):
+        return run_monte_carlo_simulation(PortfolioSimulationRequest(
+            session_id="1",
+            allocation=Allocation(equity=50, debt=30, gold=10, other=10),
+            investment=InvestmentDetails(type="sip", monthly_amount=10000, duration_years=10),
+            simulation_params=SimulationParams(
+                num_simulations=2000, seed=5, model="multi_asset", rebalancing=policy, use_cache=False
+            )
+        ))
+
+    # Rebalancing every month is what the multi-asset engine already assumes
+    base = run(None)
+    monthly = run(RebalancingPolicy(frequency_months=1))
+    assert base.rebalancing is None
+    assert abs(monthly.expected_value - base.expected_value) < 1e-6 * base.expected_value
+    assert monthly.rebalancing.rebalances_per_year == 12
+
+    yearly = run(RebalancingPolicy(frequency_months=12, threshold_pct=5))
+    assert yearly.rebalancing.rebalances_per_year >= 1
+    assert yearly.rebalancing.annual_turnover > 0
+    assert 0 <= yearly.rebalancing.outperformance_probability <= 1
+
+    # Same draws: the buy-and-hold twin does not depend on the policy
+    threshold = run(RebalancingPolicy(frequency_months=None, threshold_pct=5))
+    assert threshold.rebalancing.buy_and_hold_expected_value == yearly.rebalancing.buy_and_hold_expected_value
+    assert threshold.rebalancing.rebalances_per_year < yearly.rebalancing.rebalances_per_year
+
+
+def test_return_distributions():
+    import numpy as np
+    from backend.tools.return_generators import get_return_generator
+
+    rng = np.random.default_rng(0)
+    for kind in ["student_t", "regime_switching", "jump_diffusion"]:
+        # Same mean / variance as the normal shocks, fatter tails
+        shocks = get_return_generator(ReturnDistribution(type=kind)).shocks(
+            rng.standard_normal((2000, 360)), rng, 12
+        )
+        assert abs(shocks.mean()) < 0.01
+        assert abs(shocks.var() - 1) < 0.02
+        assert ((shocks - shocks.mean()) ** 4).mean() / shocks.var() ** 2 > 3.5
+
+        result = run_monte_carlo_simulation(PortfolioSimulationRequest(
+            session_id="1",
+            allocation=Allocation(equity=60, debt=30, gold=5, other=5),
+            investment=InvestmentDetails(type="sip", monthly_amount=10000, duration_years=10),
+            simulation_params=SimulationParams(
+                num_simulations=1000, seed=2, model="multi_asset", use_cache=False,
+                return_distribution=ReturnDistribution(type=kind),
+            )
+        ))
+        assert result.worst_case < result.percentiles["p50"] < result.best_case
+
+
+def test_stress_test_replay():
+    import numpy as np
+    from backend.tools.stress_replay import load_stress_library, run_stress_test
+
+    def run(allocation, **kwargs):
+        return run_stress_test(StressTestRequest(
+            session_id="1",
+            allocation=allocation,
+            investment=InvestmentDetails(type="lumpsum", lumpsum_amount=1_000_000, duration_years=10),
+            **kwargs
+        ))
+
+    equity = run(Allocation(equity=100, debt=0, gold=0, other=0), scenario_ids=["covid_2020"])
+    covid = equity.results[0]
+    library = load_stress_library()
+    stored = library.returns[library.ids.index("covid_2020"), :covid.months_applied, 0]
+    assert abs(covid.portfolio_return - (np.prod(1 + stored) - 1)) < 1e-12
+    assert abs(covid.value_after - 1_000_000 * (1 + covid.portfolio_return)) < 1e-6
+    assert covid.terminal_shortfall > 0
+
+    # Debt rides out every stored crash better than equity
+    debt = run(Allocation(equity=0, debt=100, gold=0, other=0))
+    all_equity = run(Allocation(equity=100, debt=0, gold=0, other=0))
+    assert len(debt.results) == len(library.ids)
+    for d, e in zip(debt.results, all_equity.results):
+        assert d.max_drawdown <= e.max_drawdown
+
+
+def test_seed_echoed_and_reproducible():
+    def run(**params):
+        return run_monte_carlo_simulation(PortfolioSimulationRequest(
+            session_id="1",
+            allocation=Allocation(equity=60, debt=30, gold=5, other=5),
+            investment=InvestmentDetails(type="sip", monthly_amount=10000, duration_years=5),
+            simulation_params=SimulationParams(num_simulations=300, use_cache=False, **params)
+        ))
+
+    for engine in ["vectorized", "reference"]:
+        first = run(engine=engine)
+        assert first.seed is not None
+
+        # Sending the echoed seed back reproduces the run exactly
+        replay = run(engine=engine, seed=first.seed)
+        assert replay.seed == first.seed
+        assert replay.expected_value == first.expected_value
+        assert replay.percentiles == first.percentiles
+
+
+def test_memory_limit_bounds_peak():
+    import tracemalloc
+
+    def run(num_simulations=20000, **params):
+        return run_monte_carlo_simulation(PortfolioSimulationRequest(
+            session_id="1",
+            allocation=Allocation(equity=60, debt=30, gold=5, other=5),
+            investment=InvestmentDetails(type="sip", monthly_amount=10000, duration_years=20),
+            simulation_params=SimulationParams(
+                num_simulations=num_simulations, seed=6, model="multi_asset", use_cache=False, **params
+            )
+        ))
+
+    run(num_simulations=100)                 # imports / warm-up outside the trace
+    for precision in ["float64", "float32"]:
+        tracemalloc.start()
+        result = run(memory_limit_mb=8, precision=precision)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        assert result.paths_used == 20000
+        assert peak < 8 * 1024 * 1024 * 1.25
+
+    # float32 draws are a different stream, but the same distribution
+    full = run()
+    single = run(precision="float32")
+    assert abs(single.expected_value - full.expected_value) < 4 * full.standard_error
+
+
+def test_kernels_match_numpy():
+    from backend.tools import sim_kernels
+
+    swp = InvestmentDetails(
+        type="schedule", duration_years=3,
+        schedule=CashflowSchedule(initial_lumpsum=500_000, swp_monthly=15_000, inflation_pct=5),
+    )
+    requests = [
+        PortfolioSimulationRequest(
+            session_id="1",
+            allocation=Allocation(equity=50, debt=30, gold=10, other=10),
+            investment=investment,
+            simulation_params=SimulationParams(
+                num_simulations=200, seed=8, model="multi_asset", use_cache=False,
+                rebalancing=RebalancingPolicy(frequency_months=6, threshold_pct=3),
+            )
+        )
+        for investment in (swp, InvestmentDetails(type="sip", monthly_amount=10000, duration_years=3))
+    ]
+
+    # Without numba installed the kernels run as plain Python, same logic
+    enabled = sim_kernels.NUMBA_ENABLED
+    try:
+        for request in requests:
+            results = []
+            for flag in (False, True):
+                sim_kernels.NUMBA_ENABLED = flag
+                results.append(run_monte_carlo_simulation(request))
+            numpy_result, kernel_result = results
+
+            assert kernel_result.expected_value == pytest.approx(numpy_result.expected_value)
+            assert kernel_result.depletion_probability == numpy_result.depletion_probability
+            assert kernel_result.rebalancing.model_dump() == pytest.approx(numpy_result.rebalancing.model_dump())
+            assert kernel_result.risk_metrics == numpy_result.risk_metrics
+    finally:
+        sim_kernels.NUMBA_ENABLED = enabled